@@ -12,14 +12,15 @@ class Bits:
         0x4040404040404040,  # Cột G
         0x8080808080808080   # Cột H
     ]
-    WhiteKingsideMask = (1 << 5) | (1 << 6)
-    BlackKingsideMask = (1 << 61) | (1 << 62)
+    # Ô 0 = a8, ô 63 = h1 (cùng hướng với board_array)
+    WhiteKingsideMask = (1 << 61) | (1 << 62)
+    BlackKingsideMask = (1 << 5) | (1 << 6)
 
-    WhiteQueensideMask2 = (1 << 3) | (1 << 2)
-    BlackQueensideMask2 = (1 << 59) | (1 << 58)
+    WhiteQueensideMask2 = (1 << 59) | (1 << 58)
+    BlackQueensideMask2 = (1 << 3) | (1 << 2)
 
-    WhiteQueensideMask = WhiteQueensideMask2 | (1 << 1)
-    BlackQueensideMask = BlackQueensideMask2 | (1 << 57)
+    WhiteQueensideMask = WhiteQueensideMask2 | (1 << 57)
+    BlackQueensideMask = BlackQueensideMask2 | (1 << 1)
 
     WhitePassedPawnMask = np.zeros(64, dtype=np.uint64)
     BlackPassedPawnMask = np.zeros(64, dtype=np.uint64)
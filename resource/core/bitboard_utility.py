@@ -14,10 +14,15 @@ class BitboardUtility:
     notAFile = ~FileA & 0xFFFFFFFFFFFFFFFF
     notHFile = ~(FileA << 7) & 0xFFFFFFFFFFFFFFFF
 
-    KnightAttacks = np.zeros(64, dtype=np.uint64)
-    KingMoves = np.zeros(64, dtype=np.uint64)
-    WhitePawnAttacks = np.zeros(64, dtype=np.uint64)
-    BlackPawnAttacks = np.zeros(64, dtype=np.uint64)
+    # Bảng tra dạng list int Python: truy cập nhanh hơn và không lẫn kiểu np.uint64 khi AND/OR với int
+    KnightAttacks = [0] * 64
+    KingMoves = [0] * 64
+    WhitePawnAttacks = [0] * 64
+    BlackPawnAttacks = [0] * 64
+    # Between[a][b]: các ô nằm giữa a và b nếu cùng hàng/cột/đường chéo, ngược lại 0
+    Between = [[0] * 64 for _ in range(64)]
+    # Line[a][b]: cả đường thẳng (từ mép tới mép, gồm a và b) đi qua a và b, ngược lại 0
+    Line = [[0] * 64 for _ in range(64)]
 
     @staticmethod
     def pop_lsb(bitboard):
@@ -29,6 +34,14 @@ class BitboardUtility:
         bitboard &= bitboard - 1
         return lsb_index, bitboard
     
+    @staticmethod
+    def iter_bits(bitboard):
+        bitboard = int(bitboard)
+        while bitboard:
+            lsb = bitboard & -bitboard
+            yield lsb.bit_length() - 1
+            bitboard ^= lsb
+
     @staticmethod
     def count_bits(bitboard):
         return bin(bitboard).count('1')
@@ -104,6 +117,28 @@ class BitboardUtility:
                 if x > 0 and y > 0:
                     BitboardUtility.BlackPawnAttacks[square] |= 1 << ((y - 1) * 8 + (x - 1))
 
+                # Between masks
+                for dx, dy in ortho_dirs + diag_dirs:
+                    between = 0
+                    tx, ty = x + dx, y + dy
+                    while 0 <= tx < 8 and 0 <= ty < 8:
+                        BitboardUtility.Between[square][ty * 8 + tx] = between
+                        between |= 1 << (ty * 8 + tx)
+                        tx, ty = tx + dx, ty + dy
+
+                # Line masks: tia theo hướng và hướng ngược lại
+                for dx, dy in ortho_dirs + diag_dirs:
+                    line = 1 << square
+                    for sx, sy in ((dx, dy), (-dx, -dy)):
+                        tx, ty = x + sx, y + sy
+                        while 0 <= tx < 8 and 0 <= ty < 8:
+                            line |= 1 << (ty * 8 + tx)
+                            tx, ty = tx + sx, ty + sy
+                    tx, ty = x + dx, y + dy
+                    while 0 <= tx < 8 and 0 <= ty < 8:
+                        BitboardUtility.Line[square][ty * 8 + tx] = line
+                        tx, ty = tx + dx, ty + dy
+
     @staticmethod
     def lsb(bitboard):
         if bitboard == 0:
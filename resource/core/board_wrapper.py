@@ -1,64 +1,165 @@
 import numpy as np
 from core.bitboard_utility import BitboardUtility
 from core.magic_bitboards import get_bishop_attacks, get_rook_attacks
-import copy
+from core.check_info import CheckInfo
+from core.piece import (NONE, PAWN, KNIGHT, BISHOP, ROOK, QUEEN, KING, PIECES,
+                        piece_color, piece_from_string, piece_to_string)
+from core.move import NULL_MOVE, FLAG_PROMO_KNIGHT, PROMOTION_PIECE, move_from_coords
+from core.zobrist_keys import ZobristHasher, PieceKeys, EnPassantKeys, SideKey, castling_key
+from core.piece_tables import PieceValues, PhaseWeights, PieceSquareMiddlegame, PieceSquareEndgame
+
+# Quyền nhập thành bị mất khi một quân rời khỏi (hoặc bị bắt tại) ô tương ứng
+CASTLING_RIGHTS_LOST = {
+    60: 'KQ', 63: 'K', 56: 'Q',  # e1, h1, a1
+    4: 'kq', 7: 'k', 0: 'q',     # e8, h8, a8
+}
+
+class UndoInfo:
+    """Bản ghi nhỏ lưu những gì make_move thay đổi để unmake_move khôi phục."""
+    __slots__ = ('move', 'piece', 'captured', 'captured_square', 'promoted',
+                 'rook_from', 'rook_to', 'castling_rights', 'en_passant_square', 'last_move', 'zobrist_key', 'pawn_key')
+
+    def __init__(self, move, piece, castling_rights, en_passant_square, last_move, zobrist_key, pawn_key=0):
+        self.move = move
+        self.piece = piece
+        self.captured = NONE
+        self.captured_square = -1
+        self.promoted = NONE
+        self.rook_from = -1
+        self.rook_to = -1
+        self.castling_rights = castling_rights
+        self.en_passant_square = en_passant_square
+        self.last_move = last_move
+        self.zobrist_key = zobrist_key
+        self.pawn_key = pawn_key
 
 class BoardWrapper:
     def __init__(self, board_array, castling_rights, turn, last_move):
-        self.board_array = [row[:] for row in board_array]
+        # board_array: mảng 8x8 chuỗi 'wP', 'bK', ... từ GUI; bên trong chỉ dùng mã quân số nguyên
+        self.squares = [piece_from_string(board_array[sq // 8][sq % 8]) for sq in range(64)]
         self.castling_rights = castling_rights
+        # GUI truyền turn dạng bool (True = trắng)
+        if isinstance(turn, bool):
+            turn = 'w' if turn else 'b'
         self.turn = turn
-        self.last_move = last_move
+        # GUI truyền nước cuối dạng toạ độ ((cột, hàng), (cột, hàng)); bên trong lưu số nguyên (core.move)
+        self.last_move = move_from_coords(last_move)
         self.en_passant_square = -1
+        if self.last_move:
+            start, target = self.last_move & 0x3F, (self.last_move >> 6) & 0x3F
+            # Tốt vừa đi hai bước: ô bắt tốt qua đường là ô nó vừa đi qua
+            if self.squares[target] & 7 == PAWN and abs(target - start) == 16:
+                self.en_passant_square = (start + target) // 2
         self._init_bitboards()
+        hasher = ZobristHasher()
+        self.zobrist_key = hasher.hash(self)
+        self.pawn_key = hasher.hash_pawns(self)
+        self._check_info = None
+
+    @classmethod
+    def from_fen(cls, fen):
+        """Tạo BoardWrapper từ chuỗi FEN (hàng 0 của board_array là hàng 8)."""
+        parts = fen.split()
+        board_array = []
+        for row in parts[0].split('/'):
+            rank = []
+            for ch in row:
+                if ch.isdigit():
+                    rank.extend([''] * int(ch))
+                else:
+                    rank.append(('w' if ch.isupper() else 'b') + ch.upper())
+            board_array.append(rank)
+        if len(board_array) != 8 or any(len(rank) != 8 for rank in board_array):
+            raise ValueError(f"[from_fen] Invalid piece placement: {parts[0]}")
+
+        turn = parts[1] if len(parts) > 1 else 'w'
+        castling = parts[2] if len(parts) > 2 and parts[2] != '-' else ""
+        board = cls(board_array, castling, turn, None)
+        if len(parts) > 3 and parts[3] != '-':
+            file, rank = ord(parts[3][0]) - ord('a'), int(parts[3][1])
+            board.en_passant_square = (8 - rank) * 8 + file
+            board.zobrist_key = ZobristHasher().hash(board)
+        return board
+
+    @property
+    def board_array(self):
+        """Mảng 8x8 chuỗi quân cho GUI/opening book (tạo mới mỗi lần gọi)."""
+        return [[piece_to_string(self.squares[rank * 8 + file]) for file in range(8)] for rank in range(8)]
 
     def _init_bitboards(self):
-        self.piece_bitboards = {
-            'w': { 'P': 0, 'N': 0, 'B': 0, 'R': 0, 'Q': 0, 'K': 0 },
-            'b': { 'P': 0, 'N': 0, 'B': 0, 'R': 0, 'Q': 0, 'K': 0 }
-        }
-        self.occupied = { 'w': 0, 'b': 0 }
+        # bitboards[piece]: đánh chỉ số bằng mã quân (core.piece), occupied[color]: 0 = trắng, 1 = đen
+        self.bitboards = [0] * 16
+        self.occupied = [0, 0]
         self.all_occupied = 0
-        for rank in range(8):
-            for file in range(8):
-                sq = rank * 8 + file
-                piece = self.board_array[rank][file]
-                if piece:
-                    color, p = piece[0], piece[1]
-                    self.piece_bitboards[color][p] |= (1 << sq)
-                    self.occupied[color] |= (1 << sq)
-                    self.all_occupied |= (1 << sq)
+        for sq, piece in enumerate(self.squares):
+            if piece:
+                self.bitboards[piece] |= (1 << sq)
+                self.occupied[piece_color(piece)] |= (1 << sq)
+                self.all_occupied |= (1 << sq)
+        self._init_scores()
+
+    def _init_scores(self):
+        # Số quân theo mã quân; vật chất, trọng số giai đoạn và tổng PST trung/tàn cuộc theo màu.
+        # Cập nhật tăng dần trong make_move/unmake_move để Evaluation đọc trong O(1).
+        self.piece_counts = [0] * 16
+        self.material = [0, 0]
+        self.phase_weight = [0, 0]
+        self.pst_mg = [0, 0]
+        self.pst_eg = [0, 0]
+        for sq, piece in enumerate(self.squares):
+            if piece:
+                self._add_piece_score(piece, sq)
+
+    def _add_piece_score(self, piece, square):
+        color, ptype, index = piece >> 3, piece & 7, piece * 64 + square
+        self.piece_counts[piece] += 1
+        self.material[color] += PieceValues[ptype]
+        self.phase_weight[color] += PhaseWeights[ptype]
+        self.pst_mg[color] += PieceSquareMiddlegame[index]
+        self.pst_eg[color] += PieceSquareEndgame[index]
+
+    def _remove_piece_score(self, piece, square):
+        color, ptype, index = piece >> 3, piece & 7, piece * 64 + square
+        self.piece_counts[piece] -= 1
+        self.material[color] -= PieceValues[ptype]
+        self.phase_weight[color] -= PhaseWeights[ptype]
+        self.pst_mg[color] -= PieceSquareMiddlegame[index]
+        self.pst_eg[color] -= PieceSquareEndgame[index]
+
+    def _move_piece_score(self, piece, start, target):
+        color, base = piece >> 3, piece * 64
+        self.pst_mg[color] += PieceSquareMiddlegame[base + target] - PieceSquareMiddlegame[base + start]
+        self.pst_eg[color] += PieceSquareEndgame[base + target] - PieceSquareEndgame[base + start]
 
     def get_pawn_bitboard(self, color):
-        return self.piece_bitboards['w' if color == 0 else 'b']['P']
+        return self.bitboards[(color << 3) | PAWN]
 
     def get_knights(self, color):
-        return self.piece_bitboards['w' if color == 0 else 'b']['N']
+        return self.bitboards[(color << 3) | KNIGHT]
 
     def get_bishops(self, color):
-        return self.piece_bitboards['w' if color == 0 else 'b']['B']
+        return self.bitboards[(color << 3) | BISHOP]
 
     def get_rooks(self, color):
-        return self.piece_bitboards['w' if color == 0 else 'b']['R']
+        return self.bitboards[(color << 3) | ROOK]
 
     def get_queens(self, color):
-        return self.piece_bitboards['w' if color == 0 else 'b']['Q']
+        return self.bitboards[(color << 3) | QUEEN]
 
     def get_king(self, color):
-        return self.piece_bitboards['w' if color == 0 else 'b']['K']
+        return self.bitboards[(color << 3) | KING]
 
     def get_occupied(self, color):
-        return self.occupied['w' if color == 0 else 'b']
+        return self.occupied[color]
 
     def get_all_occupied(self):
         return self.all_occupied
 
     def get_piece_bitboard(self, color, piece_type):
-        piece_map = {1: 'P', 2: 'N', 3: 'B', 4: 'R', 5: 'Q', 6: 'K'}
-        return self.piece_bitboards['w' if color == 0 else 'b'][piece_map[piece_type]]
+        return self.bitboards[(color << 3) | piece_type]
 
     def king_square(self, color):
-        king_bb = self.get_king(color)
+        king_bb = self.bitboards[(color << 3) | KING]
         if king_bb == 0:
             return -1
         return BitboardUtility.lsb(king_bb)
@@ -73,101 +174,236 @@ class BoardWrapper:
         return ('Q' if is_white else 'q') in self.castling_rights
 
     def count_pawns(self, color):
-        return bin(self.get_pawn_bitboard(color)).count('1')
+        return self.piece_counts[(color << 3) | PAWN]
 
     def count_knights(self, color):
-        return bin(self.get_knights(color)).count('1')
+        return self.piece_counts[(color << 3) | KNIGHT]
 
     def count_bishops(self, color):
-        return bin(self.get_bishops(color)).count('1')
+        return self.piece_counts[(color << 3) | BISHOP]
 
     def count_rooks(self, color):
-        return bin(self.get_rooks(color)).count('1')
+        return self.piece_counts[(color << 3) | ROOK]
 
     def count_queens(self, color):
-        return bin(self.get_queens(color)).count('1')
+        return self.piece_counts[(color << 3) | QUEEN]
 
     def get_piece(self, square: int):
-        if not isinstance(square, int):
-            raise TypeError(f"[get_piece] square must be an integer, got {type(square)}: {square}")
-        if not (0 <= square < 64):
-            raise ValueError(f"[get_piece] Square index out of range: {square}")
-
-        for color in ['w', 'b']:  
-            for ptype in ['P', 'N', 'B', 'R', 'Q', 'K']:
-                if (self.piece_bitboards[color][ptype] >> square) & 1:
-                    return color + ptype
+        """Mã quân trên ô (core.piece), 0 nếu ô trống."""
+        return self.squares[square]
+
+    def get_piece_type(self, square: int):
+        """Loại quân trên ô (1..6), 0 nếu ô trống."""
+        return self.squares[square] & 7
+
+    def copy(self):
+        wrapped = BoardWrapper.__new__(BoardWrapper)
+        wrapped.squares = self.squares[:]
+        wrapped.bitboards = self.bitboards[:]
+        wrapped.occupied = self.occupied[:]
+        wrapped.all_occupied = self.all_occupied
+        wrapped.piece_counts = self.piece_counts[:]
+        wrapped.material = self.material[:]
+        wrapped.phase_weight = self.phase_weight[:]
+        wrapped.pst_mg = self.pst_mg[:]
+        wrapped.pst_eg = self.pst_eg[:]
+        wrapped.castling_rights = self.castling_rights
+        wrapped.turn = self.turn
+        wrapped.last_move = self.last_move
+        wrapped.en_passant_square = self.en_passant_square
+        wrapped.zobrist_key = self.zobrist_key
+        wrapped.pawn_key = self.pawn_key
+        wrapped._check_info = None
+        return wrapped
 
-        return ""  # Ô trống
+    def to_state(self):
+        """
+        Trạng thái gọn để gửi sang tiến trình khác: bitboard của 12 loại quân và các giá trị trạng thái.
+        Mailbox, occupancy và điểm tăng dần được dựng lại trong from_state.
+        """
+        return (tuple(self.bitboards[piece] for piece in PIECES), self.castling_rights, self.turn,
+                self.en_passant_square, self.last_move, self.zobrist_key, self.pawn_key)
+
+    @classmethod
+    def from_state(cls, state):
+        bitboards, castling_rights, turn, en_passant_square, last_move, zobrist_key, pawn_key = state
+        board = cls.__new__(cls)
+        board.squares = [NONE] * 64
+        for piece, bitboard in zip(PIECES, bitboards):
+            for sq in BitboardUtility.iter_bits(bitboard):
+                board.squares[sq] = piece
+        board._init_bitboards()
+        board.castling_rights = castling_rights
+        board.turn = turn
+        board.en_passant_square = en_passant_square
+        board.last_move = last_move
+        board.zobrist_key = zobrist_key
+        board.pawn_key = pawn_key
+        board._check_info = None
+        return board
+
+    def __reduce__(self):
+        # pickle (multiprocessing) chỉ gửi to_state() thay vì mọi list của bàn cờ
+        return (BoardWrapper.from_state, (self.to_state(),))
 
     def make_copy_and_apply(self, move):
+        """Trả về bản sao đã áp dụng nước đi. Search dùng make_move/unmake_move thay thế."""
+        wrapped = self.copy()
         # Trường hợp đặc biệt: Null Move Pruning
-        if move == ("null", "null"):
-            new_board = [row[:] for row in self.board_array]
-            wrapped = BoardWrapper(new_board, copy.deepcopy(self.castling_rights), 'b' if self.turn == 'w' else 'w', self.last_move)
-            wrapped._init_bitboards()  # Đảm bảo bitboards được cập nhật
-            return wrapped
-
-        # Sao chép bảng hiện tại
-        new_board = [row[:] for row in self.board_array]
-        castling = copy.deepcopy(self.castling_rights)  # Sao chép sâu để tránh tham chiếu
-        last = (move[0], move[1])
-
-        start = move[0]
-        target = move[1]
-        promo = move[2] if len(move) > 2 else None
-
-        # Xử lý nước đi đặc biệt (castling, en passant)
-        if len(move) > 2 and move[2] == 'castle':
-            # Xử lý castling (giả sử bạn có logic riêng cho castling)
-            # Ví dụ: Di chuyển vua và xe, cập nhật castling_rights
-            # Bạn cần thêm logic cụ thể ở đây
-            pass
-        elif len(move) > 2 and move[2] == 'ep':
-            # Xử lý en passant
-            # Ví dụ: Xóa quân tốt bị bắt, di chuyển tốt
-            # Bạn cần thêm logic cụ thể ở đây
-            pass
-
-        # Lấy toạ độ hàng và cột từ ô xuất phát
-        if isinstance(start, int):
-            sf, sr = start % 8, start // 8
-        else:
-            sf, sr = start
-
-        # Lấy toạ độ hàng và cột từ ô đích
-        if isinstance(target, int):
-            tf, tr = target % 8, target // 8
+        if move == NULL_MOVE:
+            wrapped.make_null_move()
         else:
-            tf, tr = target
-
-        piece = new_board[sr][sf]
-
-        # Kiểm tra quân cờ hợp lệ
-        if not piece or not isinstance(piece, str) or len(piece) < 2:
-            print(f"[ERROR] Invalid piece during move: '{piece}' at ({sr},{sf}) for move {move}")
-            return self
+            wrapped.make_move(move)
+        return wrapped
 
-        # Xoá quân ở ô đích nếu là quân địch (bắt quân)
-        if new_board[tr][tf] and new_board[tr][tf][0] != piece[0]:
-            new_board[tr][tf] = ""
+    def _toggle_piece(self, piece, mask):
+        self.bitboards[piece] ^= mask
+        self.occupied[piece >> 3] ^= mask
+        self.all_occupied ^= mask
 
-        # Ghi quân mới vào ô đích
-        if promo and promo in ['q', 'r', 'b', 'n']:
-            new_board[tr][tf] = piece[0] + promo.upper()
+    def make_move(self, move):
+        """
+        Áp dụng nước đi trực tiếp lên bàn cờ (bitboards, mailbox, quyền nhập thành,
+        ô bắt tốt qua đường, lượt đi) và trả về UndoInfo để unmake_move khôi phục.
+        move là số nguyên 16 bit (core.move).
+        """
+        start, target = move & 0x3F, (move >> 6) & 0x3F
+        squares = self.squares
+
+        piece = squares[start]
+        if not piece:
+            raise ValueError(f"[make_move] No piece on square {start} for move {move}")
+
+        ptype = piece & 7
+        undo = UndoInfo(move, piece, self.castling_rights, self.en_passant_square, self.last_move,
+                        self.zobrist_key, self.pawn_key)
+        key = self.zobrist_key
+
+        # Bắt quân (kể cả bắt tốt qua đường)
+        if squares[target]:
+            undo.captured_square = target
+        elif ptype == PAWN and target == self.en_passant_square and (start ^ target) & 7:
+            ep_captured = (start & ~7) | (target & 7)
+            if squares[ep_captured]:
+                undo.captured_square = ep_captured
+        if undo.captured_square != -1:
+            captured_square = undo.captured_square
+            captured = squares[captured_square]
+            undo.captured = captured
+            self._toggle_piece(captured, 1 << captured_square)
+            self._remove_piece_score(captured, captured_square)
+            squares[captured_square] = NONE
+            key ^= PieceKeys[captured * 64 + captured_square]
+            if captured & 7 == PAWN:
+                self.pawn_key ^= PieceKeys[captured * 64 + captured_square]
+
+        # Di chuyển quân (phong cấp nếu có)
+        flag = move >> 12
+        if ptype == PAWN and flag >= FLAG_PROMO_KNIGHT:
+            placed = (piece & 8) | PROMOTION_PIECE[flag]
+            undo.promoted = placed
+            self._toggle_piece(piece, 1 << start)
+            self._toggle_piece(placed, 1 << target)
+            self._remove_piece_score(piece, start)
+            self._add_piece_score(placed, target)
         else:
-            new_board[tr][tf] = piece
-
-        # Xoá quân ở ô xuất phát
-        new_board[sr][sf] = ""
-
-        new_turn = 'b' if self.turn == 'w' else 'w'
+            placed = piece
+            self._toggle_piece(piece, (1 << start) | (1 << target))
+            self._move_piece_score(piece, start, target)
+        squares[target] = placed
+        squares[start] = NONE
+        key ^= PieceKeys[piece * 64 + start] ^ PieceKeys[placed * 64 + target]
+        if ptype == PAWN:
+            self.pawn_key ^= PieceKeys[piece * 64 + start]
+            if placed == piece:
+                self.pawn_key ^= PieceKeys[piece * 64 + target]
+
+        # Nhập thành: di chuyển xe theo vua
+        if ptype == KING and abs(target - start) == 2:
+            rook_from, rook_to = (start + 3, start + 1) if target > start else (start - 4, start - 1)
+            undo.rook_from, undo.rook_to = rook_from, rook_to
+            rook = squares[rook_from]
+            self._toggle_piece(rook, (1 << rook_from) | (1 << rook_to))
+            self._move_piece_score(rook, rook_from, rook_to)
+            squares[rook_to] = rook
+            squares[rook_from] = NONE
+            key ^= PieceKeys[rook * 64 + rook_from] ^ PieceKeys[rook * 64 + rook_to]
+
+        # Cập nhật quyền nhập thành khi vua/xe rời ô gốc hoặc xe bị bắt
+        if self.castling_rights:
+            for sq in (start, target):
+                lost = CASTLING_RIGHTS_LOST.get(sq)
+                if lost:
+                    for right in lost:
+                        self.castling_rights = self.castling_rights.replace(right, "")
+            if self.castling_rights != undo.castling_rights:
+                key ^= castling_key(undo.castling_rights) ^ castling_key(self.castling_rights)
+
+        if self.en_passant_square != -1:
+            key ^= EnPassantKeys[self.en_passant_square & 7]
+        if ptype == PAWN and abs(target - start) == 16:
+            self.en_passant_square = (start + target) // 2
+            key ^= EnPassantKeys[target & 7]
+        else:
+            self.en_passant_square = -1
+
+        self.turn = 'b' if self.turn == 'w' else 'w'
+        self.last_move = move
+        self.zobrist_key = key ^ SideKey
+        return undo
+
+    def unmake_move(self, undo):
+        """Khôi phục trạng thái trước make_move từ UndoInfo."""
+        start, target = undo.move & 0x3F, (undo.move >> 6) & 0x3F
+        piece = undo.piece
+        squares = self.squares
+
+        if undo.rook_from != -1:
+            rook = squares[undo.rook_to]
+            self._toggle_piece(rook, (1 << undo.rook_from) | (1 << undo.rook_to))
+            self._move_piece_score(rook, undo.rook_to, undo.rook_from)
+            squares[undo.rook_from] = rook
+            squares[undo.rook_to] = NONE
+
+        if undo.promoted:
+            self._toggle_piece(undo.promoted, 1 << target)
+            self._toggle_piece(piece, 1 << start)
+            self._remove_piece_score(undo.promoted, target)
+            self._add_piece_score(piece, start)
+        else:
+            self._toggle_piece(piece, (1 << start) | (1 << target))
+            self._move_piece_score(piece, target, start)
+        squares[start] = piece
+        squares[target] = NONE
+
+        if undo.captured:
+            self._toggle_piece(undo.captured, 1 << undo.captured_square)
+            self._add_piece_score(undo.captured, undo.captured_square)
+            squares[undo.captured_square] = undo.captured
+
+        self.castling_rights = undo.castling_rights
+        self.en_passant_square = undo.en_passant_square
+        self.last_move = undo.last_move
+        self.zobrist_key = undo.zobrist_key
+        self.pawn_key = undo.pawn_key
+        self.turn = 'b' if self.turn == 'w' else 'w'
+
+    def make_null_move(self):
+        undo = UndoInfo(NULL_MOVE, NONE, self.castling_rights, self.en_passant_square, self.last_move,
+                        self.zobrist_key, self.pawn_key)
+        if self.en_passant_square != -1:
+            self.zobrist_key ^= EnPassantKeys[self.en_passant_square % 8]
+        self.en_passant_square = -1
+        self.last_move = NULL_MOVE
+        self.zobrist_key ^= SideKey
+        self.turn = 'b' if self.turn == 'w' else 'w'
+        return undo
 
-        # Tạo đối tượng mới và cập nhật lại bitboards
-        wrapped = BoardWrapper(new_board, castling, new_turn, last)
-        print(f"[DEBUG] make_copy_and_apply(): self.turn = {self.turn}, new turn = {new_turn}")
-        wrapped._init_bitboards()
-        return wrapped
+    def unmake_null_move(self, undo):
+        self.en_passant_square = undo.en_passant_square
+        self.last_move = undo.last_move
+        self.zobrist_key = undo.zobrist_key
+        self.turn = 'b' if self.turn == 'w' else 'w'
 
     def get_sliders(self, color, ortho=True):
         if ortho:
@@ -176,38 +412,26 @@ class BoardWrapper:
             return self.get_bishops(color) | self.get_queens(color)
 
     def get_enemy_sliders(self, color, ortho=True):
-        enemy_color = 'b' if color == 'w' else 'w'
-        return self.get_sliders(enemy_color, ortho)
+        return self.get_sliders(1 - color, ortho)
 
     def get_en_passant_square(self):
         return self.en_passant_square
     
     def get_all_pieces_of_color(self, color):
         """Return bitboard of all pieces of one color: 0 = white, 1 = black"""
-        color_key = 'w' if color == 0 else 'b'
-        result = 0
-        for piece in self.piece_bitboards[color_key].values():
-            result |= piece
-        return result
+        return self.occupied[color]
     
-    def move_gives_check(self, move):
-        from core.move_generator import MoveGenerator
-        applied_board = self.make_copy_and_apply(move)
+    def check_info(self):
+        """CheckInfo của thế cờ hiện tại, tính lại khi zobrist_key thay đổi."""
+        info = self._check_info
+        if info is None or info.key != self.zobrist_key:
+            info = CheckInfo(self)
+            self._check_info = info
+        return info
 
-        # Vì turn đã bị đảo sau khi đi nước đó → kẻ vừa bị chiếu là bên kia
-        victim_color = 1 if applied_board.turn == 'w' else 0  # màu vua bị tấn công
-        king_sq = applied_board.king_square(victim_color)
-
-        if king_sq == -1:
-            return False  # Không có vua - có thể là lỗi hoặc nước sai
-
-        move_gen = MoveGenerator()
-        move_gen.board = applied_board
-        move_gen.init_state()
-        move_gen.calculate_attack_data()
-
-        is_attacked = move_gen.is_square_attacked(applied_board, king_sq, 'w' if victim_color == 0 else 'b')
-        return is_attacked
+    def move_gives_check(self, move):
+        """True nếu nước đi của bên tới lượt chiếu vua đối phương (không cần đi thử nước)."""
+        return self.check_info().gives_check(self, move)
 
     def does_move_block_check(self, move):
         from core.move_generator import MoveGenerator
@@ -221,62 +445,45 @@ class BoardWrapper:
             return False  # Không bị chiếu thì không cần chặn
 
         # Áp dụng thử nước đi
-        new_board = self.make_copy_and_apply(move)
-        new_color = 0 if new_board.turn == 'w' else 1
-        new_king_sq = new_board.king_square(new_color)
-
-        if new_king_sq == -1:
-            return False  # vua bị mất??
+        undo = self.make_move(move)
+        new_king_sq = self.king_square(my_color)
 
         # Nếu sau nước đi không còn bị chiếu nữa => đã chặn được chiếu
-        return not move_gen.is_square_attacked(new_board, new_king_sq, 'b' if new_board.turn == 'w' else 'w')
+        blocked = new_king_sq != -1 and not move_gen.is_square_attacked(self, new_king_sq, 'w' if my_color == 1 else 'b')
+        self.unmake_move(undo)
+        return blocked
 
     def is_capture(self, move):
         """
         Trả về True nếu nước đi là nước bắt quân (ô đích có quân đối phương).
         """
-        from_sq, to_sq = move[0], move[1]
-        target_piece = self.get_piece(to_sq)
-        moving_piece = self.get_piece(from_sq)
-        
-        if not moving_piece:
-            return False  # không có quân để di chuyển
-
-        if target_piece and target_piece[0] != moving_piece[0]:
-            return True  # có quân đối phương ở ô đích
-        return False
-
-    def attackers_to(self, sq, color):
-        attackers = 0
-        occupied = self.get_occupied(0) | self.get_occupied(1)
-
-        # Tốt
-        pawn_attacks = BitboardUtility.pawn_attacks(1 - color,sq)  # 1 - color vì tấn công từ góc nhìn của đối phương
-        attackers |= pawn_attacks & self.get_piece_bitboard(color, 1)
-
-        # Mã
-        knight_attacks = BitboardUtility.KnightAttacks[sq]
-        attackers |= knight_attacks & self.get_piece_bitboard(color, 2)
-
-        # Tượng
-        bishop_attacks = get_bishop_attacks(sq, occupied)
-        attackers |= bishop_attacks & self.get_piece_bitboard(color, 3)
-
-        # Xe
-        rook_attacks = get_rook_attacks(sq, occupied)
-        attackers |= rook_attacks & self.get_piece_bitboard(color, 4)
-
-        # Hậu (kết hợp tượng và xe)
-        queen_attacks = bishop_attacks | rook_attacks
-        attackers |= queen_attacks & self.get_piece_bitboard(color, 5)
-
-        return attackers
-
-
-
-    
+        target_piece = self.squares[(move >> 6) & 0x3F]
+        moving_piece = self.squares[move & 0x3F]
+        # có quân đối phương ở ô đích
+        return bool(moving_piece and target_piece and (target_piece ^ moving_piece) & 8)
 
+    def attackers_to(self, sq, color, occupied=None):
+        """
+        Bitboard các quân của bên color (kể cả vua) tấn công ô sq.
+        occupied: bitboard ô bị chiếm dùng để chặn quân trượt (mặc định là bàn cờ hiện tại);
+        SEE truyền occupied đã bỏ các quân đã đổi để lộ ra quân tấn công xuyên (x-ray).
+        """
+        if occupied is None:
+            occupied = self.all_occupied
+        base = color << 3
+        bitboards = self.bitboards
 
+        # Tốt: WhitePawnAttacks[sq] là các ô mà tốt trắng đứng để tấn công sq (tương tự cho đen)
+        pawn_sources = BitboardUtility.WhitePawnAttacks[sq] if color == 0 else BitboardUtility.BlackPawnAttacks[sq]
+        attackers = pawn_sources & bitboards[base | PAWN]
 
+        # Mã, vua
+        attackers |= BitboardUtility.KnightAttacks[sq] & bitboards[base | KNIGHT]
+        attackers |= BitboardUtility.KingMoves[sq] & bitboards[base | KING]
 
+        # Tượng/hậu theo đường chéo, xe/hậu theo hàng/cột
+        queens = bitboards[base | QUEEN]
+        attackers |= get_bishop_attacks(sq, occupied) & (bitboards[base | BISHOP] | queens)
+        attackers |= get_rook_attacks(sq, occupied) & (bitboards[base | ROOK] | queens)
 
+        return attackers & occupied
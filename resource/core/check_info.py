@@ -0,0 +1,95 @@
+from core.bitboard_utility import BitboardUtility
+from core.magic_bitboards import get_rook_attacks, get_bishop_attacks
+from core.piece import PAWN, KNIGHT, BISHOP, ROOK, QUEEN, KING
+from core.move import FLAG_PROMO_KNIGHT, PROMOTION_PIECE
+
+class CheckInfo:
+    """
+    Dữ liệu để biết một nước của bên tới lượt có chiếu vua đối phương hay không mà không cần đi thử.
+    Tính một lần cho mỗi thế cờ (BoardWrapper.check_info giữ bản theo zobrist_key).
+
+    check_squares[type]:   các ô mà quân loại type của bên đi đứng vào sẽ chiếu trực tiếp
+    discover_candidates:   quân của bên đi đứng giữa quân trượt của mình và vua đối phương,
+                           rời khỏi đường đó sẽ chiếu mở
+    """
+    __slots__ = ('key', 'color', 'king_square', 'check_squares', 'discover_candidates')
+
+    def __init__(self, board):
+        self.key = board.zobrist_key
+        color = 0 if board.turn == 'w' else 1
+        self.color = color
+        king_sq = board.king_square(1 - color)
+        self.king_square = king_sq
+        self.check_squares = [0] * 7
+        self.discover_candidates = 0
+        if king_sq == -1:
+            return
+
+        occupied = board.get_all_occupied()
+        # WhitePawnAttacks[sq]: các ô mà tốt trắng đứng để tấn công sq (tương tự cho đen)
+        self.check_squares[PAWN] = (BitboardUtility.WhitePawnAttacks[king_sq] if color == 0
+                                    else BitboardUtility.BlackPawnAttacks[king_sq])
+        self.check_squares[KNIGHT] = BitboardUtility.KnightAttacks[king_sq]
+        bishop = get_bishop_attacks(king_sq, occupied)
+        rook = get_rook_attacks(king_sq, occupied)
+        self.check_squares[BISHOP] = bishop
+        self.check_squares[ROOK] = rook
+        self.check_squares[QUEEN] = bishop | rook
+
+        # Tia từ vua đối phương chỉ bị chặn bởi quân của chính nó: quân trượt của bên đi tìm được
+        # là nguồn chiếu mở nếu giữa hai bên có đúng một quân và đó là quân của bên đi
+        enemy_pieces = board.get_occupied(1 - color)
+        snipers = ((get_rook_attacks(king_sq, enemy_pieces) & board.get_sliders(color, ortho=True)) |
+                   (get_bishop_attacks(king_sq, enemy_pieces) & board.get_sliders(color, ortho=False)))
+        own_pieces = board.get_occupied(color)
+        for sq in BitboardUtility.iter_bits(snipers):
+            blocking = BitboardUtility.Between[king_sq][sq] & occupied
+            if blocking and blocking & (blocking - 1) == 0 and blocking & own_pieces:
+                self.discover_candidates |= blocking
+
+    def gives_check(self, board, move):
+        """True nếu move (nước pseudo-legal của bên tới lượt) chiếu vua đối phương."""
+        king_sq = self.king_square
+        if king_sq == -1:
+            return False
+        start, target, flag = move & 0x3F, (move >> 6) & 0x3F, move >> 12
+        ptype = board.squares[start] & 7
+        target_bb = 1 << target
+
+        # Chiếu trực tiếp (phong cấp xét riêng vì ô xuất phát có thể đang chắn đường)
+        if ptype == PAWN and flag >= FLAG_PROMO_KNIGHT:
+            placed = PROMOTION_PIECE[flag]
+            if placed == KNIGHT:
+                if self.check_squares[KNIGHT] & target_bb:
+                    return True
+            else:
+                occupied = board.get_all_occupied() ^ (1 << start)
+                attacks = 0
+                if placed != ROOK:
+                    attacks |= get_bishop_attacks(target, occupied)
+                if placed != BISHOP:
+                    attacks |= get_rook_attacks(target, occupied)
+                if attacks & (1 << king_sq):
+                    return True
+        elif self.check_squares[ptype] & target_bb:
+            return True
+
+        # Chiếu mở: quân chắn rời khỏi đường thẳng nối với vua
+        if (self.discover_candidates >> start) & 1 and not BitboardUtility.Line[start][king_sq] & target_bb:
+            return True
+
+        # Nhập thành: xe đứng vào ô mới có thể chiếu
+        if ptype == KING and abs(target - start) == 2:
+            rook_from, rook_to = (start + 3, start + 1) if target > start else (start - 4, start - 1)
+            occupied = board.get_all_occupied() ^ (1 << start) ^ (1 << rook_from) ^ target_bb ^ (1 << rook_to)
+            return bool(get_rook_attacks(rook_to, occupied) & (1 << king_sq))
+
+        # Bắt tốt qua đường: bỏ cả tốt bị bắt có thể mở đường cho quân trượt
+        if ptype == PAWN and target == board.en_passant_square and (start ^ target) & 7:
+            captured = (start & ~7) | (target & 7)
+            occupied = board.get_all_occupied() ^ (1 << start) ^ (1 << captured) ^ target_bb
+            color = self.color
+            return bool((get_rook_attacks(king_sq, occupied) & board.get_sliders(color, ortho=True)) |
+                        (get_bishop_attacks(king_sq, occupied) & board.get_sliders(color, ortho=False)))
+
+        return False
@@ -1,3 +1,6 @@
+import os
+import tempfile
+import zipfile
 import numpy as np
 from core.bitboard_utility import BitboardUtility
 
@@ -30,7 +33,7 @@ RookMagics = [
     11547238928203796481, 1856618300822323264, 2573991788166144, 4936544992551831040,
     13690941749405253631, 15852669863439351807, 18302628748190527413, 12682135449552027479,
     13830554446930287982, 18302628782487371519, 7924083509981736956, 4734295326018586370
-] * 64
+]
 BishopMagics = [
     16509839532542417919, 14391803910955204223, 1848771770702627364, 347925068195328958,
     5189277761285652493, 3750937732777063343, 18429848470517967340, 17870072066711748607,
@@ -48,13 +51,22 @@ BishopMagics = [
     16432792402597134585, 11975705497012863580, 11457135419348969979, 9763749252098620046,
     16960553411078512574, 15563877356819111679, 14994736884583272463, 9441297368950544394,
     14537646123432199168, 9888547162215157388, 18140215579194907366, 18374682062228545019
-] * 64
+]
+
+FULL_BOARD = 0xFFFFFFFFFFFFFFFF
+
+# File cache bảng tấn công, tạo ở lần chạy đầu tiên. Đặt CHESS_MAGIC_CACHE="" để tắt.
+DEFAULT_CACHE_PATH = os.environ.get(
+    "CHESS_MAGIC_CACHE", os.path.join(os.path.dirname(os.path.abspath(__file__)), "magic_tables.npz"))
 
 # Will be filled later
 RookMask = [0] * 64
 BishopMask = [0] * 64
-RookAttacks = [None] * 64
-BishopAttacks = [None] * 64
+# Bảng tấn công phẳng: ô sq dùng đoạn [Offsets[sq], Offsets[sq] + 2 ** (64 - Shifts[sq]))
+RookOffsets = [0] * 64
+BishopOffsets = [0] * 64
+RookAttacks = []
+BishopAttacks = []
 
 # --- Magic Helper functions ---
 def create_all_blocker_bitboards(movement_mask):
@@ -101,47 +113,77 @@ def legal_move_bitboard_from_blockers(start_square, blockers, ortho):
 
 # --- Magic Core functions ---
 def get_rook_attacks(square, blockers):
-    mask = RookMask[square]
-    magic = RookMagics[square]
-    shift = RookShifts[square]
-    key = ((blockers & mask) * magic) >> shift
-    return RookAttacks[square][key]
+    key = (((blockers & RookMask[square]) * RookMagics[square]) & FULL_BOARD) >> RookShifts[square]
+    return RookAttacks[RookOffsets[square] + key]
 
 def get_bishop_attacks(square, blockers):
-    mask = BishopMask[square]
-    magic = BishopMagics[square]
-    shift = BishopShifts[square]
-    key = ((blockers & mask) * magic) >> shift
-    return BishopAttacks[square][key]
+    key = (((blockers & BishopMask[square]) * BishopMagics[square]) & FULL_BOARD) >> BishopShifts[square]
+    return BishopAttacks[BishopOffsets[square] + key]
 
 def get_slider_attacks(square, blockers, ortho):
     return get_rook_attacks(square, blockers) if ortho else get_bishop_attacks(square, blockers)
 
-def initialize_magics():
+def build_attack_table(masks, magics, shifts, offsets, ortho):
+    size = 0
+    for square in range(64):
+        offsets[square] = size
+        size += 1 << (64 - shifts[square])
+
+    table = [0] * size
+    for square in range(64):
+        for b in create_all_blocker_bitboards(masks[square]):
+            key = ((b * magics[square]) & FULL_BOARD) >> shifts[square]
+            table[offsets[square] + key] = legal_move_bitboard_from_blockers(square, b, ortho)
+    return table
+
+def load_cached_tables(cache_path):
+    """Đọc bảng từ file cache; trả về None nếu không có, bị hỏng hoặc không khớp magic hiện tại."""
+    try:
+        with np.load(cache_path) as data:
+            if (data["rook_magics"].tolist() != RookMagics or data["bishop_magics"].tolist() != BishopMagics
+                    or data["rook_shifts"].tolist() != RookShifts or data["bishop_shifts"].tolist() != BishopShifts):
+                return None
+            return data["rook_attacks"].tolist(), data["bishop_attacks"].tolist()
+    except (OSError, KeyError, ValueError, EOFError, zipfile.BadZipFile):
+        return None
+
+def save_cached_tables(cache_path):
+    # Ghi ra file tạm cùng thư mục rồi os.replace: bị ngắt giữa chừng cũng không để lại cache ghi dở
+    temp_path = None
+    try:
+        fd, temp_path = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(cache_path)), suffix=".tmp")
+        with os.fdopen(fd, "wb") as f:
+            np.savez(f,
+                     rook_magics=np.array(RookMagics, dtype=np.uint64),
+                     bishop_magics=np.array(BishopMagics, dtype=np.uint64),
+                     rook_shifts=np.array(RookShifts, dtype=np.int64),
+                     bishop_shifts=np.array(BishopShifts, dtype=np.int64),
+                     rook_attacks=np.array(RookAttacks, dtype=np.uint64),
+                     bishop_attacks=np.array(BishopAttacks, dtype=np.uint64))
+        os.replace(temp_path, cache_path)
+    except OSError:
+        # Thư mục chỉ đọc: lần sau tính lại
+        if temp_path is not None and os.path.exists(temp_path):
+            os.remove(temp_path)
+
+def initialize_magics(cache_path=DEFAULT_CACHE_PATH):
     global RookAttacks, BishopAttacks
 
     for square in range(64):
         RookMask[square] = create_movement_mask(square, ortho=True)
         BishopMask[square] = create_movement_mask(square, ortho=False)
 
-    for square in range(64):
-        if RookAttacks[square] is None:
-            RookAttacks[square] = {}
-        if BishopAttacks[square] is None:
-            BishopAttacks[square] = {}
-
-        # fill rook attacks
-        rook_mask = RookMask[square]
-        rook_blockers = create_all_blocker_bitboards(rook_mask)
-        for b in rook_blockers:
-            key = (b * RookMagics[square]) >> RookShifts[square]
-            RookAttacks[square][key] = legal_move_bitboard_from_blockers(square, b, ortho=True)
-
-        # fill bishop attacks
-        bishop_mask = BishopMask[square]
-        bishop_blockers = create_all_blocker_bitboards(bishop_mask)
-        for b in bishop_blockers:
-            key = (b * BishopMagics[square]) >> BishopShifts[square]
-            BishopAttacks[square][key] = legal_move_bitboard_from_blockers(square, b, ortho=False)
+    cached = load_cached_tables(cache_path) if cache_path else None
+    if cached is not None:
+        RookAttacks, BishopAttacks = cached
+        for square in range(1, 64):
+            RookOffsets[square] = RookOffsets[square - 1] + (1 << (64 - RookShifts[square - 1]))
+            BishopOffsets[square] = BishopOffsets[square - 1] + (1 << (64 - BishopShifts[square - 1]))
+        return
+
+    RookAttacks = build_attack_table(RookMask, RookMagics, RookShifts, RookOffsets, ortho=True)
+    BishopAttacks = build_attack_table(BishopMask, BishopMagics, BishopShifts, BishopOffsets, ortho=False)
+    if cache_path:
+        save_cached_tables(cache_path)
 
 initialize_magics()
@@ -0,0 +1,75 @@
+# Nước đi dạng số nguyên 16 bit: from | to << 6 | flag << 12 (0 = không có nước)
+# Dùng trong MoveGenerator, BoardWrapper, MoveOrdering, Search và bảng chuyển vị.
+# Dạng tuple (from, to[, 'castle'/'pawn2up'/'ep'/'q'/...]) và toạ độ ((cột, hàng), (cột, hàng))
+# chỉ dùng ở ranh giới GUI/opening book/công cụ, chuyển đổi bằng các hàm bên dưới.
+from core.piece import KNIGHT, BISHOP, ROOK, QUEEN
+
+NULL_MOVE = 0
+
+FLAG_NONE = 0
+FLAG_CASTLE = 1
+FLAG_PAWN2UP = 2
+FLAG_EP = 3
+FLAG_PROMO_KNIGHT = 4
+FLAG_PROMO_BISHOP = 5
+FLAG_PROMO_ROOK = 6
+FLAG_PROMO_QUEEN = 7
+
+# Cờ dạng chuỗi của nước tuple theo mã cờ
+MOVE_FLAGS = [None, 'castle', 'pawn2up', 'ep', 'n', 'b', 'r', 'q']
+MOVE_FLAG_CODES = {flag: code for code, flag in enumerate(MOVE_FLAGS)}
+
+# Mã cờ phong cấp -> loại quân (0 nếu không phải phong cấp)
+PROMOTION_PIECE = [0, 0, 0, 0, KNIGHT, BISHOP, ROOK, QUEEN]
+
+def pack_move(start, target, flag=FLAG_NONE):
+    return start | (target << 6) | (flag << 12)
+
+def move_from(move):
+    return move & 0x3F
+
+def move_to(move):
+    return (move >> 6) & 0x3F
+
+def move_flag(move):
+    return move >> 12
+
+def is_promotion(move):
+    return move >> 12 >= FLAG_PROMO_KNIGHT
+
+def encode_move(move):
+    """(from, to[, flag]) -> số nguyên 16 bit. None -> NULL_MOVE."""
+    if move is None:
+        return NULL_MOVE
+    flag = MOVE_FLAG_CODES.get(move[2], 0) if len(move) > 2 else 0
+    return move[0] | (move[1] << 6) | (flag << 12)
+
+def decode_move(move):
+    """Số nguyên 16 bit -> (from, to[, flag]). NULL_MOVE -> None."""
+    if not move:
+        return None
+    start, target, flag = move & 0x3F, (move >> 6) & 0x3F, MOVE_FLAGS[move >> 12]
+    return (start, target, flag) if flag else (start, target)
+
+def move_to_coords(move):
+    """Số nguyên -> ((cột, hàng), (cột, hàng)) như GUI (hàng 0 là hàng 8). NULL_MOVE -> None."""
+    if not move:
+        return None
+    start, target = move & 0x3F, (move >> 6) & 0x3F
+    return ((start % 8, start // 8), (target % 8, target // 8))
+
+def move_from_coords(coords, flag=FLAG_NONE):
+    """((cột, hàng), (cột, hàng)) của GUI -> số nguyên. None -> NULL_MOVE."""
+    if not coords:
+        return NULL_MOVE
+    (start_file, start_rank), (target_file, target_rank) = coords
+    return pack_move(start_rank * 8 + start_file, target_rank * 8 + target_file, flag)
+
+def move_to_uci(move):
+    """Số nguyên -> chuỗi UCI, ví dụ 'e2e4', 'e7e8q'."""
+    start, target = move & 0x3F, (move >> 6) & 0x3F
+    name = "abcdefgh"[start % 8] + str(8 - start // 8) + "abcdefgh"[target % 8] + str(8 - target // 8)
+    flag = move >> 12
+    if flag >= FLAG_PROMO_KNIGHT:
+        name += MOVE_FLAGS[flag]
+    return name
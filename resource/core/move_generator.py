@@ -3,6 +3,14 @@ from core.bitboard import Bits
 from core.magic_bitboards import get_rook_attacks, get_bishop_attacks, get_slider_attacks
 from engine.precomputed_move_data import PrecomputedMoveData
 from core.board_wrapper import BoardWrapper
+from core.piece import PAWN, KNIGHT, BISHOP, ROOK, KING
+from core.move import (FLAG_NONE, FLAG_CASTLE, FLAG_PAWN2UP, FLAG_EP, FLAG_PROMO_KNIGHT, FLAG_PROMO_BISHOP,
+                       FLAG_PROMO_ROOK, FLAG_PROMO_QUEEN)
+from engine.logger import get_logger, TRACE
+
+log = get_logger(__name__)
+
+FULL_BOARD = 0xFFFFFFFFFFFFFFFF
 
 class MoveGenerator:
     MaxMoves = 218
@@ -17,53 +25,88 @@ class MoveGenerator:
         self.curr_move_index = 0
         self.moves = []
         self.generate_quiet_moves = True
-
-    def generate_moves(self, board, captures_only=False):
-        print(f"[DEBUG] Bat dau generate_moves(captures_only={captures_only})")
+        self.legal = True
+
+    def generate_moves(self, board, captures_only=False, legal=True):
+        """
+        legal=True: chỉ sinh nước hợp lệ, dùng dữ liệu ghim/chiếu từ calculate_attack_data (không đi thử nước).
+        legal=False: sinh nước pseudo-legal, bỏ qua bước tính ghim/chiếu; nơi gọi phải kiểm tra
+        is_legal_after_move() sau board.make_move() (dùng trong search).
+        Nước trả về dạng số nguyên 16 bit (xem core.move).
+        """
         self.board = board
-        self.moves.clear()
+        # List mới mỗi lần gọi vì search giữ danh sách nước của node cha khi gọi đệ quy
+        self.moves = []
         self.generate_quiet_moves = not captures_only
-        self.is_white_to_move = board.turn == 'w'
-        self.friendly_colour = 'w' if self.is_white_to_move else 'b'
-        self.opponent_colour = 'b' if self.is_white_to_move else 'w'
+        self.legal = legal
 
-        self.all_pieces = board.get_all_occupied()
-        self.enemy_pieces = board.get_occupied(self.opponent_colour)
-        self.friendly_pieces = board.get_occupied(self.friendly_colour)
-        self.empty_squares = ~self.all_pieces & 0xFFFFFFFFFFFFFFFF
-
-        print("[DEBUG] Goi init_state()")
         self.init_state()
-        print("[DEBUG] Goi generate_king_moves()")
         self.generate_king_moves()
-        print("[DEBUG] Goi generate_sliding_moves()")
-        self.generate_sliding_moves()
-        print("[DEBUG] Goi generate_knight_moves()")
-        self.generate_knight_moves()
-        print("[DEBUG] Goi generate_pawn_moves()")
-        self.generate_pawn_moves()
-
-        # ✅ Lọc nước đi không khiến vua bị chiếu
-        legal_moves = []
-        friendly_color = self.friendly_colour
-        opponent_color = self.opponent_colour
-
-        print(f"[DEBUG] Tong so nuoc sinh ra truoc loc: {len(self.moves)}")
-
-        for move in self.moves:
-            new_board = board.make_copy_and_apply(move)
-            print(f"[DEBUG] generate_moves(): turn = {board.turn}")
-            king_sq = new_board.king_square(0 if friendly_color == 'w' else 1)
-
-            if king_sq == -1:
-                continue  # Không có vua → bỏ
-
-            if not self.is_square_attacked_simple(new_board, king_sq, opponent_color):
-                legal_moves.append(move)
+        # Bị chiếu đôi thì chỉ vua được đi
+        if not self.in_double_check:
+            self.generate_sliding_moves()
+            self.generate_knight_moves()
+            self.generate_pawn_moves()
+
+        if log.isEnabledFor(TRACE):
+            log.log(TRACE, "generate_moves(captures_only=%s, legal=%s, turn=%s): %d moves",
+                    captures_only, legal, board.turn, len(self.moves))
+        return self.moves
+
+    def is_legal_after_move(self, board):
+        """Gọi ngay sau board.make_move(nước pseudo-legal): True nếu vua bên vừa đi không bị chiếu."""
+        mover = 'b' if board.turn == 'w' else 'w'
+        return not self.is_king_in_check(board, mover)
+
+    def is_pseudo_legal(self, board, move):
+        """
+        True nếu move nằm trong generate_moves(board, legal=False) mà không cần sinh hết nước
+        (dùng cho nước từ TT/killer/counter vốn có thể đến từ thế cờ khác). Nhập thành vẫn sinh nước để so.
+        """
+        start, target, flag = move & 0x3F, (move >> 6) & 0x3F, move >> 12
+        color = 0 if board.turn == 'w' else 1
+        piece = board.squares[start]
+        if not piece or piece >> 3 != color:
+            return False
+        if flag == FLAG_CASTLE:
+            return move in self.generate_moves(board, legal=False)
+        captured = board.squares[target]
+        if captured and captured >> 3 == color:
+            return False
 
-        print(f"[DEBUG] So nuoc hop le sau loc: {len(legal_moves)}")
-        print("[DEBUG] Ket thuc generate_moves()")
-        return legal_moves
+        ptype = piece & 7
+        occupied = board.get_all_occupied()
+        if ptype == PAWN:
+            push_dir = -8 if color == 0 else 8
+            diagonal = target - start in (push_dir - 1, push_dir + 1) and abs((start & 7) - (target & 7)) == 1
+            if flag == FLAG_EP:
+                return diagonal and target == board.en_passant_square
+            # Nước tới hàng cuối phải có cờ phong cấp và ngược lại
+            if (flag >= FLAG_PROMO_KNIGHT) != (target // 8 == (0 if color == 0 else 7)):
+                return False
+            if flag == FLAG_PAWN2UP:
+                start_rank = 6 if color == 0 else 1
+                return (start // 8 == start_rank and target == start + 2 * push_dir
+                        and not (occupied >> (start + push_dir)) & 1 and not captured)
+            if flag != FLAG_NONE and flag < FLAG_PROMO_KNIGHT:
+                return False
+            if target == start + push_dir:
+                return not captured
+            return diagonal and bool(captured)
+
+        if flag != FLAG_NONE:
+            return False
+        if ptype == KNIGHT:
+            attacks = BitboardUtility.KnightAttacks[start]
+        elif ptype == KING:
+            attacks = BitboardUtility.KingMoves[start]
+        elif ptype == BISHOP:
+            attacks = get_bishop_attacks(start, occupied)
+        elif ptype == ROOK:
+            attacks = get_rook_attacks(start, occupied)
+        else:
+            attacks = get_rook_attacks(start, occupied) | get_bishop_attacks(start, occupied)
+        return bool((attacks >> target) & 1)
 
     def init_state(self):
         self.in_check = False
@@ -74,26 +117,29 @@ class MoveGenerator:
         self.is_white_to_move = self.board.turn == 'w'
         self.friendly_colour = 'w' if self.is_white_to_move else 'b'
         self.opponent_colour = 'b' if self.is_white_to_move else 'w'
+        # Các hàm get_* của BoardWrapper nhận màu dạng số: 0 = trắng, 1 = đen
+        self.friendly_index = 0 if self.is_white_to_move else 1
+        self.opponent_index = 1 - self.friendly_index
 
-        color_int = 0 if self.friendly_colour == 'w' else 1
-        self.friendly_king_square = self.board.king_square(color_int)
-
+        self.friendly_king_square = self.board.king_square(self.friendly_index)
 
-        self.enemy_pieces = self.board.get_occupied(self.opponent_colour)
-        self.friendly_pieces = self.board.get_occupied(self.friendly_colour)
+        self.enemy_pieces = self.board.get_occupied(self.opponent_index)
+        self.friendly_pieces = self.board.get_occupied(self.friendly_index)
         self.all_pieces = self.board.get_all_occupied()
-        self.empty_squares = ~self.all_pieces & 0xFFFFFFFFFFFFFFFF
+        self.empty_squares = ~self.all_pieces & FULL_BOARD
         self.empty_or_enemy_squares = self.empty_squares | self.enemy_pieces
-        self.move_type_mask = self.enemy_pieces if not self.generate_quiet_moves else 0xFFFFFFFFFFFFFFFF
-        print(f"[DEBUG] Vua ben minh nam o o: {self.friendly_king_square}")
-        print("[DEBUG] Before calculate_attack_data")
+        self.move_type_mask = self.enemy_pieces if not self.generate_quiet_moves else FULL_BOARD
 
-        self.calculate_attack_data()
-        print("[DEBUG] After calculate_attack_data")
+        if self.legal:
+            self.calculate_attack_data()
+        else:
+            self.opponent_attack_map = 0
+            self.check_ray_bitmask = FULL_BOARD
+            self.not_pin_rays = FULL_BOARD
 
     def in_check_state(self):
         return self.in_check
-    
+
     def is_square_attacked(self, board, square, attacker_color):
         attackers = 0
         color_int = 0 if attacker_color == 'w' else 1
@@ -109,118 +155,156 @@ class MoveGenerator:
         return attackers != 0
 
     def generate_king_moves(self):
-        legal_mask = ~(self.opponent_attack_map | self.friendly_pieces)
+        if self.friendly_king_square == -1:
+            return
+        legal_mask = ~(self.opponent_attack_map | self.friendly_pieces) & FULL_BOARD
         king_moves = BitboardUtility.KingMoves[self.friendly_king_square] & legal_mask & self.move_type_mask
 
-        while king_moves:
-            target, king_moves = BitboardUtility.pop_lsb(king_moves)
-            self.moves.append((self.friendly_king_square, target))
+        for target in BitboardUtility.iter_bits(king_moves):
+            self.moves.append(self.friendly_king_square | (target << 6))
 
         if not self.in_check and self.generate_quiet_moves:
             blockers = self.opponent_attack_map | self.all_pieces
             if self.board.can_castle_kingside(self.is_white_to_move):
                 mask = Bits.WhiteKingsideMask if self.is_white_to_move else Bits.BlackKingsideMask
-                if (mask & blockers) == 0:
-                    target = 6 if self.is_white_to_move else 62
-                    self.moves.append((self.friendly_king_square, target, 'castle'))
+                if (mask & blockers) == 0 and self.castling_path_safe(mask):
+                    target = 62 if self.is_white_to_move else 6
+                    self.moves.append(self.friendly_king_square | (target << 6) | (FLAG_CASTLE << 12))
             if self.board.can_castle_queenside(self.is_white_to_move):
                 mask2 = Bits.WhiteQueensideMask2 if self.is_white_to_move else Bits.BlackQueensideMask2
                 full_mask = Bits.WhiteQueensideMask if self.is_white_to_move else Bits.BlackQueensideMask
-                if (mask2 & blockers) == 0 and (full_mask & self.all_pieces) == 0:
-                    target = 2 if self.is_white_to_move else 58
-                    self.moves.append((self.friendly_king_square, target, 'castle'))
+                if (mask2 & blockers) == 0 and (full_mask & self.all_pieces) == 0 and self.castling_path_safe(mask2):
+                    target = 58 if self.is_white_to_move else 2
+                    self.moves.append(self.friendly_king_square | (target << 6) | (FLAG_CASTLE << 12))
+
+    def castling_path_safe(self, path_mask):
+        # Chế độ hợp lệ đã loại ô bị tấn công qua opponent_attack_map; chế độ pseudo-legal
+        # không có bản đồ tấn công nên kiểm tra vua và các ô vua đi qua ở đây
+        if self.legal:
+            return True
+        opponent = self.opponent_colour
+        if self.is_square_attacked(self.board, self.friendly_king_square, opponent):
+            return False
+        for sq in BitboardUtility.iter_bits(path_mask):
+            if self.is_square_attacked(self.board, sq, opponent):
+                return False
+        return True
 
     def generate_sliding_moves(self):
         move_mask = self.empty_or_enemy_squares & self.check_ray_bitmask & self.move_type_mask
-        ortho_sliders = self.board.get_sliders(self.friendly_colour, ortho=True)
-        diag_sliders = self.board.get_sliders(self.friendly_colour, ortho=False)
+        ortho_sliders = self.board.get_sliders(self.friendly_index, ortho=True)
+        diag_sliders = self.board.get_sliders(self.friendly_index, ortho=False)
 
         for start_square in BitboardUtility.iter_bits(ortho_sliders):
             moves = get_rook_attacks(start_square, self.all_pieces) & move_mask
             if self.is_pinned(start_square):
-                moves &= PrecomputedMoveData.alignMask[start_square][self.friendly_king_square]
+                moves &= int(PrecomputedMoveData.alignMask[start_square][self.friendly_king_square])
             for target in BitboardUtility.iter_bits(moves):
-                self.moves.append((start_square, target))
+                self.moves.append(start_square | (target << 6))
 
         for start_square in BitboardUtility.iter_bits(diag_sliders):
             moves = get_bishop_attacks(start_square, self.all_pieces) & move_mask
             if self.is_pinned(start_square):
-                moves &= PrecomputedMoveData.alignMask[start_square][self.friendly_king_square]
+                moves &= int(PrecomputedMoveData.alignMask[start_square][self.friendly_king_square])
             for target in BitboardUtility.iter_bits(moves):
-                self.moves.append((start_square, target))
+                self.moves.append(start_square | (target << 6))
 
     def generate_knight_moves(self):
-        knights = self.board.get_knights(self.friendly_colour) & ~self.pin_rays
+        knights = self.board.get_knights(self.friendly_index) & self.not_pin_rays
         move_mask = self.empty_or_enemy_squares & self.check_ray_bitmask & self.move_type_mask
 
         for start_square in BitboardUtility.iter_bits(knights):
             attacks = BitboardUtility.KnightAttacks[start_square] & move_mask
             for target_square in BitboardUtility.iter_bits(attacks):
-                self.moves.append((start_square, target_square))
+                self.moves.append(start_square | (target_square << 6))
 
     def generate_pawn_moves(self):
-        color_int = 0 if self.friendly_colour == 'w' else 1
-        pawns = self.board.get_pawn_bitboard(color_int)
+        pawns = self.board.get_pawn_bitboard(self.friendly_index)
         push_dir = -8 if self.is_white_to_move else 8
         promo_rank = 0 if self.is_white_to_move else 7
         start_rank = 6 if self.is_white_to_move else 1
+        check_mask = self.check_ray_bitmask
+        pin_rays = self.pin_rays
+        king_sq = self.friendly_king_square
 
         for square in BitboardUtility.iter_bits(pawns):
             rank = square // 8
             file = square % 8
 
-            # Đi 1 bước nếu không bị chặn và generate_quiet_moves bật
+            # Ô đích được phép: chặn/bắt quân chiếu và đi dọc theo đường ghim
+            allowed = check_mask
+            if (pin_rays >> square) & 1:
+                allowed &= int(PrecomputedMoveData.alignMask[square][king_sq])
+
+            # Đi 1 bước nếu không bị chặn (nước phong cấp luôn được sinh, kể cả khi chỉ sinh nước bắt quân)
             one_forward = square + push_dir
-            if self.generate_quiet_moves and 0 <= one_forward < 64 and not BitboardUtility.contains_square(self.all_pieces, one_forward):
+            if 0 <= one_forward < 64 and not BitboardUtility.contains_square(self.all_pieces, one_forward):
+                one_allowed = (allowed >> one_forward) & 1
                 if one_forward // 8 == promo_rank:
-                    self.add_promotion(square, one_forward)
-                else:
-                    self.moves.append((square, one_forward))
+                    if one_allowed:
+                        self.add_promotion(square, one_forward)
+                elif self.generate_quiet_moves:
+                    if one_allowed:
+                        self.moves.append(square | (one_forward << 6))
                     # Đi 2 bước nếu ở hàng xuất phát
                     if rank == start_rank:
                         two_forward = square + push_dir * 2
-                        if 0 <= two_forward < 64 and not BitboardUtility.contains_square(self.all_pieces, two_forward):
-                            self.moves.append((square, two_forward, 'pawn2up'))
+                        if not BitboardUtility.contains_square(self.all_pieces, two_forward) and (allowed >> two_forward) & 1:
+                            self.moves.append(square | (two_forward << 6) | (FLAG_PAWN2UP << 12))
 
             # Bắt chéo trái/phải
             for dx in [-1, 1]:
                 nx = file + dx
                 if 0 <= nx < 8:
                     target = square + push_dir + dx
-                    if 0 <= target < 64 and BitboardUtility.contains_square(self.enemy_pieces, target):
+                    if 0 <= target < 64 and BitboardUtility.contains_square(self.enemy_pieces & allowed, target):
                         if target // 8 == promo_rank:
                             self.add_promotion(square, target)
                         else:
-                            self.moves.append((square, target))
+                            self.moves.append(square | (target << 6))
 
         # Bắt tốt qua đường
         ep_square = self.board.get_en_passant_square()
         if ep_square != -1:
+            capture_square = ep_square - push_dir
             for dx in [-1, 1]:
-                capture_square = ep_square - push_dir
-                attacker = ep_square + dx - push_dir
-                if 0 <= attacker < 64 and BitboardUtility.contains_square(pawns, attacker):
-                    if not self.in_check_after_en_passant(attacker, ep_square, capture_square):
-                        self.moves.append((attacker, ep_square, 'ep'))
+                if not 0 <= ep_square % 8 + dx < 8:
+                    continue
+                attacker = capture_square + dx
+                if not BitboardUtility.contains_square(pawns, attacker):
+                    continue
+                if self.legal:
+                    # Khi bị chiếu: nước bắt phải chặn tia chiếu hoặc ăn chính con tốt đang chiếu
+                    if not ((check_mask >> ep_square) & 1 or (check_mask >> capture_square) & 1):
+                        continue
+                    if (pin_rays >> attacker) & 1 and not (int(PrecomputedMoveData.alignMask[attacker][king_sq]) >> ep_square) & 1:
+                        continue
+                    if self.in_check_after_en_passant(attacker, ep_square, capture_square):
+                        continue
+                self.moves.append(attacker | (ep_square << 6) | (FLAG_EP << 12))
 
     def add_promotion(self, start, target):
-        self.moves.append((start, target, 'q'))
+        move = start | (target << 6)
+        self.moves.append(move | (FLAG_PROMO_QUEEN << 12))
         if self.generate_quiet_moves:
             if self.promotions_to_generate == self.PromotionMode.All:
-                self.moves.append((start, target, 'n'))
-                self.moves.append((start, target, 'r'))
-                self.moves.append((start, target, 'b'))
+                self.moves.append(move | (FLAG_PROMO_KNIGHT << 12))
+                self.moves.append(move | (FLAG_PROMO_ROOK << 12))
+                self.moves.append(move | (FLAG_PROMO_BISHOP << 12))
             elif self.promotions_to_generate == self.PromotionMode.QueenAndKnight:
-                self.moves.append((start, target, 'n'))
+                self.moves.append(move | (FLAG_PROMO_KNIGHT << 12))
 
     def in_check_after_en_passant(self, start, target, captured):
-        enemy_rooks = self.board.get_enemy_sliders(self.friendly_colour, ortho=True)
-        if enemy_rooks:
-            blockers = self.all_pieces ^ ((1 << start) | (1 << captured))
-            rook_attacks = get_rook_attacks(self.friendly_king_square, blockers)
-            return (rook_attacks & enemy_rooks) != 0
-        return False
-    
+        # Hai con tốt rời cùng một hàng nên có thể mở đường cho xe/hậu (ngang) hoặc tượng/hậu (chéo)
+        if self.friendly_king_square == -1:
+            return False
+        blockers = self.all_pieces ^ ((1 << start) | (1 << captured) | (1 << target))
+        enemy_rooks = self.board.get_enemy_sliders(self.friendly_index, ortho=True)
+        if enemy_rooks and get_rook_attacks(self.friendly_king_square, blockers) & enemy_rooks:
+            return True
+        enemy_bishops = self.board.get_enemy_sliders(self.friendly_index, ortho=False)
+        return bool(enemy_bishops and get_bishop_attacks(self.friendly_king_square, blockers) & enemy_bishops)
+
     def get_attackers(self, board, square, occupied_mask):
         attackers = 0
         for color in [0, 1]:
@@ -234,7 +318,7 @@ class MoveGenerator:
             attackers |= get_rook_attacks(square, occupied_mask) & (board.get_rooks(color) | board.get_queens(color))
             attackers |= get_bishop_attacks(square, occupied_mask) & (board.get_bishops(color) | board.get_queens(color))
         return attackers
-    
+
     def is_king_in_check(self, board: BoardWrapper, color: str) -> bool:
         king_sq = board.king_square(0 if color == 'w' else 1)
         if king_sq == -1:
@@ -242,115 +326,98 @@ class MoveGenerator:
         return self.is_square_attacked(board, king_sq, 'b' if color == 'w' else 'w')
 
     def calculate_attack_data(self):
+        board = self.board
         king_sq = self.friendly_king_square
-        self.opponent_attack_map = 0
-        opponent_king_sq = self.board.king_square(0 if self.opponent_colour == 'w' else 1)
+        opponent = self.opponent_index
+        all_pieces = self.all_pieces
+
+        # Ô bị đối phương tấn công; quân vua mình được bỏ khỏi ô chặn để vua không lùi dọc theo tia chiếu
+        blockers = all_pieces & ~(1 << king_sq) if king_sq != -1 else all_pieces
+        ortho = board.get_sliders(opponent, ortho=True)
+        diag = board.get_sliders(opponent, ortho=False)
+        attack_map = 0
+        for sq in BitboardUtility.iter_bits(ortho):
+            attack_map |= get_rook_attacks(sq, blockers)
+        for sq in BitboardUtility.iter_bits(diag):
+            attack_map |= get_bishop_attacks(sq, blockers)
+        for sq in BitboardUtility.iter_bits(board.get_knights(opponent)):
+            attack_map |= BitboardUtility.KnightAttacks[sq]
+        # pawn_attacks(bb, is_white) trả về các ô mà tốt màu is_white đứng để tấn công bb,
+        # nên ô bị tốt đối phương tấn công dùng màu ngược lại
+        opponent_pawns = board.get_pawn_bitboard(opponent)
+        attack_map |= BitboardUtility.pawn_attacks(opponent_pawns, opponent == 1)
+        opponent_king_sq = board.king_square(opponent)
         if opponent_king_sq != -1:
-            self.opponent_attack_map |= BitboardUtility.KingMoves[opponent_king_sq]
-
-        # Knight checks
-        knights = self.board.get_knights(self.opponent_colour)
-        while knights:
-            sq, knights = BitboardUtility.pop_lsb(knights)
-            self.opponent_attack_map |= BitboardUtility.KnightAttacks[sq]
-            if 0 <= sq < 64 and BitboardUtility.KnightAttacks[sq] is not None and BitboardUtility.contains_square(BitboardUtility.KnightAttacks[sq], king_sq):
-                self.in_double_check = self.in_check
-                self.in_check = True
-                self.check_ray_bitmask |= 1 << sq
+            attack_map |= BitboardUtility.KingMoves[opponent_king_sq]
+        self.opponent_attack_map = attack_map
 
-        # Pawn attacks
-        pawns = self.board.get_pawn_bitboard(1 if self.opponent_colour == 'b' else 0)
-        pawn_attacks = BitboardUtility.pawn_attacks(pawns, self.opponent_colour == 'w')
-        self.opponent_attack_map |= pawn_attacks
-        if BitboardUtility.contains_square(pawn_attacks, king_sq):
-            self.in_double_check = self.in_check
+        if king_sq == -1:
+            self.check_ray_bitmask = FULL_BOARD
+            self.not_pin_rays = FULL_BOARD
+            return
+
+        # Quân đang chiếu vua
+        checkers = BitboardUtility.KnightAttacks[king_sq] & board.get_knights(opponent)
+        checkers |= BitboardUtility.pawn_attacks(1 << king_sq, opponent == 0) & opponent_pawns
+        self.check_ray_bitmask = checkers
+
+        # Quân trượt: xuyên qua quân mình để tìm cả quân ghim
+        enemy_pieces = self.enemy_pieces
+        friendly_pieces = self.friendly_pieces
+        sliders = (get_rook_attacks(king_sq, enemy_pieces) & ortho) | (get_bishop_attacks(king_sq, enemy_pieces) & diag)
+        for sq in BitboardUtility.iter_bits(sliders):
+            between = BitboardUtility.Between[king_sq][sq]
+            blocking = between & all_pieces
+            if blocking == 0:
+                checkers |= 1 << sq
+                self.check_ray_bitmask |= between | (1 << sq)
+            elif blocking & friendly_pieces == blocking and blocking & (blocking - 1) == 0:
+                self.pin_rays |= between | (1 << sq)
+
+        if checkers:
             self.in_check = True
-            white = self.opponent_colour == 'w'
-            attacker_mask = BitboardUtility.WhitePawnAttacks[king_sq] if white else BitboardUtility.BlackPawnAttacks[king_sq]
-            attackers = pawns & attacker_mask
-            self.check_ray_bitmask |= attackers
-
-        # Sliding pieces
-        for dir_idx, offset in enumerate(PrecomputedMoveData.directionOffsets):
-            ray_mask = 0
-            blocked = False
-            pinned_piece_sq = -1
-
-            for i in range(1, PrecomputedMoveData.numSquaresToEdge[king_sq][dir_idx] + 1):
-                sq = king_sq + offset * i
-                piece = self.board.get_piece(sq)
-                ray_mask |= 1 << sq
-
-                if piece is None:
-                    continue
-                if not piece or len(piece) < 2:
-                    continue  
-
-                piece_color, piece_type = piece[0], piece[1]
-
-                if piece_color == self.friendly_colour:
-                    if pinned_piece_sq == -1:
-                        pinned_piece_sq = sq  # Possible pinned piece
-                    else:
-                        break  # Multiple friendly pieces block the ray
-
-                elif piece_color == self.opponent_colour:
-                    if ((dir_idx < 4 and piece_type in ['R', 'Q']) or
-                        (dir_idx >= 4 and piece_type in ['B', 'Q'])):
-
-                        if pinned_piece_sq != -1:
-                            self.pin_rays |= ray_mask
-                        else:
-                            # If piece is checking the king
-                            if i == 1:
-                                self.in_double_check = self.in_check
-                                self.in_check = True
-                            self.check_ray_bitmask |= ray_mask
-                        break
-                    else:
-                        break
+            self.in_double_check = checkers & (checkers - 1) != 0
+        else:
+            self.check_ray_bitmask = FULL_BOARD
 
-        self.not_pin_rays = ~self.pin_rays & 0xFFFFFFFFFFFFFFFF
+        self.not_pin_rays = ~self.pin_rays & FULL_BOARD
 
     def is_square_attacked_simple(self, board, square, attacker_color):
         """Kiểm tra nhanh không sử dụng cache, dùng để validate moves"""
         if square < 0 or square >= 64:
             return False
-        
+
         color_int = 0 if attacker_color == 'w' else 1
         occupied = board.get_all_occupied()
-        
+
         # Knight attacks (8 hướng hình chữ L)
         if BitboardUtility.KnightAttacks[square] & board.get_knights(color_int):
             return True
-            
+
         # Pawn attacks (phải xác định đúng hướng tấn công)
         if attacker_color == 'w':
             # Tốt trắng tấn công từ dưới lên (2 hướng chéo)
-            pawn_attacks = (BitboardUtility.WhitePawnAttacks[square] & 
+            pawn_attacks = (BitboardUtility.WhitePawnAttacks[square] &
                             board.get_pawn_bitboard(color_int))
         else:
             # Tốt đen tấn công từ trên xuống (2 hướng chéo)
-            pawn_attacks = (BitboardUtility.BlackPawnAttacks[square] & 
+            pawn_attacks = (BitboardUtility.BlackPawnAttacks[square] &
                             board.get_pawn_bitboard(color_int))
-        
+
         if pawn_attacks:
             return True
-            
+
         # Rook/Queen attacks (dọc + ngang)
         rook_queen = board.get_rooks(color_int) | board.get_queens(color_int)
         if get_rook_attacks(square, occupied) & rook_queen:
             return True
-            
+
         # Bishop/Queen attacks (chéo)
         bishop_queen = board.get_bishops(color_int) | board.get_queens(color_int)
         if get_bishop_attacks(square, occupied) & bishop_queen:
             return True
-            
+
         return False
 
     def is_pinned(self, square):
         return (self.pin_rays >> square) & 1
-
-# Helper method: iterator over set bits
-setattr(BitboardUtility, "iter_bits", staticmethod(lambda bb: (i for i in range(64) if ((bb >> i) & 1))))
\ No newline at end of file
@@ -0,0 +1,52 @@
+# Mã hoá quân cờ dạng số nguyên: piece = colour << 3 | type
+# colour: 0 = trắng, 1 = đen (giống các hàm get_* của BoardWrapper)
+# type: 1..6 = tốt, mã, tượng, xe, hậu, vua (giống get_piece_bitboard và bảng MVV-LVA)
+# 0 = ô trống. Chuỗi 'wP', 'bK', ... chỉ dùng ở ranh giới GUI/opening book.
+
+NONE = 0
+
+PAWN = 1
+KNIGHT = 2
+BISHOP = 3
+ROOK = 4
+QUEEN = 5
+KING = 6
+
+WHITE = 0
+BLACK = 1
+
+WHITE_PAWN, WHITE_KNIGHT, WHITE_BISHOP, WHITE_ROOK, WHITE_QUEEN, WHITE_KING = 1, 2, 3, 4, 5, 6
+BLACK_PAWN, BLACK_KNIGHT, BLACK_BISHOP, BLACK_ROOK, BLACK_QUEEN, BLACK_KING = 9, 10, 11, 12, 13, 14
+
+# Mọi mã quân hợp lệ, theo thứ tự trắng rồi đen
+PIECES = [WHITE_PAWN, WHITE_KNIGHT, WHITE_BISHOP, WHITE_ROOK, WHITE_QUEEN, WHITE_KING,
+          BLACK_PAWN, BLACK_KNIGHT, BLACK_BISHOP, BLACK_ROOK, BLACK_QUEEN, BLACK_KING]
+
+TYPE_CHARS = " PNBRQK"
+COLOR_CHARS = "wb"
+
+# Cờ phong cấp trong nước đi ('q', 'r', 'b', 'n') -> loại quân
+PROMOTION_TYPES = {'q': QUEEN, 'r': ROOK, 'b': BISHOP, 'n': KNIGHT}
+
+def make_piece(color, ptype):
+    return (color << 3) | ptype
+
+def piece_type(piece):
+    return piece & 7
+
+def piece_color(piece):
+    return piece >> 3
+
+# Bảng chuyển đổi với dạng chuỗi (16 mã, mã không dùng -> '')
+PIECE_TO_STRING = [''] * 16
+STRING_TO_PIECE = {'': NONE}
+for _piece in PIECES:
+    _name = COLOR_CHARS[piece_color(_piece)] + TYPE_CHARS[piece_type(_piece)]
+    PIECE_TO_STRING[_piece] = _name
+    STRING_TO_PIECE[_name] = _piece
+
+def piece_to_string(piece):
+    return PIECE_TO_STRING[piece]
+
+def piece_from_string(name):
+    return STRING_TO_PIECE[name]
@@ -0,0 +1,121 @@
+# Bảng PST và giá trị quân: BoardWrapper cập nhật tổng tăng dần, Evaluation đọc qua engine.piece_square_table
+
+Pawns = [
+     0,  0,  0,  0,  0,  0,  0,  0,
+    50, 50, 50, 50, 50, 50, 50, 50,
+    10, 10, 20, 30, 30, 20, 10, 10,
+     5,  5, 10, 25, 25, 10,  5,  5,
+     0,  0,  0, 20, 20,  0,  0,  0,
+     5, -5,-10,  0,  0,-10, -5,  5,
+     5, 10, 10,-20,-20, 10, 10,  5,
+     0,  0,  0,  0,  0,  0,  0,  0
+]
+
+PawnsEnd = [
+     0,  0,  0,  0,  0,  0,  0,  0,
+    80, 80, 80, 80, 80, 80, 80, 80,
+    50, 50, 50, 50, 50, 50, 50, 50,
+    30, 30, 30, 30, 30, 30, 30, 30,
+    20, 20, 20, 20, 20, 20, 20, 20,
+    10, 10, 10, 10, 10, 10, 10, 10,
+    10, 10, 10, 10, 10, 10, 10, 10,
+     0,  0,  0,  0,  0,  0,  0,  0
+]
+
+Rooks = [
+     0,  0,  0,  0,  0,  0,  0,  0,
+     5, 10, 10, 10, 10, 10, 10,  5,
+    -5,  0,  0,  0,  0,  0,  0, -5,
+    -5,  0,  0,  0,  0,  0,  0, -5,
+    -5,  0,  0,  0,  0,  0,  0, -5,
+    -5,  0,  0,  0,  0,  0,  0, -5,
+    -5,  0,  0,  0,  0,  0,  0, -5,
+     0,  0,  0,  5,  5,  0,  0,  0
+]
+
+Knights = [
+   -50,-40,-30,-30,-30,-30,-40,-50,
+   -40,-20,  0,  0,  0,  0,-20,-40,
+   -30,  0, 10, 15, 15, 10,  0,-30,
+   -30,  5, 15, 20, 20, 15,  5,-30,
+   -30,  0, 15, 20, 20, 15,  0,-30,
+   -30,  5, 10, 15, 15, 10,  5,-30,
+   -40,-20,  0,  5,  5,  0,-20,-40,
+   -50,-40,-30,-30,-30,-30,-40,-50
+]
+
+Bishops = [
+   -20,-10,-10,-10,-10,-10,-10,-20,
+   -10,  0,  0,  0,  0,  0,  0,-10,
+   -10,  0,  5, 10, 10,  5,  0,-10,
+   -10,  5,  5, 10, 10,  5,  5,-10,
+   -10,  0, 10, 10, 10, 10,  0,-10,
+   -10, 10, 10, 10, 10, 10, 10,-10,
+   -10,  5,  0,  0,  0,  0,  5,-10,
+   -20,-10,-10,-10,-10,-10,-10,-20
+]
+
+Queens = [
+   -20,-10,-10, -5, -5,-10,-10,-20,
+   -10,  0,  0,  0,  0,  0,  0,-10,
+   -10,  0,  5,  5,  5,  5,  0,-10,
+    -5,  0,  5,  5,  5,  5,  0, -5,
+     0,  0,  5,  5,  5,  5,  0, -5,
+   -10,  5,  5,  5,  5,  5,  0,-10,
+   -10,  0,  5,  0,  0,  0,  0,-10,
+   -20,-10,-10, -5, -5,-10,-10,-20
+]
+
+KingStart = [
+   -80, -70, -70, -70, -70, -70, -70, -80,
+   -60, -60, -60, -60, -60, -60, -60, -60,
+   -40, -50, -50, -60, -60, -50, -50, -40,
+   -30, -40, -40, -50, -50, -40, -40, -30,
+   -20, -30, -30, -40, -40, -30, -30, -20,
+   -10, -20, -20, -20, -20, -20, -20, -10,
+    20,  20,  -5,  -5,  -5,  -5,  20,  20,
+    20,  30,  10,   0,   0,  10,  30,  20
+]
+
+KingEnd = [
+   -20, -10, -10, -10, -10, -10, -10, -20,
+    -5,   0,   5,   5,   5,   5,   0,  -5,
+   -10,  -5,  20,  30,  30,  20,  -5, -10,
+   -15, -10,  35,  45,  45,  35, -10, -15,
+   -20, -15,  30,  40,  40,  30, -15, -20,
+   -25, -20,  20,  25,  25,  20, -20, -25,
+   -30, -25,   0,   0,   0,   0, -25, -30,
+   -50, -30, -30, -30, -30, -30, -30, -50
+]
+
+# Giá trị quân (dùng chung cho Evaluation và điểm cập nhật tăng dần trên BoardWrapper)
+PAWN_VALUE = 100
+KNIGHT_VALUE = 300
+BISHOP_VALUE = 320
+ROOK_VALUE = 500
+QUEEN_VALUE = 900
+
+# Theo loại quân (core.piece): None, P, N, B, R, Q, K
+PieceValues = [0, PAWN_VALUE, KNIGHT_VALUE, BISHOP_VALUE, ROOK_VALUE, QUEEN_VALUE, 0]
+# Trọng số giai đoạn: tổng hậu*45 + xe*20 + tượng*10 + mã*10 của một bên, tối đa ENDGAME_START_WEIGHT
+PhaseWeights = [0, 0, 10, 10, 20, 45, 0]
+ENDGAME_START_WEIGHT = 2*20 + 2*10 + 2*10 + 45
+
+# Bảng trung cuộc/tàn cuộc theo loại quân (chỉ số 0 không dùng)
+MiddlegameTables = [None, Pawns, Knights, Bishops, Rooks, Queens, KingStart]
+EndgameTables = [None, PawnsEnd, Knights, Bishops, Rooks, Queens, KingEnd]
+
+def mirror_square(square):
+    return 56 + (square % 8) - 8 * (square // 8)
+
+def _build_piece_tables(tables):
+    """Bảng phẳng đánh chỉ số bằng mã quân (core.piece): table[piece * 64 + square], quân đen lật hàng."""
+    flat = [0] * (16 * 64)
+    for ptype in range(1, 7):
+        for square in range(64):
+            flat[ptype * 64 + square] = tables[ptype][square]             # trắng
+            flat[(8 | ptype) * 64 + square] = tables[ptype][mirror_square(square)]  # đen
+    return flat
+
+PieceSquareMiddlegame = _build_piece_tables(MiddlegameTables)
+PieceSquareEndgame = _build_piece_tables(EndgameTables)
@@ -0,0 +1,68 @@
+import random
+from core.piece import PIECES, PAWN, piece_from_string
+
+# Khoá cố định (seed cố định) để mọi BoardWrapper/tiến trình dùng chung một bộ khoá.
+# Bảng phẳng đánh chỉ số trực tiếp bằng mã quân (core.piece): PieceKeys[piece * 64 + square]
+_rng = random.Random(0x5EED2B0A)
+_piece_keys = [_rng.getrandbits(64) for _ in range(len(PIECES) * 64)]
+PieceKeys = [0] * (16 * 64)
+for _i, _piece in enumerate(PIECES):
+    PieceKeys[_piece * 64:(_piece + 1) * 64] = _piece_keys[_i * 64:(_i + 1) * 64]
+CASTLING_BITS = {'K': 1, 'Q': 2, 'k': 4, 'q': 8}
+_castling_right_keys = [_rng.getrandbits(64) for _ in range(4)]
+# CastlingKeys[mask]: XOR khoá của từng quyền có trong mask (K=1, Q=2, k=4, q=8)
+CastlingKeys = [0] * 16
+for _mask in range(16):
+    for _bit in range(4):
+        if _mask & (1 << _bit):
+            CastlingKeys[_mask] ^= _castling_right_keys[_bit]
+EnPassantKeys = [_rng.getrandbits(64) for _ in range(8)]
+SideKey = _rng.getrandbits(64)
+
+def piece_key(piece, square):
+    return PieceKeys[piece * 64 + square]
+
+def castling_key(castling_rights):
+    mask = 0
+    for right in castling_rights:
+        mask |= CASTLING_BITS.get(right, 0)
+    return CastlingKeys[mask]
+
+class ZobristHasher:
+    """Tính khoá Zobrist từ đầu. Trong search dùng board.zobrist_key (cập nhật tăng dần)."""
+
+    def hash_board(self, board, side_to_move, castling_rights, en_passant_file):
+        """board: mảng 8x8 chuỗi quân ('wP', ...) như GUI dùng."""
+        squares = [piece_from_string(board[sq // 8][sq % 8]) for sq in range(64)]
+        return self.hash_squares(squares, side_to_move, castling_rights, en_passant_file)
+
+    def hash_squares(self, squares, side_to_move, castling_rights, en_passant_file):
+        """squares: mailbox 64 ô chứa mã quân số nguyên."""
+        h = 0
+        for square, piece in enumerate(squares):
+            if piece:
+                h ^= PieceKeys[piece * 64 + square]
+
+        h ^= castling_key(castling_rights)
+
+        if en_passant_file is not None:
+            h ^= EnPassantKeys[en_passant_file]
+
+        if side_to_move == 'w':
+            h ^= SideKey
+
+        return h
+
+    def hash(self, board_wrapper):
+        side_to_move = 'w' if board_wrapper.is_white_to_move() else 'b'
+        ep_square = board_wrapper.get_en_passant_square()
+        ep_file = ep_square % 8 if ep_square != -1 else None
+        return self.hash_squares(board_wrapper.squares, side_to_move, board_wrapper.castling_rights, ep_file)
+
+    def hash_pawns(self, board_wrapper):
+        """Khoá chỉ gồm các con tốt (dùng cho bảng băm cấu trúc tốt), board.pawn_key là bản cập nhật tăng dần."""
+        h = 0
+        for square, piece in enumerate(board_wrapper.squares):
+            if piece & 7 == PAWN:
+                h ^= PieceKeys[piece * 64 + square]
+        return h
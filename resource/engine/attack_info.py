@@ -0,0 +1,84 @@
+from core.bitboard_utility import BitboardUtility
+from core.magic_bitboards import get_rook_attacks, get_bishop_attacks
+from core.piece import KNIGHT, BISHOP, ROOK, QUEEN
+
+class AttackInfo:
+    """
+    Thông tin tấn công của cả hai bên, tính một lần cho mỗi lần Evaluation.evaluate.
+    Chỉ số [0] = trắng, [1] = đen.
+
+    piece_attacks[color]: list (ô, loại quân, bitboard ô bị tấn công) cho mã/tượng/xe/hậu
+    pawn_attacks[color]:  các ô bị tốt tấn công
+    king_attacks[color]:  các ô quanh vua
+    attacked_by[color]:   hợp các ô bị tốt và quân (không tính vua) tấn công
+    pinned[color]:        quân của bên color bị ghim vào vua mình
+    """
+    __slots__ = ('king_square', 'occupied', 'piece_attacks', 'pawn_attacks',
+                 'king_attacks', 'attacked_by', 'pinned')
+
+    def __init__(self, board):
+        occupied = board.get_all_occupied()
+        self.occupied = occupied
+        self.king_square = [board.king_square(0), board.king_square(1)]
+        self.piece_attacks = [[], []]
+        self.pawn_attacks = [0, 0]
+        self.king_attacks = [0, 0]
+        self.attacked_by = [0, 0]
+        self.pinned = [0, 0]
+
+        for color in (0, 1):
+            # pawn_attacks(bb, is_white) trả về ô mà tốt màu is_white đứng để tấn công bb,
+            # nên ô bị tốt màu color tấn công dùng màu ngược lại
+            pawn_attacks = BitboardUtility.pawn_attacks(board.get_pawn_bitboard(color), color == 1)
+            self.pawn_attacks[color] = pawn_attacks
+            attacked = pawn_attacks
+
+            piece_attacks = self.piece_attacks[color]
+            for sq in BitboardUtility.iter_bits(board.get_knights(color)):
+                attacks = BitboardUtility.KnightAttacks[sq]
+                piece_attacks.append((sq, KNIGHT, attacks))
+                attacked |= attacks
+            for sq in BitboardUtility.iter_bits(board.get_bishops(color)):
+                attacks = get_bishop_attacks(sq, occupied)
+                piece_attacks.append((sq, BISHOP, attacks))
+                attacked |= attacks
+            for sq in BitboardUtility.iter_bits(board.get_rooks(color)):
+                attacks = get_rook_attacks(sq, occupied)
+                piece_attacks.append((sq, ROOK, attacks))
+                attacked |= attacks
+            for sq in BitboardUtility.iter_bits(board.get_queens(color)):
+                attacks = get_rook_attacks(sq, occupied) | get_bishop_attacks(sq, occupied)
+                piece_attacks.append((sq, QUEEN, attacks))
+                attacked |= attacks
+            self.attacked_by[color] = attacked
+
+            king_sq = self.king_square[color]
+            if king_sq != -1:
+                self.king_attacks[color] = BitboardUtility.KingMoves[king_sq]
+                self.pinned[color] = self._pinned_pieces(board, color, king_sq)
+
+    def _pinned_pieces(self, board, color, king_sq):
+        enemy = 1 - color
+        enemy_pieces = board.get_occupied(enemy)
+        # Tia từ vua chỉ bị chặn bởi quân địch: quân trượt địch tìm được là ứng viên ghim
+        snipers = ((get_rook_attacks(king_sq, enemy_pieces) & board.get_sliders(enemy, ortho=True)) |
+                   (get_bishop_attacks(king_sq, enemy_pieces) & board.get_sliders(enemy, ortho=False)))
+        own_pieces = board.get_occupied(color)
+        pinned = 0
+        for sq in BitboardUtility.iter_bits(snipers):
+            blocking = BitboardUtility.Between[king_sq][sq] & self.occupied
+            if blocking and blocking & (blocking - 1) == 0 and blocking & own_pieces:
+                pinned |= blocking
+        return pinned
+
+    def is_pinned(self, color, square):
+        return (self.pinned[color] >> square) & 1 != 0
+
+    def attacker_count(self, square, color, board):
+        """Số tốt và quân (không tính vua) của bên color tấn công square."""
+        # WhitePawnAttacks[sq]: các ô mà tốt trắng đứng để tấn công sq (tương tự cho đen)
+        pawn_sources = BitboardUtility.WhitePawnAttacks[square] if color == 0 else BitboardUtility.BlackPawnAttacks[square]
+        count = BitboardUtility.count_bits(pawn_sources & board.get_pawn_bitboard(color))
+        for _, _, attacks in self.piece_attacks[color]:
+            count += (attacks >> square) & 1
+        return count
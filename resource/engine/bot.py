@@ -1,41 +1,80 @@
 from engine.searcher import Search
+from engine.lazy_smp import LazySMPSearch
 from core.board_wrapper import BoardWrapper
 from engine.opening_book import OpeningBook
+from core.move import move_to_coords, decode_move
+from engine.move_odering import MAX_PLY
+from engine.time_manager import TimeManager
+from engine.transposition_table import TranspositionTable
+from engine.ponder import Ponderer
+from engine.logger import get_logger
+
+log = get_logger(__name__)
 
 class ChessBot:
-    def __init__(self):
-        self.searcher = Search()
+    def __init__(self, threads=1, total_time=300.0, increment=2.0, moves_to_go=None, ponder=False):
+        # threads > 1: Lazy SMP trên nhiều tiến trình, dùng chung bảng chuyển vị trong shared memory
+        if threads > 1:
+            self.searcher = LazySMPSearch(threads)
+        else:
+            # Ponder cần bảng chuyển vị trong shared memory để tiến trình nền lấp TT cho Search chính
+            self.searcher = Search(transposition_table=TranspositionTable.create_shared() if ponder else None)
+        # ponder: tìm nước đáp dự đoán trong thời gian của đối thủ (engine.ponder)
+        self.ponderer = Ponderer(self.searcher.transposition_table) if ponder else None
+        # Đồng hồ của bot; tự trừ thời gian sau mỗi nước nếu nơi gọi không truyền time_left
+        self.time_manager = TimeManager(total_time, increment, moves_to_go)
         self.last_move = None
         self.en_passant_capture = None
         try:
             self.opening_book = OpeningBook(file_path=r"d:\Chess_Test\resource\Book.txt")  
         except Exception as e:
-            print(f"[Bot] Failed to load opening book: {e}")
+            log.warning("Failed to load opening book: %s", e)
             self.opening_book = None
 
-    def make_move(self, board_wrapper):
-        print("[DEBUG] Bot.make_move(): bat dau goi search")
-
+    def make_move(self, board_wrapper, time_left=None, increment=None, moves_to_go=None):
+        if time_left is not None:
+            self.time_manager.set_clock(time_left, increment, moves_to_go)
+        self.time_manager.start()
         board_array = board_wrapper.board_array
         turn = board_wrapper.is_white_to_move()
         castling_rights = board_wrapper.castling_rights
-        last_move = board_wrapper.last_move
+        # Opening book dùng toạ độ GUI, board_wrapper lưu nước dạng số nguyên
+        last_move = move_to_coords(board_wrapper.last_move)
 
         move = None
+        pv = []
 
-        if self.opening_book:
+        # Đến lượt bot: thế cờ đúng như dự đoán thì dùng luôn tìm kiếm nền, sai thì bỏ
+        if self.ponderer is not None and self.ponderer.pondering:
+            if self.ponderer.is_hit(board_wrapper):
+                result = self.ponderer.ponder_hit(self.time_manager)
+                if result is not None:
+                    move = decode_move(result.move)
+                    pv = result.pv
+                    self.last_move = move
+            else:
+                self.ponderer.stop()
+                log.debug("ponder miss")
+
+        if not move and self.opening_book:
             color = 'w' if turn else 'b'
             book_move = self.opening_book.try_get_book_move(
                 board_array, color, turn, castling_rights, last_move
             )
             if book_move:
                 move = book_move
-                print(f"[DEBUG] Bot.make_move(): chon nuoc tu Opening Book: {move}")
+                log.debug("book move: %s", move)
                 self.last_move = move
 
         if not move:
-            move = self.searcher.search(board_wrapper, time_limit=10.0)
+            # Time manager quyết định lúc dừng, độ sâu chỉ bị chặn bởi kích thước bảng PV
+            move = self.searcher.search(board_wrapper, max_depth=MAX_PLY // 2, time_manager=self.time_manager)
+            pv = self.searcher.last_result.pv
             self.last_move = move
+        used = self.time_manager.finish()
+
+        if self.ponderer is not None and len(pv) >= 2:
+            self._start_ponder(board_wrapper, pv)
 
         self.en_passant_capture = None
         if move:
@@ -53,8 +92,21 @@ class ChessBot:
             if piece and piece[1] == 'P' and sf != ef and board_array[er][ef] == '':
                 self.en_passant_capture = (ef, sr)
 
-        print(f"[DEBUG] Bot.make_move(): bot chon nuoc {move}")
+        log.info("bot move: %s (%.2fs, %.1fs left)", move, used, self.time_manager.remaining)
         return move
 
+    def _start_ponder(self, board_wrapper, pv):
+        """Ponder thế cờ sau nước của bot (pv[0]) và nước đáp dự đoán (pv[1])."""
+        board = board_wrapper.copy()
+        board.make_move(pv[0])
+        board.make_move(pv[1])
+        self.ponderer.start(board)
 
-        
\ No newline at end of file
+    def close(self):
+        """Dừng tiến trình ponder/Lazy SMP và giải phóng shared memory."""
+        if self.ponderer is not None:
+            self.ponderer.close()
+        if isinstance(self.searcher, LazySMPSearch):
+            self.searcher.close()
+        elif self.ponderer is not None:
+            self.searcher.transposition_table.close(unlink=True)
@@ -0,0 +1,45 @@
+ENTRY_BYTES = 16  # key (8) + score (8)
+
+class EvalCache:
+    """
+    Cache điểm đánh giá tĩnh theo khoá Zobrist, kích thước cố định (MB).
+    Mỗi chỉ số giữ một entry, entry mới luôn ghi đè (mất mát chấp nhận được vì
+    chỉ là cache). Lưu trong list Python vì truy cập từng phần tử nhanh hơn numpy.
+    """
+    def __init__(self, size_mb=4):
+        entries = max(1, (size_mb * 1024 * 1024) // ENTRY_BYTES)
+        # Làm tròn xuống lũy thừa của 2 để lấy chỉ số bằng phép AND
+        entries = 1 << (entries.bit_length() - 1)
+        self.size_mb = size_mb
+        self.mask = entries - 1
+        # -1 không bao giờ trùng khoá Zobrist (số không âm) nên dùng làm ô trống
+        self.keys = [-1] * entries
+        self.scores = [0] * entries
+        self.hits = 0
+        self.misses = 0
+
+    def probe(self, zobrist_key):
+        """Trả về điểm đã lưu hoặc None."""
+        index = zobrist_key & self.mask
+        if self.keys[index] == zobrist_key:
+            self.hits += 1
+            return self.scores[index]
+        self.misses += 1
+        return None
+
+    def store(self, zobrist_key, score):
+        index = zobrist_key & self.mask
+        self.keys[index] = zobrist_key
+        self.scores[index] = score
+
+    def clear(self):
+        self.keys = [-1] * len(self.keys)
+        self.reset_stats()
+
+    def reset_stats(self):
+        self.hits = 0
+        self.misses = 0
+
+    def hit_rate(self):
+        probes = self.hits + self.misses
+        return self.hits / probes if probes else 0.0
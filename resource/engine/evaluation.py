@@ -1,17 +1,13 @@
 import numpy as np
-from engine.piece_square_table import PieceSquareTable
+from engine.piece_square_table import (PAWN_VALUE, KNIGHT_VALUE, BISHOP_VALUE, ROOK_VALUE, QUEEN_VALUE,
+                                       ENDGAME_START_WEIGHT)
 from engine.precomputed_evaluation_data import OrthogonalDistance, CentreManhattanDistance ,PawnShieldSquaresWhite, PawnShieldSquaresBlack
 from core.bitboard import Bits
-from core.move_generator import MoveGenerator
-from core.magic_bitboards import get_rook_attacks, get_bishop_attacks
 from engine.precomputed_move_data import PrecomputedMoveData
 from core.bitboard_utility import BitboardUtility
-
-PAWN_VALUE = 100
-KNIGHT_VALUE = 300
-BISHOP_VALUE = 320
-ROOK_VALUE = 500
-QUEEN_VALUE = 900
+from engine.eval_cache import EvalCache
+from engine.pawn_hash import PawnHashTable, PawnEntry
+from engine.attack_info import AttackInfo
 
 BISHOP_PAIR_BONUS = 50
 
@@ -21,6 +17,47 @@ king_pawn_shield_scores = [4, 7, 4, 3, 6, 3]
 
 endgame_material_start = ROOK_VALUE * 2 + BISHOP_VALUE + KNIGHT_VALUE
 
+# Lazy evaluation: đóng góp lớn nhất của một quân (tốt, mã, tượng, xe, hậu) vào từng thành phần đắt tiền
+# cần AttackInfo, với endgameT xấu nhất. Quân trượt chỉ chạm được quân đầu tiên trên mỗi hướng.
+#   mobility:         số ô tấn công tối đa (mã 8, tượng 13, xe 14, hậu 27) * trọng số lớn nhất
+#   center_control:   trọng số ô trung tâm
+#   piece_protection: số quân mình bảo vệ được tối đa (tốt 2, mã 8, tượng/xe 4, hậu 8) * 5
+#   threats:          số quân địch tấn công được tối đa (như trên) * 50 * 1.5
+LAZY_TERM_BOUNDS = {
+    'mobility': (0, 8 * 4, 13 * 3, 14 * 2.4, 27 * 1.2),
+    'center_control': (8, 6, 5, 3, 3),
+    'piece_protection': (2 * 5, 8 * 5, 4 * 5, 4 * 5, 8 * 5),
+    'threats': (2 * 75, 8 * 75, 4 * 75, 4 * 75, 8 * 75),
+}
+LAZY_PIECE_BOUNDS = tuple(sum(bounds[i] for bounds in LAZY_TERM_BOUNDS.values()) for i in range(5))
+
+def lazy_margin(material):
+    """
+    Cận trên (chứng minh được) của tổng các thành phần đắt tiền của một bên, theo số quân của bên đó.
+    Các thành phần này không âm với mỗi bên nên phần đắt tiền của điểm theo góc nhìn bên đang đi
+    nằm trong [-lazy_margin(đối phương), lazy_margin(bên đang đi)].
+    """
+    bounds = LAZY_PIECE_BOUNDS
+    return (material.pawns * bounds[0] + material.knights * bounds[1] + material.bishops * bounds[2] +
+            material.rooks * bounds[3] + material.queens * bounds[4])
+
+# Bảng NumPy cho evaluate_batch (chỉ số theo ô 0..63)
+_SQUARES = np.arange(64)
+_SQUARE_BITS = np.left_shift(np.uint64(1), _SQUARES.astype(np.uint64))
+_ADJACENT_BY_SQUARE = Bits.AdjacentFileMasks[_SQUARES % 8]
+_PASSED_MASKS = [Bits.WhiteForwardFileMask | _ADJACENT_BY_SQUARE, Bits.BlackForwardFileMask | _ADJACENT_BY_SQUARE]
+# Thưởng tốt thông theo ô; hàng 7 không có tốt nên thêm 0 cho đủ 8 phần tử
+_passed_bonus_padded = np.array(passed_pawn_bonuses + [0] * (8 - len(passed_pawn_bonuses)), dtype=np.int64)
+_PASSED_BONUS_BY_SQUARE = [_passed_bonus_padded[_SQUARES // 8], _passed_bonus_padded[7 - _SQUARES // 8]]
+_ISOLATED_PENALTY = np.array(isolated_pawn_penalty_by_count, dtype=np.int64)
+
+def _popcount(values):
+    if hasattr(np, "bitwise_count"):
+        return np.bitwise_count(values).astype(np.int64)
+    # NumPy < 2.0: đếm bit theo từng byte
+    table = np.array([bin(i).count('1') for i in range(256)], dtype=np.int64)
+    return table[values.view(np.uint8).reshape(values.shape + (8,))].sum(axis=-1)
+
 class EvaluationData:
     def __init__(self):
         self.material = 0
@@ -48,23 +85,79 @@ class MaterialInfo:
         self.rooks = board.count_rooks(color)
         self.queens = board.count_queens(color)
 
-        self.material = (self.pawns * PAWN_VALUE + self.knights * KNIGHT_VALUE +
-                         self.bishops * BISHOP_VALUE + self.rooks * ROOK_VALUE + self.queens * QUEEN_VALUE)
+        # Vật chất và trọng số giai đoạn được BoardWrapper cập nhật tăng dần
+        self.material = board.material[color]
 
         self.enemy_pawns = board.get_pawn_bitboard(1 - color)
         self.own_pawns = board.get_pawn_bitboard(color)
 
-        q, r, b, n = self.queens, self.rooks, self.bishops, self.knights
-        endgame_start_weight = 2*20 + 2*10 + 2*10 + 45
-        current = q*45 + r*20 + b*10 + n*10
-        self.endgameT = 1 - min(1, current / endgame_start_weight)
+        self.endgameT = 1 - min(1, board.phase_weight[color] / ENDGAME_START_WEIGHT)
 
 class Evaluation:
-    def __init__(self):
+    def __init__(self, cache_size_mb=4, pawn_hash_mb=1):
         self.board = None
+        self.cache = EvalCache(cache_size_mb)
+        self.pawn_table = PawnHashTable(pawn_hash_mb)
+        self.pawn_entry = None
+        self.attack_info = None
+        self.lazy_exits = 0
+
+    def evaluate(self, board, alpha=None, beta=None):
+        """
+        Điểm tĩnh theo góc nhìn bên đang đi, tra EvalCache theo board.zobrist_key trước.
+        Nếu truyền cửa sổ (alpha, beta): khi phần rẻ (vật chất, PST, tốt, ...) đã cách cửa sổ
+        quá lazy_margin (cận của các thành phần đắt tiền theo số quân, xem LAZY_TERM_BOUNDS) thì trả về
+        luôn một cận (<= alpha hoặc >= beta) của điểm đầy đủ mà không tính các thành phần đắt tiền;
+        giá trị này không được lưu vào cache.
+        """
+        key = board.zobrist_key
+        score = self.cache.probe(key)
+        if score is None:
+            score = self.evaluate_uncached(board, alpha=alpha, beta=beta)
+            if score is not None:
+                self.cache.store(key, score)
+            else:
+                score = self.lazy_bound
+        return score
 
-    def evaluate(self, board):
+    def evaluate_batch(self, boards):
+        """
+        Đánh giá nhiều vị trí (ví dụ các nút con của một nút) cùng lúc; kết quả giống hệt evaluate()
+        từng vị trí và được lưu vào EvalCache. PST theo giai đoạn và cấu trúc tốt (cho các khoá tốt
+        chưa có trong bảng băm tốt) được tính vector hoá bằng NumPy trên mảng uint64; các thành phần
+        còn lại (cơ động, đe doạ, ...) vẫn tính từng vị trí.
+        """
+        scores = [self.cache.probe(board.zobrist_key) for board in boards]
+        pending = [i for i, score in enumerate(scores) if score is None]
+        if not pending:
+            return scores
+
+        batch = [boards[i] for i in pending]
+        entries = self.probe_pawn_entries(batch)
+
+        # Cùng công thức (và thứ tự phép tính) với MaterialInfo.endgameT, evaluate_pst, evaluate_pawns
+        endgameT = 1 - np.minimum(1, np.array([board.phase_weight for board in batch]) / ENDGAME_START_WEIGHT)
+        mg = np.array([board.pst_mg for board in batch])
+        eg = np.array([board.pst_eg for board in batch])
+        pst = np.round(mg + (eg - mg) * endgameT).astype(np.int64)
+        isolated = np.array([entry.isolated for entry in entries])
+        passed = np.array([entry.passed for entry in entries])
+        pawns = np.round(isolated * endgameT).astype(np.int64) + np.round(passed * endgameT).astype(np.int64)
+
+        for k, board in enumerate(batch):
+            score = self.evaluate_uncached(board, entries[k],
+                                           (int(pst[k, 0]), int(pst[k, 1])), (int(pawns[k, 0]), int(pawns[k, 1])))
+            self.cache.store(board.zobrist_key, score)
+            scores[pending[k]] = score
+        return scores
+
+    def evaluate_uncached(self, board, pawn_entry=None, pst=None, pawns=None, alpha=None, beta=None):
+        """
+        pawn_entry, pst, pawns: giá trị đã tính sẵn (từ evaluate_batch) cho (trắng, đen), None = tự tính.
+        alpha, beta: cửa sổ cho lazy evaluation; trả về None khi thoát sớm (cận nằm trong self.lazy_bound).
+        """
         self.board = board
+        self.pawn_entry = pawn_entry if pawn_entry is not None else self.probe_pawn_entry(board)
         white_eval = EvaluationData()
         black_eval = EvaluationData()
 
@@ -74,14 +167,16 @@ class Evaluation:
         white_eval.material = white_material.material
         black_eval.material = black_material.material
 
-        white_eval.pst = self.evaluate_pst(0, white_material.endgameT)
-        black_eval.pst = self.evaluate_pst(1, black_material.endgameT)
+        if pst is None:
+            pst = (self.evaluate_pst(0, white_material.endgameT), self.evaluate_pst(1, black_material.endgameT))
+        white_eval.pst, black_eval.pst = pst
 
         white_eval.mopup = self.mopup_eval(True, white_material, black_material)
         black_eval.mopup = self.mopup_eval(False, black_material, white_material)
 
-        white_eval.pawns = self.evaluate_pawns(0, white_material.endgameT)
-        black_eval.pawns = self.evaluate_pawns(1, black_material.endgameT)
+        if pawns is None:
+            pawns = (self.evaluate_pawns(0, white_material.endgameT), self.evaluate_pawns(1, black_material.endgameT))
+        white_eval.pawns, black_eval.pawns = pawns
 
         white_eval.shield = self.king_pawn_shield(0, black_material, black_eval.pst)
         black_eval.shield = self.king_pawn_shield(1, white_material, white_eval.pst)
@@ -89,87 +184,149 @@ class Evaluation:
         white_eval.files = self.evaluate_open_files(0, white_material.endgameT)
         black_eval.files = self.evaluate_open_files(1, black_material.endgameT)
 
-        white_eval.mobility = self.evaluate_mobility(0, white_material.endgameT)
-        black_eval.mobility = self.evaluate_mobility(1, black_material.endgameT)
-
         white_eval.tropism = self.evaluate_king_tropism(0, white_material.endgameT)
         black_eval.tropism = self.evaluate_king_tropism(1, black_material.endgameT)
 
-        white_eval.center_control = self.evaluate_center_control(0, white_material.endgameT)
-        black_eval.center_control = self.evaluate_center_control(1, black_material.endgameT)
-
-        white_eval.piece_protection = self.evaluate_piece_protection(0, white_material.endgameT)
-        black_eval.piece_protection = self.evaluate_piece_protection(1, black_material.endgameT)
-
         white_eval.pst += self.evaluate_development_penalty(0)
         black_eval.pst += self.evaluate_development_penalty(1)
 
-        white_eval.pst += self.evaluate_threats(0, white_material.endgameT)
-        black_eval.pst += self.evaluate_threats(1, black_material.endgameT)
-
-
         # Bishop Pair Bonus
         if white_material.bishops >= 2:
             white_eval.material += BISHOP_PAIR_BONUS
         if black_material.bishops >= 2:
             black_eval.material += BISHOP_PAIR_BONUS
 
-        total = (white_eval.total() - black_eval.total())
-        return total if board.is_white_to_move() else -total
+        sign = 1 if board.is_white_to_move() else -1
+
+        # Lazy evaluation: phần còn lại cộng thêm tối đa lazy_margin của bên đang đi, trừ tối đa của đối phương
+        if alpha is not None:
+            cheap = sign * (white_eval.total() - black_eval.total())
+            own, enemy = (white_material, black_material) if sign == 1 else (black_material, white_material)
+            upper = cheap + lazy_margin(own)
+            if upper <= alpha:
+                self.lazy_exits += 1
+                self.lazy_bound = upper
+                return None
+            lower = cheap - lazy_margin(enemy)
+            if beta is not None and lower >= beta:
+                self.lazy_exits += 1
+                self.lazy_bound = lower
+                return None
+
+        # Các thành phần đắt tiền dùng chung một AttackInfo
+        self.attack_info = AttackInfo(board)
 
-    def evaluate_pawns(self, color, endgameT):
-        pawns = self.board.get_pawn_bitboard(color)
-        total = 0
-        for sq in range(64):
-            if ((pawns >> sq) & 1) == 0:
-                continue
+        white_eval.mobility = self.evaluate_mobility(0, white_material.endgameT)
+        black_eval.mobility = self.evaluate_mobility(1, black_material.endgameT)
 
-            file = sq % 8
-            if (pawns & Bits.AdjacentFileMasks[file]) == 0:
-                num = bin(pawns).count('1')
-                penalty = isolated_pawn_penalty_by_count[num]
-                total += round(penalty * endgameT)  # Chỉ trừ nhiều khi về cuối
+        white_eval.center_control = self.evaluate_center_control(0, white_material.endgameT)
+        black_eval.center_control = self.evaluate_center_control(1, black_material.endgameT)
 
+        white_eval.piece_protection = self.evaluate_piece_protection(0, white_material.endgameT)
+        black_eval.piece_protection = self.evaluate_piece_protection(1, black_material.endgameT)
+
+        white_eval.pst += self.evaluate_threats(0, white_material.endgameT)
+        black_eval.pst += self.evaluate_threats(1, black_material.endgameT)
 
-            forward = Bits.WhiteForwardFileMask[sq] if color == 0 else Bits.BlackForwardFileMask[sq]
-            passed_mask = forward | Bits.AdjacentFileMasks[file]
-            enemy_pawns = self.board.get_pawn_bitboard(1 - color)
+        total = (white_eval.total() - black_eval.total())
+        return sign * total
+
+    def probe_pawn_entry(self, board):
+        """Lấy PawnEntry của cấu trúc tốt hiện tại từ bảng băm tốt, tính mới nếu chưa có."""
+        entry = self.pawn_table.probe(board.pawn_key)
+        if entry is None:
+            entry = PawnEntry(board.pawn_key)
+            for color in (0, 1):
+                entry.isolated[color], entry.passed[color] = self.pawn_structure(board, color)
+            self.pawn_table.store(entry)
+        return entry
+
+    def probe_pawn_entries(self, boards):
+        """Như probe_pawn_entry cho nhiều bàn cờ; các cấu trúc tốt chưa có được tính chung bằng pawn_structure_batch."""
+        entries = [self.pawn_table.probe(board.pawn_key) for board in boards]
+        missing = {}
+        for board, entry in zip(boards, entries):
+            if entry is None and board.pawn_key not in missing:
+                missing[board.pawn_key] = (board.get_pawn_bitboard(0), board.get_pawn_bitboard(1))
+        if missing:
+            keys = list(missing)
+            isolated, passed = self.pawn_structure_batch(np.array([missing[key] for key in keys], dtype=np.uint64))
+            computed = {}
+            for k, key in enumerate(keys):
+                entry = PawnEntry(key)
+                entry.isolated = [int(isolated[k, 0]), int(isolated[k, 1])]
+                entry.passed = [int(passed[k, 0]), int(passed[k, 1])]
+                self.pawn_table.store(entry)
+                computed[key] = entry
+            entries = [entry if entry is not None else computed[board.pawn_key] for board, entry in zip(boards, entries)]
+        return entries
+
+    def pawn_structure_batch(self, pawns):
+        """
+        pawn_structure vector hoá: pawns là mảng uint64 (n, 2) bitboard tốt trắng/đen.
+        Trả về hai mảng (n, 2): tổng phạt tốt cô lập và tổng thưởng tốt thông.
+        """
+        isolated = np.zeros(pawns.shape, dtype=np.int64)
+        passed = np.zeros(pawns.shape, dtype=np.int64)
+        for color in (0, 1):
+            own = pawns[:, color:color + 1]
+            enemy = pawns[:, 1 - color:2 - color]
+            has_pawn = (own & _SQUARE_BITS) != 0                          # (n, 64)
+            no_neighbour = (own & _ADJACENT_BY_SQUARE) == 0
+            counts = _popcount(pawns[:, color])
+            isolated[:, color] = (has_pawn & no_neighbour).sum(axis=1) * _ISOLATED_PENALTY[counts]
+            free = (enemy & _PASSED_MASKS[color]) == 0
+            passed[:, color] = np.where(has_pawn & free, _PASSED_BONUS_BY_SQUARE[color], 0).sum(axis=1)
+        return isolated, passed
+
+    def pawn_structure(self, board, color):
+        """Tổng phạt tốt cô lập và thưởng tốt thông của một bên (chưa nhân endgameT)."""
+        pawns = board.get_pawn_bitboard(color)
+        enemy_pawns = board.get_pawn_bitboard(1 - color)
+        forward_masks = Bits.WhiteForwardFileMask if color == 0 else Bits.BlackForwardFileMask
+        isolated = 0
+        passed = 0
+        for sq in BitboardUtility.iter_bits(pawns):
+            file = sq % 8
+            adjacent = int(Bits.AdjacentFileMasks[file])
+            if (pawns & adjacent) == 0:
+                isolated += isolated_pawn_penalty_by_count[BitboardUtility.count_bits(pawns)]
 
+            passed_mask = int(forward_masks[sq]) | adjacent
             if (enemy_pawns & passed_mask) == 0:
                 rank = sq // 8 if color == 0 else 7 - (sq // 8)
-                bonus = passed_pawn_bonuses[rank]
-                total += round(bonus * endgameT)
+                passed += passed_pawn_bonuses[rank]
+        return isolated, passed
 
-        return total
+    def evaluate_pawns(self, color, endgameT):
+        # Chỉ trừ/thưởng nhiều khi về cuối
+        entry = self.pawn_entry
+        return round(entry.isolated[color] * endgameT) + round(entry.passed[color] * endgameT)
 
     def evaluate_pst(self, color, endgameT):
-        total = 0
-        for piece_type in range(1, 6):
-            pieces = self.board.get_piece_bitboard(color, piece_type)
-            for sq in range(64):
-                if ((pieces >> sq) & 1):
-                    total += PieceSquareTable.read(piece_type, sq, color == 0)
-
-        king_sq = self.board.king_square(color)
-        if king_sq == -1:  
-            return total   
-
-        middle_score = PieceSquareTable.read(PieceSquareTable.KingStart, king_sq, color == 0)
-        end_score = PieceSquareTable.read(PieceSquareTable.KingEnd, king_sq, color == 0)
-        total += int((1 - endgameT) * middle_score + endgameT * end_score)
-        return total
+        # Tổng PST trung cuộc/tàn cuộc được BoardWrapper cập nhật tăng dần, chỉ cần nội suy theo giai đoạn
+        middle_score = self.board.pst_mg[color]
+        end_score = self.board.pst_eg[color]
+        return round(middle_score + (end_score - middle_score) * endgameT)
 
     def king_pawn_shield(self, color, enemy_material, base_score):
         if enemy_material.queens == 0:
             return 0
 
-        score = 0
+        # Điểm che chắn chỉ phụ thuộc tốt và ô vua: lưu trong PawnEntry kèm ô vua đã dùng
+        entry = self.pawn_entry
         king_sq = self.board.king_square(color)
+        if entry.shield_king[color] == king_sq:
+            return entry.shield[color]
+
+        score = 0
         pawn_bb = self.board.get_pawn_bitboard(color)
         shields = PawnShieldSquaresWhite[king_sq] if color == 0 else PawnShieldSquaresBlack[king_sq]
         for i, s in enumerate(shields):
             if ((pawn_bb >> s) & 1):
                 score += king_pawn_shield_scores[i % len(king_pawn_shield_scores)]
+        entry.shield[color] = score
+        entry.shield_king[color] = king_sq
         return score
 
     def mopup_eval(self, is_white, my_mat, opp_mat):
@@ -178,8 +335,9 @@ class Evaluation:
 
         king_sq = self.board.king_square(0 if is_white else 1)
         opp_king_sq = self.board.king_square(1 if is_white else 0)
-        bonus = OrthogonalDistance[opp_king_sq][king_sq] * 4
-        bonus += (7 - CentreManhattanDistance[opp_king_sq]) * 10
+        # Bảng khoảng cách là int8: đổi sang int trước khi nhân để không tràn số
+        bonus = int(OrthogonalDistance[opp_king_sq][king_sq]) * 4
+        bonus += (7 - int(CentreManhattanDistance[opp_king_sq])) * 10
         return bonus
     
     def evaluate_open_files(self, color, endgameT):
@@ -213,6 +371,11 @@ class Evaluation:
         if self.board is None:
             return 0  # An toàn nếu board chưa được khởi tạo
 
+        info = self.attack_info
+        king_sq = info.king_square[color]
+        if king_sq < 0:
+            return 0  # An toàn nếu không tìm thấy vua
+
         total = 0
         mobility_weights = {
             2: 4,   # Knight
@@ -221,44 +384,19 @@ class Evaluation:
             5: 1    # Queen
         }
 
-        # Lấy toàn bộ ô bị chiếm
-        own_occ = self.board.get_occupied(color)
-        enemy_occ = self.board.get_occupied(1 - color)
-        occupied = own_occ | enemy_occ
+        not_own = ~self.board.get_occupied(color) & 0xFFFFFFFFFFFFFFFF
+        pinned = info.pinned[color]
+        for sq, piece_type, attacks in info.piece_attacks[color]:
+            # Quân bị ghim chỉ đi được dọc đường ghim
+            if (pinned >> sq) & 1:
+                attacks &= int(PrecomputedMoveData.alignMask[sq][king_sq])
 
-        # Khởi tạo MoveGenerator để kiểm tra ghim
-        move_gen = MoveGenerator()
-        move_gen.board = self.board
-        move_gen.init_state()  # init_state tự thiết lập các thuộc tính cần thiết
-        move_gen.calculate_attack_data()
+            # Loại bỏ các ô bị quân mình chiếm
+            mobility = BitboardUtility.count_bits(attacks & not_own)
 
-        if move_gen.friendly_king_square < 0:
-            return 0  # An toàn nếu không tìm thấy vua
-
-        for piece_type in range(2, 6):  # Knight to Queen
-            pieces = self.board.get_piece_bitboard(color, piece_type)
-            for sq in BitboardUtility.iter_bits(pieces):
-                # Lấy các nước đi hợp lệ
-                if piece_type == 2:  # Knight
-                    attacks = BitboardUtility.KnightAttacks[sq]
-                elif piece_type == 3:  # Bishop
-                    attacks = get_bishop_attacks(sq, occupied)
-                elif piece_type == 4:  # Rook
-                    attacks = get_rook_attacks(sq, occupied)
-                elif piece_type == 5:  # Queen
-                    attacks = get_bishop_attacks(sq, occupied) | get_rook_attacks(sq, occupied)
-
-                # Kiểm tra ghim
-                if move_gen.is_pinned(sq):
-                    attacks &= PrecomputedMoveData.alignMask[sq][move_gen.friendly_king_square]
-
-                # Loại bỏ các ô bị quân mình chiếm
-                legal_moves = attacks & (~own_occ & 0xFFFFFFFFFFFFFFFF)
-                mobility = BitboardUtility.count_bits(legal_moves)
-
-                # Áp dụng trọng số, điều chỉnh theo giai đoạn trận đấu
-                weight = mobility_weights[piece_type] * (1 + endgameT * 0.2 if piece_type in [4, 5] else 1 - endgameT * 0.1)
-                total += mobility * weight
+            # Áp dụng trọng số, điều chỉnh theo giai đoạn trận đấu
+            weight = mobility_weights[piece_type] * (1 + endgameT * 0.2 if piece_type in [4, 5] else 1 - endgameT * 0.1)
+            total += mobility * weight
 
         return total
 
@@ -302,19 +440,11 @@ class Evaluation:
         expanded_weights = {1: 4, 2: 3, 3: 2, 4: 1.5, 5: 1.5}
 
         bonus = 0
-
-        # Khởi tạo MoveGenerator để kiểm tra ghim
-        move_gen = MoveGenerator()
-        move_gen.board = self.board
-        move_gen.init_state()
-        move_gen.calculate_attack_data()
+        pinned = self.attack_info.pinned[color]
 
         for piece_type in range(1, 6):  # Tốt, mã, tượng, xe, hậu
-            pieces = self.board.get_piece_bitboard(color, piece_type)
+            pieces = self.board.get_piece_bitboard(color, piece_type) & ~pinned
             for sq in BitboardUtility.iter_bits(pieces):
-                # Bỏ qua quân bị ghim
-                if move_gen.is_pinned(sq):
-                    continue
                 # Kiểm tra ô trung tâm
                 if (1 << sq) & center_squares:
                     bonus += center_weights[piece_type] * (1 - endgameT * 0.3)
@@ -332,30 +462,19 @@ class Evaluation:
         # Trọng số bảo vệ cho từng loại quân
         protection_weights = {1: 2, 2: 3, 3: 3, 4: 4, 5: 5}  # Tốt, mã, tượng, xe, hậu
 
-        # Lấy các quân của mình
-        own_occ = self.board.get_occupied(color)
-        enemy_occ = self.board.get_occupied(1 - color)
-
-        # Khởi tạo MoveGenerator để kiểm tra ghim
-        move_gen = MoveGenerator()
-        move_gen.board = self.board
-        move_gen.init_state()
-        move_gen.calculate_attack_data()
+        info = self.attack_info
+        board = self.board
+        # Chỉ xét ô được quân mình bảo vệ (không tính vua), bỏ qua quân bị ghim
+        defended = info.attacked_by[color] & ~info.pinned[color]
 
         # Duyệt qua từng loại quân trừ vua
         for pt in range(1, 6):  # Tốt (1) đến Hậu (5)
-            pieces = self.board.get_piece_bitboard(color, pt)
+            pieces = board.get_piece_bitboard(color, pt) & defended
             for sq in BitboardUtility.iter_bits(pieces):
-                # Bỏ qua quân bị ghim
-                if move_gen.is_pinned(sq):
-                    continue
-                # Lấy các quân bảo vệ (chỉ quân của mình)
-                attackers = self.board.attackers_to(sq, color) & own_occ
-                if attackers:
-                    num_protectors = BitboardUtility.count_bits(attackers)
-                    # Lấy các quân tấn công của đối phương
-                    enemy_attackers = self.board.attackers_to(sq, 1 - color) & enemy_occ
-                    num_enemy_attackers = BitboardUtility.count_bits(enemy_attackers)
+                num_protectors = info.attacker_count(sq, color, board)
+                if num_protectors:
+                    # Số quân tấn công của đối phương
+                    num_enemy_attackers = info.attacker_count(sq, 1 - color, board) if (info.attacked_by[1 - color] >> sq) & 1 else 0
                     # Tính điểm bảo vệ, trừ đi nếu bị tấn công nhiều hơn
                     protection_score = num_protectors - num_enemy_attackers
                     if protection_score > 0:
@@ -395,64 +514,26 @@ class Evaluation:
 
         bonus = 0
         enemy_color = 1 - color
+        info = self.attack_info
+        board = self.board
 
         # Trọng số theo loại quân bị đe dọa (pawn, knight, bishop, rook, queen)
         threat_weights = {1: 10, 2: 20, 3: 25, 4: 30, 5: 50}
+        scale = 1 + 0.5 * endgameT
 
-        own_occ = self.board.get_occupied(color)
-        enemy_occ = self.board.get_occupied(enemy_color)
-
-        move_gen = MoveGenerator()
-        move_gen.board = self.board
-        move_gen.init_state()
-        move_gen.calculate_attack_data()
-
-        # Duyệt từng loại quân (pawn đến queen)
-        for pt in range(1, 6):
-            pieces = self.board.get_piece_bitboard(color, pt)
-            for from_sq in BitboardUtility.iter_bits(pieces):
-                # Bỏ qua quân bị ghim
-                if move_gen.is_pinned(from_sq):
-                    continue
-
-                # Lấy các ô bị quân này đe dọa
-                if pt == 1:  # Pawn
-                    attacks = BitboardUtility.WhitePawnAttacks[from_sq] if color == 0 else BitboardUtility.BlackPawnAttacks[from_sq]
-                elif pt == 2:  # Knight
-                    attacks = BitboardUtility.KnightAttacks[from_sq]
-                elif pt == 3:  # Bishop
-                    attacks = get_bishop_attacks(from_sq, own_occ | enemy_occ)
-                elif pt == 4:  # Rook
-                    attacks = get_rook_attacks(from_sq, own_occ | enemy_occ)
-                elif pt == 5:  # Queen
-                    attacks = get_bishop_attacks(from_sq, own_occ | enemy_occ) | get_rook_attacks(from_sq, own_occ | enemy_occ)
-                else:
-                    continue
-
-                # Chỉ xét những ô đang có quân địch
-                attacks &= enemy_occ
-
-                for to_sq in BitboardUtility.iter_bits(attacks):
-                    enemy_piece = self.board.get_piece(to_sq)
-                    if enemy_piece is None or enemy_piece[0] != enemy_color:
-                        continue
-
-                    enemy_pt = self.board.get_piece_type(to_sq)
-                    if enemy_pt == 0:
-                        continue  # Không tính vua
-
-                    # Nếu quân bị tấn công không được bảo vệ → bonus
-                    defenders = self.board.attackers_to(to_sq, enemy_color) & enemy_occ
-                    if defenders == 0:
-                        threat_bonus = threat_weights.get(enemy_pt, 0)
-                        threat_bonus *= (1 + 0.5 * endgameT)
-                        bonus += threat_bonus
-
-        return bonus
-
-
-
-
+        # Quân địch (trừ vua) không được tốt/quân nào của địch bảo vệ
+        targets = board.get_occupied(enemy_color) & ~board.get_king(enemy_color) & ~info.attacked_by[enemy_color]
+        if not targets:
+            return 0
+        pinned = info.pinned[color]
 
+        # Mỗi cặp (quân mình không bị ghim, quân địch không được bảo vệ mà nó tấn công) được cộng một lần
+        attack_sets = [attacks for sq, _, attacks in info.piece_attacks[color] if not (pinned >> sq) & 1]
+        for sq in BitboardUtility.iter_bits(board.get_pawn_bitboard(color) & ~pinned):
+            attack_sets.append(BitboardUtility.pawn_attacks(1 << sq, color == 1))
 
+        for attacks in attack_sets:
+            for to_sq in BitboardUtility.iter_bits(attacks & targets):
+                bonus += threat_weights[board.get_piece_type(to_sq)] * scale
 
+        return bonus
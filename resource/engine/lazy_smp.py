@@ -0,0 +1,109 @@
+import multiprocessing
+import os
+import time
+from typing import Optional, Tuple
+from core.board_wrapper import BoardWrapper
+from core.move import decode_move, move_to_uci
+from engine.searcher import Search, SearchResult
+from engine.transposition_table import TranspositionTable
+from engine.time_manager import TimeManager
+from engine.logger import get_logger
+
+log = get_logger(__name__)
+
+# Search riêng của mỗi tiến trình phụ, giữ nguyên giữa các lần tìm kiếm (history, eval cache còn nóng)
+_worker_search = None
+
+def _init_worker(shared_name, tt_size_mb, eval_cache_mb, stop_event):
+    global _worker_search
+    table = TranspositionTable(tt_size_mb, shared_name=shared_name)
+    _worker_search = Search(eval_cache_mb=eval_cache_mb, transposition_table=table)
+    _worker_search.stop_event = stop_event
+
+def _run_worker(worker_id, board, generation, max_depth, time_limit, time_manager=None):
+    """
+    Chạy iterative_deepening trong tiến trình phụ; luồng lẻ bắt đầu sâu hơn một ply và xáo thứ tự nước.
+    time_manager (bản sao) chỉ gửi cho tiến trình 0, tiến trình này quyết định lúc dừng cho cả nhóm.
+    """
+    search = _worker_search
+    search.tt_generation = generation
+    start_depth = 1
+    if worker_id > 0:
+        search.move_ordering.perturb_history(worker_id)
+        start_depth = 1 + worker_id % 2
+    result = search.iterative_deepening(board, max_depth=max_depth, time_limit=time_limit, start_depth=start_depth,
+                                        time_manager=time_manager)
+    return worker_id, result
+
+class LazySMPSearch:
+    """
+    Lazy SMP: N tiến trình cùng tìm kiếm một thế cờ, chỉ chia sẻ bảng chuyển vị trong
+    shared memory (không khoá, xem TranspositionTable). Các tiến trình khác nhau ở độ sâu
+    bắt đầu và thứ tự nước nên lấp TT cho nhau; kết quả lấy từ tiến trình hoàn thành độ sâu
+    lớn nhất (ưu tiên tiến trình 0 khi bằng nhau).
+    Dùng thay Search ở nơi gọi search()/iterative_deepening(); gọi close() khi không dùng nữa.
+    """
+    def __init__(self, workers: Optional[int] = None, tt_size_mb: int = 64, eval_cache_mb: int = 4):
+        self.workers = max(1, workers or os.cpu_count() or 1)
+        self.transposition_table = TranspositionTable.create_shared(tt_size_mb)
+        context = multiprocessing.get_context()
+        self.stop_event = context.Event()
+        self.pool = context.Pool(self.workers, initializer=_init_worker,
+                                 initargs=(self.transposition_table.shared_name, tt_size_mb, eval_cache_mb, self.stop_event))
+        self.nodes = 0
+        self.last_result = None
+
+    def iterative_deepening(self, board: BoardWrapper, max_depth: int = 6, time_limit: float = 10.0,
+                            time_manager: Optional[TimeManager] = None) -> SearchResult:
+        start_ns = time.perf_counter_ns()
+        if time_manager is not None:
+            time_limit = time_manager.time_left()
+        self.transposition_table.new_search()
+        self.stop_event.clear()
+        board = board.copy()
+        pending = [self.pool.apply_async(_run_worker, (worker_id, board, self.transposition_table.generation,
+                                                       max_depth, time_limit, time_manager if worker_id == 0 else None))
+                   for worker_id in range(self.workers)]
+
+        # Tiến trình 0 xong thì báo các tiến trình còn lại dừng ngay (độ sâu đang dở bị bỏ)
+        results = [pending[0].get()]
+        self.stop_event.set()
+        results.extend(p.get() for p in pending[1:])
+
+        best = None
+        self.nodes = 0
+        for worker_id, result in results:
+            self.nodes += result.nodes
+            if result.move is None:
+                continue
+            if best is None or result.depth > best.depth:
+                best = result
+        best = best or SearchResult()
+
+        elapsed = (time.perf_counter_ns() - start_ns) / 1e9
+        combined = SearchResult(best.move, best.score, best.depth, self.nodes,
+                                int(self.nodes / elapsed) if elapsed > 0 else 0, best.pv)
+        log.debug("lazy smp: %d workers depth=%d move=%s nodes=%d nps=%d pv=%s", self.workers, combined.depth,
+                  combined.move and move_to_uci(combined.move), combined.nodes, combined.nps, combined.pv_uci())
+        return combined
+
+    def search(self, board: BoardWrapper, time_limit: float = 10.0, max_depth: int = 6,
+               time_manager: Optional[TimeManager] = None) -> Optional[Tuple]:
+        """Cùng giao diện với Search.search: trả về nước tốt nhất dạng tuple (from, to[, flag])."""
+        result = self.iterative_deepening(board, max_depth=max_depth, time_limit=time_limit, time_manager=time_manager)
+        self.last_result = result
+        log.info("search done: best_move=%s score=%s depth=%d nodes=%d nps=%d pv=%s",
+                 result.move and move_to_uci(result.move), result.score, result.depth, result.nodes, result.nps,
+                 result.pv_uci())
+        return decode_move(result.move)
+
+    def close(self):
+        self.pool.terminate()
+        self.pool.join()
+        self.transposition_table.close(unlink=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -0,0 +1,80 @@
+import json
+import logging
+import os
+import sys
+import time
+
+# Mức chi tiết hơn DEBUG, dành cho thông tin trong vòng lặp nóng (mỗi lần sinh nước, mỗi node)
+TRACE = 5
+logging.addLevelName(TRACE, "TRACE")
+
+LOG_FORMAT = "[%(levelname)s] %(name)s: %(message)s"
+ENV_VAR = "CHESS_LOG"
+
+_handler = None
+
+def get_logger(name):
+    """Logger theo module, ví dụ get_logger(__name__) -> 'engine.searcher'."""
+    return logging.getLogger(name)
+
+def _ensure_handler():
+    global _handler
+    if _handler is None:
+        _handler = logging.StreamHandler(sys.stderr)
+        _handler.setFormatter(logging.Formatter(LOG_FORMAT))
+        for package in ("core", "engine", "tool"):
+            logging.getLogger(package).addHandler(_handler)
+
+def set_level(level, module="engine"):
+    """
+    Đặt mức log cho một module hoặc package ('engine', 'core.move_generator', ...).
+    level nhận số hoặc tên ('DEBUG', 'TRACE', ...).
+    """
+    if isinstance(level, str):
+        level = logging.getLevelName(level.upper())
+    _ensure_handler()
+    logging.getLogger(module).setLevel(level)
+
+def configure_from_env(value=None):
+    """
+    Đọc cấu hình dạng 'engine=DEBUG,core.move_generator=TRACE' (mặc định từ biến môi trường CHESS_LOG).
+    Một mức không kèm tên module áp dụng cho cả 'core' và 'engine'.
+    """
+    value = os.environ.get(ENV_VAR, "") if value is None else value
+    for item in value.split(","):
+        item = item.strip()
+        if not item:
+            continue
+        if "=" in item:
+            module, level = item.split("=", 1)
+            set_level(level.strip(), module.strip())
+        else:
+            set_level(item, "core")
+            set_level(item, "engine")
+
+class SearchTrace:
+    """
+    Ghi trace có cấu trúc (mỗi dòng một JSON) của một lần tìm kiếm ra file.
+    Dùng như context manager: with SearchTrace("trace.jsonl") as trace: searcher.trace = trace
+    """
+    def __init__(self, path):
+        self.path = path
+        self.file = open(path, "a", encoding="utf-8")
+        self.start_time = time.perf_counter()
+
+    def write(self, event, **fields):
+        fields["event"] = event
+        fields["t"] = round(time.perf_counter() - self.start_time, 6)
+        self.file.write(json.dumps(fields, default=str) + "\n")
+
+    def close(self):
+        if not self.file.closed:
+            self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+configure_from_env()
@@ -1,13 +1,32 @@
+import random
 import numpy as np
-from collections import defaultdict
 from core.bitboard_utility import BitboardUtility
 from core.move_generator import MoveGenerator
+from core.piece import PAWN, KNIGHT, BISHOP, ROOK, QUEEN, KING, piece_type
+from core.magic_bitboards import get_rook_attacks, get_bishop_attacks
+from core.move import NULL_MOVE, FLAG_CASTLE, FLAG_EP, FLAG_PROMO_KNIGHT, FLAG_PROMO_QUEEN
+
+# Giá trị quân theo loại (core.piece): None, P, N, B, R, Q, K
+SEE_VALUES = [0, 100, 320, 330, 500, 950, 20000]
+ESTIMATE_VALUES = [0, 100, 320, 330, 500, 950, 0]
+
+MAX_PLY = 128
+KILLER_SLOTS = 2
+# Điểm history tiến dần về ±HISTORY_MAX (gravity) thay vì bị chặn cứng
+HISTORY_MAX = 16384
+HISTORY_BONUS_MAX = 1600
 
 class MoveOrdering:
     def __init__(self):
-        self.killer_moves = defaultdict(list)
-        self.history_heuristic = defaultdict(int)
-        self.counter_moves = defaultdict(lambda: defaultdict(int))
+        # Bảng phẳng cấp phát sẵn, đánh chỉ số trực tiếp (không băm tuple như dict):
+        # history[color][from][to]                  -> color << 12 | from << 6 | to
+        # killer_moves[ply][slot]                   -> ply * KILLER_SLOTS + slot
+        # counter_moves[piece][to]                  -> piece << 6 | to (quân vừa đi và ô đích của nó)
+        # continuation_history[prev piece][prev to][piece][to] -> (prev_piece << 6 | prev_to) << 10 | piece << 6 | to
+        self.history = [0] * (2 * 64 * 64)
+        self.killer_moves = [NULL_MOVE] * (MAX_PLY * KILLER_SLOTS)
+        self.counter_moves = [NULL_MOVE] * (16 * 64)
+        self.continuation_history = [0] * (16 * 64 * 16 * 64)
         self.board = None
         # Khởi tạo bảng MVV-LVA với giá trị Vua là 0
         self.mvv_lva = [[0 for _ in range(7)] for _ in range(7)]
@@ -17,16 +36,11 @@ class MoveOrdering:
                 self.mvv_lva[victim][attacker] = values[victim] * 10 - values[attacker]
 
     def get_piece_type(self, board, square):
-        piece = board.get_piece(square)
-        if not piece:
-            return 0
-        piece_map = {'P': 1, 'N': 2, 'B': 3, 'R': 4, 'Q': 5, 'K': 6,
-                     'p': 1, 'n': 2, 'b': 3, 'r': 4, 'q': 5, 'k': 6}
-        return piece_map.get(piece[1], 0)
+        return board.get_piece_type(square)
 
     def score_move(self, move, depth, pv_move=None, tt_move=None):
-        start, target = move[0], move[1]
-        promotion = move[2] if len(move) > 2 else None
+        start, target = move & 0x3F, (move >> 6) & 0x3F
+        flag = move >> 12
 
         if move == pv_move:
             return 10_000_000  # Ưu tiên tuyệt đối
@@ -37,8 +51,8 @@ class MoveOrdering:
 
         # Ưu tiên bắt quân: dùng MVV-LVA
         if self.board and self.board.is_capture(move):
-            attacker = self.get_piece_type(self.board, move[0])
-            victim = self.get_piece_type(self.board, move[1])
+            attacker = self.get_piece_type(self.board, start)
+            victim = self.get_piece_type(self.board, target)
             if victim > 0 and attacker > 0 and victim < 6:  # Bỏ qua Vua (6) trong MVV-LVA
                 score += self.mvv_lva[victim][attacker] + 500_000  # Bắt quân được ưu tiên cao
 
@@ -47,8 +61,8 @@ class MoveOrdering:
             score += 1_000_000  # Điểm cố định cho nước tạo check
 
         # Nếu phong hậu, cộng thêm điểm lớn
-        if promotion:
-            score += 8_000_000 + self.promotion_bonus(promotion)
+        if flag >= FLAG_PROMO_KNIGHT:
+            score += 8_000_000 + self.promotion_bonus(flag)
 
         score += self.estimate_move_value(self.board, move)
 
@@ -58,53 +72,137 @@ class MoveOrdering:
         if self.is_king_move(move):
             score -= 1_000_000
 
-        if move in self.killer_moves[depth]:
+        if move in self.killers(depth):
             score += 500_000
 
-        score += self.history_heuristic[(start, target)]
-        score += self.counter_moves[start][target] * 10
+        if self.board:
+            score += self.score_quiets(self.board, [move])[0][0]
+        if self.board and move == self.counter_move(self.board):
+            score += 50_000
 
         if depth >= 6:
-            piece = self.board.get_piece(move[0])
-            target = move[1]
-            if piece and piece[1] in ['N', 'B']:
+            ptype = self.board.get_piece_type(start)
+            if ptype in (KNIGHT, BISHOP):
                 if target in [16, 18, 20, 22, 40, 42, 44, 46]:
                     score += 300
-            if piece and piece[1] == 'P':
+            if ptype == PAWN:
                 if target in [27, 28, 35, 36]:
                     score += 200
 
         return score
 
-    def promotion_bonus(self, promo):
-        return {'q': 400, 'r': 300, 'b': 200, 'n': 100}.get(promo, 0)
-
-    def add_killer(self, depth, move):
-        if not self.board.is_capture(move):
-            if move not in self.killer_moves[depth]:
-                self.killer_moves[depth].insert(0, move)
-                if len(self.killer_moves[depth]) > 2:
-                    self.killer_moves[depth].pop()
+    def promotion_bonus(self, flag):
+        # Theo mã cờ phong cấp (core.move): mã, tượng, xe, hậu
+        return (100, 200, 300, 400)[flag - FLAG_PROMO_KNIGHT] if flag >= FLAG_PROMO_KNIGHT else 0
+
+    def new_search(self):
+        """Gọi khi bắt đầu tìm kiếm mới: giảm một nửa history (aging), xoá killer của lần trước."""
+        self.history = [h // 2 for h in self.history]
+        self.killer_moves = [NULL_MOVE] * (MAX_PLY * KILLER_SLOTS)
+
+    def perturb_history(self, seed, amount=64):
+        """Cộng nhiễu nhỏ vào history để các luồng Lazy SMP duyệt nước theo thứ tự hơi khác nhau."""
+        rng = random.Random(seed)
+        self.history = [h + rng.randrange(amount) for h in self.history]
+
+    def add_killer(self, ply, move):
+        if ply >= MAX_PLY or self.board.is_capture(move):
+            return
+        index = ply * KILLER_SLOTS
+        if self.killer_moves[index] != move:
+            self.killer_moves[index + 1] = self.killer_moves[index]
+            self.killer_moves[index] = move
+
+    def killers(self, ply):
+        if ply >= MAX_PLY:
+            return []
+        index = ply * KILLER_SLOTS
+        return self.killer_moves[index:index + KILLER_SLOTS]
+
+    def _continuation_base(self, board):
+        """Chỉ số gốc của continuation history theo nước vừa đi trên board, -1 nếu không có."""
+        last_to = (board.last_move >> 6) & 0x3F
+        piece = board.squares[last_to]
+        if not board.last_move or not piece:
+            return -1
+        return ((piece << 6) | last_to) << 10
+
+    def _apply_bonus(self, board, move, bonus, color, cont_base):
+        # Gravity: điểm càng gần ±HISTORY_MAX thì thay đổi càng ít, không bao giờ bão hoà
+        index = (color << 12) | (move & 0xFFF)
+        value = self.history[index]
+        self.history[index] = value + bonus - value * abs(bonus) // HISTORY_MAX
+        if cont_base >= 0:
+            index = cont_base | (board.squares[move & 0x3F] << 6) | ((move >> 6) & 0x3F)
+            value = self.continuation_history[index]
+            self.continuation_history[index] = value + bonus - value * abs(bonus) // HISTORY_MAX
 
     def add_history(self, move, depth):
-        key = (move[0], move[1])
-        self.history_heuristic[key] = min(self.history_heuristic[key] + depth * depth, 2_000_000)
+        board = self.board
+        color = 0 if board.turn == 'w' else 1
+        self._apply_bonus(board, move, min(depth * depth * 16, HISTORY_BONUS_MAX), color, self._continuation_base(board))
 
     def update_killers_and_history(self, move, depth, is_cutoff):
         if is_cutoff and not self.board.is_capture(move):
             self.add_killer(depth, move)
         self.add_history(move, depth)
 
+    def update_quiet_stats(self, board, move, depth, ply, quiets_tried):
+        """
+        Nước yên tĩnh move gây cắt beta: lưu killer/counter move, thưởng history cho move
+        và phạt các nước yên tĩnh đã thử trước nó ở nút này.
+        """
+        self.board = board
+        self.add_killer(ply, move)
+        self.add_counter_move(board.last_move, move)
+        bonus = min(depth * depth * 16, HISTORY_BONUS_MAX)
+        color = 0 if board.turn == 'w' else 1
+        cont_base = self._continuation_base(board)
+        self._apply_bonus(board, move, bonus, color, cont_base)
+        for quiet in quiets_tried:
+            self._apply_bonus(board, quiet, -bonus, color, cont_base)
+
+    def score_quiets(self, board, moves):
+        """Danh sách (history + continuation history, nước) cho các nước yên tĩnh của bên tới lượt."""
+        color_base = (0 if board.turn == 'w' else 1) << 12
+        history = self.history
+        continuation = self.continuation_history
+        cont_base = self._continuation_base(board)
+        squares = board.squares
+        scored = []
+        for move in moves:
+            score = history[color_base | (move & 0xFFF)]
+            if cont_base >= 0:
+                score += continuation[cont_base | (squares[move & 0x3F] << 6) | ((move >> 6) & 0x3F)]
+            scored.append((score, move))
+        return scored
+
     def add_counter_move(self, last_move, current_move):
-        if last_move and len(last_move) >= 2 and len(current_move) >= 2:
-            last_piece = self.board.get_piece(last_move[1])
-            current_piece = self.board.get_piece(current_move[0])
-            if last_piece and current_piece:
-                if abs(last_move[1] - current_move[0]) <= 2:
-                    from_sq = last_move[1]
-                    to_sq = current_move[1]
-                    self.counter_moves[from_sq][to_sq] += 1
-                    self.counter_moves[from_sq][to_sq] = min(self.counter_moves[from_sq][to_sq], 500)
+        """Gọi khi board đã về thế cờ trước current_move: quân ở ô đích của last_move là quân vừa đi."""
+        if last_move:
+            last_to = (last_move >> 6) & 0x3F
+            last_piece = self.board.get_piece(last_to)
+            if last_piece:
+                self.counter_moves[(last_piece << 6) | last_to] = current_move
+
+    def counter_move(self, board):
+        """Nước đáp trả đã lưu cho nước cuối cùng trên board, hoặc NULL_MOVE."""
+        if not board.last_move:
+            return NULL_MOVE
+        last_to = (board.last_move >> 6) & 0x3F
+        return self.counter_moves[(board.get_piece(last_to) << 6) | last_to]
+
+    def capture_score(self, board, move):
+        """Điểm MVV-LVA cho nước bắt quân/phong hậu (SEE được kiểm tra riêng khi chọn nước)."""
+        attacker = board.get_piece_type(move & 0x3F)
+        victim = board.get_piece_type((move >> 6) & 0x3F)
+        flag = move >> 12
+        if flag == FLAG_EP:
+            victim = PAWN
+        score = self.mvv_lva[victim][attacker] if 0 < victim < 6 else 0
+        if flag == FLAG_PROMO_QUEEN:
+            score += 8_000
+        return score
 
     def order_moves(self, moves, depth, board=None, pv_move=None, tt_move=None):
         if not moves:
@@ -125,7 +223,7 @@ class MoveOrdering:
                 captures.append(move)
             elif board.move_gives_check(move):
                 checks.append(move)
-            elif len(move) > 2 and move[2] == 'castle':
+            elif move >> 12 == FLAG_CASTLE:
                 castling.append(move)
             else:
                 quiet.append(move)
@@ -133,18 +231,19 @@ class MoveOrdering:
         # Sử dụng MVV-LVA và SEE để sắp xếp captures
         scored_captures = []
         for m in captures:
-            see_score = self.see(board, m[1], m[0])
-            attacker = self.get_piece_type(board, m[0])
-            victim = self.get_piece_type(board, m[1])
+            from_sq, to_sq = m & 0x3F, (m >> 6) & 0x3F
+            see_score = self.see(board, to_sq, from_sq)
+            attacker = self.get_piece_type(board, from_sq)
+            victim = self.get_piece_type(board, to_sq)
             mvv_lva_score = self.mvv_lva[victim][attacker] if victim > 0 and attacker > 0 and victim < 6 else 0
             final_score = mvv_lva_score + see_score * 100  # Kết hợp MVV-LVA và SEE
             scored_captures.append((final_score, m))
         scored_captures.sort(reverse=True)
 
-        scored_checks = [(1000 if board.get_piece(m[0])[1] == 'N' else 500, m) for m in checks]
+        scored_checks = [(1000 if board.get_piece_type(m & 0x3F) == KNIGHT else 500, m) for m in checks]
         scored_checks.sort(reverse=True)
 
-        scored_quiet = [(self.history_heuristic[(m[0], m[1])], m) for m in quiet]
+        scored_quiet = self.score_quiets(board, quiet)
         scored_quiet.sort(reverse=True)
 
         ordered_moves = []
@@ -160,15 +259,10 @@ class MoveOrdering:
         return ordered_moves
 
     def estimate_move_value(self, board, move):
-        from_sq, to_sq = move[0], move[1]
+        from_sq, to_sq = move & 0x3F, (move >> 6) & 0x3F
         attacker = board.get_piece(from_sq)
         victim = board.get_piece(to_sq)
 
-        piece_values = {
-            'P': 100, 'N': 320, 'B': 330, 'R': 500, 'Q': 950, 'K': 0,
-            'p': 100, 'n': 320, 'b': 330, 'r': 500, 'q': 950, 'k': 0,
-        }
-
         if not victim:
             enemy_king_sq = board.king_square(1 if board.turn == 'w' else 0)
             if enemy_king_sq != -1:
@@ -176,14 +270,15 @@ class MoveOrdering:
                 return max(0, 50 - distance * 5)
             return 0
 
-        victim_value = piece_values.get(victim[1], 0)
-        attacker_value = piece_values.get(attacker[1], 1) if attacker else 1
+        victim_value = ESTIMATE_VALUES[piece_type(victim)]
+        attacker_value = ESTIMATE_VALUES[piece_type(attacker)] if attacker else 1
 
         bonus = 0
-        if len(move) > 2 and move[2] == 'ep':
+        flag = move >> 12
+        if flag == FLAG_EP:
             bonus += 100
-        elif len(move) > 2 and move[2] in ['q', 'r', 'b', 'n']:
-            bonus += 200 if move[2] == 'q' else 100
+        elif flag >= FLAG_PROMO_KNIGHT:
+            bonus += 200 if flag == FLAG_PROMO_QUEEN else 100
 
         base_score = victim_value * 10 - attacker_value + bonus
         see_score = self.see(board, to_sq, from_sq)
@@ -204,9 +299,7 @@ class MoveOrdering:
         if not in_check:
             return False
 
-        from_sq = move[0]
-        piece = self.board.get_piece(from_sq)
-        if piece and piece[1] == 'K':
+        if self.board.get_piece_type(move & 0x3F) == KING:
             return True
 
         return self.board.does_move_block_check(move)
@@ -214,22 +307,106 @@ class MoveOrdering:
     def is_king_move(self, move):
         if not self.board:
             return False
-        piece = self.board.get_piece(move[0])
-        return piece and piece[1] == 'K'
-
-    def see(self, board, to_sq, from_sq, depth_limit=5):
-        # Simplified SEE to prevent recursion loops
-        piece = board.get_piece(from_sq)
-        if not piece:
+        return self.board.get_piece_type(move & 0x3F) == KING
+
+    def _see_setup(self, board, to_sq, from_sq):
+        """Giá trị quân bị bắt và bitboard ô bị chiếm ban đầu (bắt tốt qua đường: bỏ con tốt bị bắt)."""
+        occupied = board.get_all_occupied()
+        victim = board.get_piece_type(to_sq)
+        if not victim and board.get_piece_type(from_sq) == PAWN and to_sq == board.en_passant_square and (from_sq ^ to_sq) & 7:
+            victim = PAWN
+            occupied ^= 1 << ((from_sq & ~7) | (to_sq & 7))
+        return SEE_VALUES[victim], occupied
+
+    def _least_valuable_attacker(self, board, attackers, color):
+        """(ô, loại quân) của quân giá trị thấp nhất bên color trong attackers, hoặc (-1, 0)."""
+        base = color << 3
+        for ptype in (PAWN, KNIGHT, BISHOP, ROOK, QUEEN, KING):
+            subset = attackers & board.bitboards[base | ptype]
+            if subset:
+                return (subset & -subset).bit_length() - 1, ptype
+        return -1, 0
+
+    def _xray_attackers(self, board, to_sq, occupied):
+        """Quân trượt (cả hai bên) tấn công to_sq sau khi occupied đã bỏ bớt quân."""
+        diag = board.get_sliders(0, ortho=False) | board.get_sliders(1, ortho=False)
+        ortho = board.get_sliders(0, ortho=True) | board.get_sliders(1, ortho=True)
+        return ((get_bishop_attacks(to_sq, occupied) & diag) | (get_rook_attacks(to_sq, occupied) & ortho)) & occupied
+
+    def see(self, board, to_sq, from_sq):
+        """
+        Static exchange evaluation: lợi/thiệt vật chất của chuỗi bắt quân tại to_sq bắt đầu bằng
+        quân ở from_sq, hai bên luôn bắt bằng quân rẻ nhất và được dừng khi bắt tiếp bị lỗ.
+        Dùng danh sách swap; khi một quân rời ô, quân trượt đứng sau nó (x-ray) được thêm vào.
+        """
+        attacker = board.get_piece_type(from_sq)
+        if not attacker:
             return 0
 
-        value = {
-            'P': 100, 'N': 320, 'B': 330, 'R': 500, 'Q': 950, 'K': 20000,
-            'p': 100, 'n': 320, 'b': 330, 'r': 500, 'q': 950, 'k': 20000,
-        }
-
-        attacker_value = value.get(piece[1], 0)
-        target_piece = board.get_piece(to_sq)
-        victim_value = value.get(target_piece[1], 0) if target_piece else 0
+        gain = [0] * 32
+        gain[0], occupied = self._see_setup(board, to_sq, from_sq)
+        attackers = board.attackers_to(to_sq, 0, occupied) | board.attackers_to(to_sq, 1, occupied)
+        color = board.get_piece(from_sq) >> 3
+        depth = 0
+
+        while True:
+            occupied ^= 1 << from_sq
+            if attacker in (PAWN, BISHOP, ROOK, QUEEN):
+                attackers |= self._xray_attackers(board, to_sq, occupied)
+            attackers &= occupied
+            color ^= 1
+            from_sq, next_attacker = self._least_valuable_attacker(board, attackers, color)
+            if from_sq == -1:
+                break
+            # gain[depth]: điểm của bên color nếu bắt lại quân attacker rồi dừng
+            depth += 1
+            gain[depth] = SEE_VALUES[attacker] - gain[depth - 1]
+            attacker = next_attacker
+
+        # Mỗi bên chọn giữa dừng lại (-gain[depth - 1]) và bắt tiếp (gain[depth])
+        while depth:
+            gain[depth - 1] = -max(-gain[depth - 1], gain[depth])
+            depth -= 1
+        return gain[0]
+
+    def see_ge(self, board, move, threshold=0):
+        """True nếu SEE của nước bắt quân move >= threshold; dừng sớm ngay khi biết kết quả."""
+        from_sq, to_sq = move & 0x3F, (move >> 6) & 0x3F
+        attacker = board.get_piece_type(from_sq)
+        if not attacker:
+            return threshold <= 0
+
+        victim_value, occupied = self._see_setup(board, to_sq, from_sq)
+        swap = victim_value - threshold
+        if swap < 0:
+            return False
+        swap = SEE_VALUES[attacker] - swap
+        if swap <= 0:
+            return True
 
-        return victim_value - attacker_value
\ No newline at end of file
+        occupied &= ~((1 << from_sq) | (1 << to_sq))
+        attackers = board.attackers_to(to_sq, 0, occupied) | board.attackers_to(to_sq, 1, occupied)
+        color = board.get_piece(from_sq) >> 3
+        result = True
+
+        while True:
+            color ^= 1
+            attackers &= occupied
+            own_attackers = attackers & board.get_occupied(color)
+            if not own_attackers:
+                break
+            result = not result
+
+            square, ptype = self._least_valuable_attacker(board, own_attackers, color)
+            if ptype == KING:
+                # Vua chỉ bắt được khi đối phương không còn quân tấn công ô này
+                return result if not (attackers & ~board.get_occupied(color)) else not result
+
+            swap = SEE_VALUES[ptype] - swap
+            if swap < result:
+                break
+            occupied ^= 1 << square
+            if ptype in (PAWN, BISHOP, ROOK, QUEEN):
+                attackers |= self._xray_attackers(board, to_sq, occupied)
+
+        return result
@@ -0,0 +1,124 @@
+from core.move import NULL_MOVE, FLAG_EP, FLAG_PROMO_KNIGHT, FLAG_PROMO_QUEEN
+
+class MovePicker:
+    """
+    Chọn nước cho alpha_beta theo từng giai đoạn, chỉ sinh và chấm điểm giai đoạn sau khi
+    giai đoạn trước đã hết (phần lớn nút cắt tỉa ở một hai nước đầu nên không phải sinh nước yên tĩnh):
+    nước PV/TT -> bắt quân lời -> killer -> counter move -> nước yên tĩnh theo history (kể cả continuation history) -> bắt quân lỗ.
+    Trong mỗi giai đoạn, nước được lấy lần lượt bằng cách chọn điểm lớn nhất thay vì sắp xếp cả danh sách.
+    Nước trả về là pseudo-legal; nơi gọi kiểm tra tính hợp lệ sau make_move.
+    """
+    HASH, CAPTURES_INIT, GOOD_CAPTURES, KILLERS, COUNTER, QUIETS_INIT, QUIETS, BAD_CAPTURES, DONE = range(9)
+
+    def __init__(self, board, move_generator, move_ordering, ply, tt_move=None, pv_move=None):
+        self.board = board
+        self.move_generator = move_generator
+        self.move_ordering = move_ordering
+        self.ply = ply
+        # add_killer/add_counter_move đọc quân trên bàn qua move_ordering.board
+        move_ordering.board = board
+        self.stage = MovePicker.HASH
+        # Nước PV/TT có thể đến từ thế cờ khác (va chạm khoá, killer của nút anh em) nên phải kiểm tra
+        self.hash_moves = []
+        for move in (pv_move, tt_move):
+            if move and move not in self.hash_moves and move_generator.is_pseudo_legal(board, move):
+                self.hash_moves.append(move)
+        # Các nước đã trả về ở giai đoạn trước, bỏ qua khi sinh lại ở giai đoạn sau
+        self.returned = list(self.hash_moves)
+        self.captures = []
+        self.bad_captures = []
+        self.killers = []
+        self.quiets = []
+
+    def next_move(self):
+        """Nước tiếp theo (số nguyên, core.move), hoặc NULL_MOVE khi hết nước."""
+        board = self.board
+        while True:
+            stage = self.stage
+            if stage == MovePicker.HASH:
+                if self.hash_moves:
+                    return self.hash_moves.pop(0)
+                self.stage = MovePicker.CAPTURES_INIT
+
+            elif stage == MovePicker.CAPTURES_INIT:
+                moves = self.move_generator.generate_moves(board, captures_only=True, legal=False)
+                capture_score = self.move_ordering.capture_score
+                self.captures = [(capture_score(board, m), m) for m in moves if m not in self.returned]
+                self.stage = MovePicker.GOOD_CAPTURES
+
+            elif stage == MovePicker.GOOD_CAPTURES:
+                while self.captures:
+                    move = self._pop_best(self.captures)
+                    # Bắt quân lỗ theo SEE để dành tới cuối
+                    if board.is_capture(move) and not self.move_ordering.see_ge(board, move, 0):
+                        self.bad_captures.append(move)
+                        continue
+                    return move
+                self.killers = list(self.move_ordering.killers(self.ply))
+                self.stage = MovePicker.KILLERS
+
+            elif stage == MovePicker.KILLERS:
+                while self.killers:
+                    move = self.killers.pop(0)
+                    if move and self._is_new_quiet(move):
+                        self.returned.append(move)
+                        return move
+                self.stage = MovePicker.COUNTER
+
+            elif stage == MovePicker.COUNTER:
+                self.stage = MovePicker.QUIETS_INIT
+                move = self.move_ordering.counter_move(board)
+                if move and self._is_new_quiet(move):
+                    self.returned.append(move)
+                    return move
+
+            elif stage == MovePicker.QUIETS_INIT:
+                moves = self.move_generator.generate_moves(board, legal=False)
+                self.quiets = self.move_ordering.score_quiets(
+                    board, [m for m in moves if not self._is_noisy(m) and m not in self.returned])
+                self.stage = MovePicker.QUIETS
+
+            elif stage == MovePicker.QUIETS:
+                if self.quiets:
+                    return self._pop_best(self.quiets)
+                self.stage = MovePicker.BAD_CAPTURES
+
+            elif stage == MovePicker.BAD_CAPTURES:
+                if self.bad_captures:
+                    return self.bad_captures.pop(0)
+                self.stage = MovePicker.DONE
+
+            else:
+                return NULL_MOVE
+
+    def is_losing_capture(self, move):
+        """True nếu move (nước vừa lấy từ next_move) là nước bắt quân lỗ theo SEE."""
+        if self.stage == MovePicker.BAD_CAPTURES:
+            return True
+        if self.stage == MovePicker.HASH:
+            return self.board.is_capture(move) and not self.move_ordering.see_ge(self.board, move, 0)
+        return False
+
+    def _pop_best(self, scored):
+        best = 0
+        for i in range(1, len(scored)):
+            if scored[i][0] > scored[best][0]:
+                best = i
+        move = scored[best][1]
+        scored[best] = scored[-1]
+        scored.pop()
+        return move
+
+    def _is_noisy(self, move):
+        """Nước thuộc giai đoạn bắt quân (đúng tập generate_moves(captures_only=True))."""
+        flag = move >> 12
+        if FLAG_PROMO_KNIGHT <= flag < FLAG_PROMO_QUEEN:
+            return False
+        return flag == FLAG_EP or flag == FLAG_PROMO_QUEEN or self.board.is_capture(move)
+
+    def is_quiet(self, move):
+        return not self._is_noisy(move)
+
+    def _is_new_quiet(self, move):
+        return (move not in self.returned and not self._is_noisy(move)
+                and self.move_generator.is_pseudo_legal(self.board, move))
@@ -1,5 +1,8 @@
 import random
 import math
+from engine.logger import get_logger
+
+log = get_logger(__name__)
 
 class BookMove:
     def __init__(self, move_string, num_times_played):
@@ -17,11 +20,10 @@ class OpeningBook:
             try:
                 with open(file_path, 'r') as f:
                     content = f.read()
-                    print("Content of Book.txt:\n", content)  # Debug nội dung file
                     self.load_from_string(content)
-                print("Successfully loaded opening book with", len(self.moves_by_position), "positions")  # Debug số lượng vị trí
+                log.info("Loaded opening book with %d positions", len(self.moves_by_position))
             except Exception as e:
-                print(f"Failed to load opening book from {file_path}: {e}")
+                log.warning("Failed to load opening book from %s: %s", file_path, e)
 
     def load_from_string(self, content):
         entries = [e.strip() for e in content.strip().split("pos")[1:] if e.strip()]
@@ -40,32 +42,26 @@ class OpeningBook:
 
     def try_get_book_move(self, board, color, turn, castling_rights, last_move, weight_pow=0.5):
         position_fen = self.get_current_fen(board, turn, castling_rights, last_move)
-        print(f"\n[Opening Book] Current position FEN: {position_fen}")
-    
         fen_key = self.remove_move_counters_from_fen(position_fen)
-        print(f"[Opening Book] Lookup key: {fen_key}")
+        log.debug("lookup key: %s", fen_key)
     
         if fen_key in self.moves_by_position:
             moves = self.moves_by_position[fen_key]
-            print(f"[Opening Book] Found {len(moves)} book moves for this position")
-        
-            for i, move in enumerate(moves[:5]):
-                print(f"  {i+1}. {move.move_string} (played {move.num_times_played} times)")
-            
+            log.debug("found %d book moves", len(moves))
+
             total_play_count = sum(m.num_times_played ** weight_pow for m in moves)
             weights = [(m.num_times_played ** weight_pow) / total_play_count for m in moves]
         
             selected_move = random.choices(moves, weights=weights, k=1)[0]
-            print(f"[Opening Book] Selected move: {selected_move.move_string}")
         
             move_coords = self.algebraic_to_coords(selected_move.move_string, board, color)
             if move_coords:
-                print(f"[Opening Book] Converted to coordinates: {move_coords}")
+                log.debug("selected %s -> %s", selected_move.move_string, move_coords)
                 return move_coords
             else:
-                print("[Opening Book] Failed to convert move to coordinates")
+                log.debug("failed to convert %s to coordinates", selected_move.move_string)
         else:
-            print("[Opening Book] No book moves found for this position")
+            log.debug("no book moves for this position")
     
         return None
 
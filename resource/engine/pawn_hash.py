@@ -0,0 +1,51 @@
+ENTRY_BYTES = 64  # ước lượng cho một PawnEntry
+
+class PawnEntry:
+    """
+    Các thành phần đánh giá chỉ phụ thuộc cấu trúc tốt, chỉ số [0] = trắng, [1] = đen.
+    isolated/passed là tổng chưa nhân endgameT. Điểm che chắn vua còn phụ thuộc ô vua
+    nên được lưu kèm ô vua đã dùng để tính (-2 = chưa tính).
+    """
+    __slots__ = ('key', 'isolated', 'passed', 'shield', 'shield_king')
+
+    def __init__(self, key):
+        self.key = key
+        self.isolated = [0, 0]
+        self.passed = [0, 0]
+        self.shield = [0, 0]
+        self.shield_king = [-2, -2]
+
+class PawnHashTable:
+    """Bảng băm cấu trúc tốt theo board.pawn_key, kích thước cố định, entry mới luôn ghi đè."""
+    def __init__(self, size_mb=1):
+        entries = max(1, (size_mb * 1024 * 1024) // ENTRY_BYTES)
+        entries = 1 << (entries.bit_length() - 1)
+        self.size_mb = size_mb
+        self.mask = entries - 1
+        self.entries = [None] * entries
+        self.hits = 0
+        self.misses = 0
+
+    def probe(self, pawn_key):
+        """Trả về PawnEntry khớp khoá hoặc None."""
+        entry = self.entries[pawn_key & self.mask]
+        if entry is not None and entry.key == pawn_key:
+            self.hits += 1
+            return entry
+        self.misses += 1
+        return None
+
+    def store(self, entry):
+        self.entries[entry.key & self.mask] = entry
+
+    def clear(self):
+        self.entries = [None] * len(self.entries)
+        self.reset_stats()
+
+    def reset_stats(self):
+        self.hits = 0
+        self.misses = 0
+
+    def hit_rate(self):
+        probes = self.hits + self.misses
+        return self.hits / probes if probes else 0.0
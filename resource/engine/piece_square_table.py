@@ -1,109 +1,19 @@
-# Piece-square tables for evaluation
+# Piece-square tables for evaluation (bảng và giá trị quân nằm trong core.piece_tables để BoardWrapper dùng)
+from core.piece_tables import (Pawns, PawnsEnd, Rooks, Knights, Bishops, Queens, KingStart, KingEnd,
+                               PAWN_VALUE, KNIGHT_VALUE, BISHOP_VALUE, ROOK_VALUE, QUEEN_VALUE,
+                               PieceValues, PhaseWeights, ENDGAME_START_WEIGHT, MiddlegameTables, EndgameTables,
+                               PieceSquareMiddlegame, PieceSquareEndgame, mirror_square)
 
-Pawns = [
-     0,  0,  0,  0,  0,  0,  0,  0,
-    50, 50, 50, 50, 50, 50, 50, 50,
-    10, 10, 20, 30, 30, 20, 10, 10,
-     5,  5, 10, 25, 25, 10,  5,  5,
-     0,  0,  0, 20, 20,  0,  0,  0,
-     5, -5,-10,  0,  0,-10, -5,  5,
-     5, 10, 10,-20,-20, 10, 10,  5,
-     0,  0,  0,  0,  0,  0,  0,  0
-]
-
-PawnsEnd = [
-     0,  0,  0,  0,  0,  0,  0,  0,
-    80, 80, 80, 80, 80, 80, 80, 80,
-    50, 50, 50, 50, 50, 50, 50, 50,
-    30, 30, 30, 30, 30, 30, 30, 30,
-    20, 20, 20, 20, 20, 20, 20, 20,
-    10, 10, 10, 10, 10, 10, 10, 10,
-    10, 10, 10, 10, 10, 10, 10, 10,
-     0,  0,  0,  0,  0,  0,  0,  0
-]
-
-Rooks = [
-     0,  0,  0,  0,  0,  0,  0,  0,
-     5, 10, 10, 10, 10, 10, 10,  5,
-    -5,  0,  0,  0,  0,  0,  0, -5,
-    -5,  0,  0,  0,  0,  0,  0, -5,
-    -5,  0,  0,  0,  0,  0,  0, -5,
-    -5,  0,  0,  0,  0,  0,  0, -5,
-    -5,  0,  0,  0,  0,  0,  0, -5,
-     0,  0,  0,  5,  5,  0,  0,  0
-]
-
-Knights = [
-   -50,-40,-30,-30,-30,-30,-40,-50,
-   -40,-20,  0,  0,  0,  0,-20,-40,
-   -30,  0, 10, 15, 15, 10,  0,-30,
-   -30,  5, 15, 20, 20, 15,  5,-30,
-   -30,  0, 15, 20, 20, 15,  0,-30,
-   -30,  5, 10, 15, 15, 10,  5,-30,
-   -40,-20,  0,  5,  5,  0,-20,-40,
-   -50,-40,-30,-30,-30,-30,-40,-50
-]
-
-Bishops = [
-   -20,-10,-10,-10,-10,-10,-10,-20,
-   -10,  0,  0,  0,  0,  0,  0,-10,
-   -10,  0,  5, 10, 10,  5,  0,-10,
-   -10,  5,  5, 10, 10,  5,  5,-10,
-   -10,  0, 10, 10, 10, 10,  0,-10,
-   -10, 10, 10, 10, 10, 10, 10,-10,
-   -10,  5,  0,  0,  0,  0,  5,-10,
-   -20,-10,-10,-10,-10,-10,-10,-20
-]
-
-Queens = [
-   -20,-10,-10, -5, -5,-10,-10,-20,
-   -10,  0,  0,  0,  0,  0,  0,-10,
-   -10,  0,  5,  5,  5,  5,  0,-10,
-    -5,  0,  5,  5,  5,  5,  0, -5,
-     0,  0,  5,  5,  5,  5,  0, -5,
-   -10,  5,  5,  5,  5,  5,  0,-10,
-   -10,  0,  5,  0,  0,  0,  0,-10,
-   -20,-10,-10, -5, -5,-10,-10,-20
-]
-
-KingStart = [
-   -80, -70, -70, -70, -70, -70, -70, -80,
-   -60, -60, -60, -60, -60, -60, -60, -60,
-   -40, -50, -50, -60, -60, -50, -50, -40,
-   -30, -40, -40, -50, -50, -40, -40, -30,
-   -20, -30, -30, -40, -40, -30, -30, -20,
-   -10, -20, -20, -20, -20, -20, -20, -10,
-    20,  20,  -5,  -5,  -5,  -5,  20,  20,
-    20,  30,  10,   0,   0,  10,  30,  20
-]
-
-KingEnd = [
-   -20, -10, -10, -10, -10, -10, -10, -20,
-    -5,   0,   5,   5,   5,   5,   0,  -5,
-   -10,  -5,  20,  30,  30,  20,  -5, -10,
-   -15, -10,  35,  45,  45,  35, -10, -15,
-   -20, -15,  30,  40,  40,  30, -15, -20,
-   -25, -20,  20,  25,  25,  20, -20, -25,
-   -30, -25,   0,   0,   0,   0, -25, -30,
-   -50, -30, -30, -30, -30, -30, -30, -50
-]
+# Bảng cho PieceSquareTable.read: 1..5 = tốt..hậu, 6/7 = vua trung cuộc/tàn cuộc
+_ReadTables = [[0] * 64, Pawns, Knights, Bishops, Rooks, Queens, KingStart, KingEnd]
 
 class PieceSquareTable:
-    KingStart = 5
-    KingEnd = 6
+    KingStart = 6
+    KingEnd = 7
 
     @staticmethod
     def read(piece_type, square, is_white):
-        table_map = {
-            1: Pawns,
-            2: Knights,
-            3: Bishops,
-            4: Rooks,
-            5: Queens,
-            6: KingStart,
-            7: KingEnd
-        }
-        table = table_map.get(piece_type, [0]*64)
+        table = _ReadTables[piece_type] if 0 < piece_type < 8 else _ReadTables[0]
         if not is_white:
-            square = 56 + (square % 8) - 8 * (square // 8)
-        return table[square]
\ No newline at end of file
+            square = mirror_square(square)
+        return table[square]
@@ -0,0 +1,105 @@
+import multiprocessing
+from typing import Optional
+from core.board_wrapper import BoardWrapper
+from core.move import move_to_uci
+from engine.move_odering import MAX_PLY
+from engine.searcher import Search, SearchResult
+from engine.time_manager import TimeManager
+from engine.transposition_table import TranspositionTable
+from engine.logger import get_logger
+
+log = get_logger(__name__)
+
+# Tìm kiếm ponder không tự dừng theo giờ, chỉ dừng khi bị báo (ponder hit/miss)
+PONDER_TIME_LIMIT = 3600.0
+
+def _ponder_loop(conn, shared_name, tt_size_mb, eval_cache_mb, stop_event):
+    """Tiến trình ponder: nhận (state, generation) qua pipe, tìm kiếm tới khi bị dừng rồi gửi SearchResult về."""
+    table = TranspositionTable(tt_size_mb, shared_name=shared_name)
+    search = Search(eval_cache_mb=eval_cache_mb, transposition_table=table)
+    search.stop_event = stop_event
+    try:
+        while True:
+            job = conn.recv()
+            if job is None:
+                break
+            state, generation = job
+            search.tt_generation = generation
+            board = BoardWrapper.from_state(state)
+            conn.send(search.iterative_deepening(board, max_depth=MAX_PLY // 2, time_limit=PONDER_TIME_LIMIT))
+    finally:
+        table.close()
+
+class Ponderer:
+    """
+    Tìm kiếm trong thời gian của đối thủ: sau khi bot đi, một tiến trình nền tìm thế cờ sau nước đáp
+    dự đoán (nước thứ hai của PV) trên bảng chuyển vị dùng chung (shared memory) với Search chính.
+    Đến lượt bot:
+      - ponder hit (thế cờ đúng như dự đoán): tìm kiếm nền trở thành tìm kiếm thật, chạy tiếp tới giới
+        hạn mềm của TimeManager rồi lấy kết quả;
+      - ponder miss: dừng và bỏ kết quả, Search chính tìm lại nhưng TT đã được lấp sẵn.
+    transposition_table phải nằm trong shared memory (TranspositionTable.create_shared).
+    """
+    def __init__(self, transposition_table: TranspositionTable, eval_cache_mb: int = 4):
+        self.transposition_table = transposition_table
+        context = multiprocessing.get_context()
+        self.stop_event = context.Event()
+        self.conn, child_conn = context.Pipe()
+        self.process = context.Process(target=_ponder_loop, daemon=True,
+                                       args=(child_conn, transposition_table.shared_name,
+                                             transposition_table.size_mb, eval_cache_mb, self.stop_event))
+        self.process.start()
+        child_conn.close()
+        self.ponder_key = None  # zobrist_key của thế cờ đang ponder, None nếu không ponder
+
+    @property
+    def pondering(self):
+        return self.ponder_key is not None
+
+    def start(self, board: BoardWrapper):
+        """Bắt đầu ponder thế cờ board (đã đi nước của bot và nước đáp dự đoán)."""
+        self.stop()
+        self.stop_event.clear()
+        self.conn.send((board.to_state(), self.transposition_table.generation))
+        self.ponder_key = board.zobrist_key
+        log.debug("ponder start: key=%016x", board.zobrist_key)
+
+    def stop(self) -> Optional[SearchResult]:
+        """Dừng ponder (nếu đang chạy) và trả về kết quả đã có."""
+        if self.ponder_key is None:
+            return None
+        self.stop_event.set()
+        result = self.conn.recv()
+        self.stop_event.clear()
+        self.ponder_key = None
+        return result
+
+    def is_hit(self, board: BoardWrapper) -> bool:
+        return self.ponder_key is not None and board.zobrist_key == self.ponder_key
+
+    def ponder_hit(self, time_manager: Optional[TimeManager] = None, time_limit: float = 10.0) -> Optional[SearchResult]:
+        """
+        Thế cờ đúng như dự đoán: cho tìm kiếm nền chạy tiếp tới giới hạn mềm (hoặc time_limit) tính từ
+        lúc đến lượt bot, rồi lấy kết quả. Trả về None nếu tìm kiếm nền chưa xong được độ sâu nào.
+        """
+        budget = time_limit
+        if time_manager is not None:
+            budget = max(time_manager.soft_limit - time_manager.elapsed(), 0.0)
+        if self.conn.poll(budget):
+            # Tìm kiếm nền đã tự kết thúc (đủ độ sâu tối đa hoặc tìm thấy chiếu hết)
+            result = self.conn.recv()
+            self.ponder_key = None
+        else:
+            result = self.stop()
+        if result is None or result.move is None:
+            return None
+        log.debug("ponder hit: move=%s depth=%d score=%s nodes=%d pv=%s", move_to_uci(result.move), result.depth,
+                  result.score, result.nodes, result.pv_uci())
+        return result
+
+    def close(self):
+        if self.process.is_alive():
+            self.stop()
+            self.conn.send(None)
+            self.process.join(timeout=5)
+        self.conn.close()
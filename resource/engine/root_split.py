@@ -0,0 +1,163 @@
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed, wait
+from typing import Optional, Tuple
+from core.board_wrapper import BoardWrapper
+from engine.searcher import Search
+from engine.logger import get_logger
+
+log = get_logger(__name__)
+
+# Search riêng và alpha dùng chung của mỗi tiến trình phụ (gán trong _init_worker)
+_worker_search = None
+_shared_alpha = None
+_search_id = None
+
+def _init_worker(shared_alpha, stop_event, tt_size_mb, eval_cache_mb):
+    global _worker_search, _shared_alpha
+    _worker_search = Search(tt_size_mb=tt_size_mb, eval_cache_mb=eval_cache_mb)
+    _worker_search.stop_event = stop_event
+    _shared_alpha = shared_alpha
+
+def _search_root_move(state, move, depth, beta, deadline_ns, search_id):
+    """
+    Tìm một nước gốc ở độ sâu depth trong tiến trình phụ. alpha đọc từ giá trị dùng chung ngay trước khi
+    tìm (nước khác xong trước thì cửa sổ đã hẹp lại) và được cập nhật nếu nước này tốt hơn.
+    deadline_ns theo time.perf_counter_ns() của tiến trình chính (đồng hồ đơn điệu chung của hệ thống).
+    Trả về (move, score, pv sau nước gốc, số nút, đã hết giờ hay chưa).
+    """
+    global _search_id
+    search = _worker_search
+    if search_id != _search_id:
+        # Lần tìm kiếm mới ở gốc: làm già TT và history như đầu iterative_deepening
+        _search_id = search_id
+        search.transposition_table.new_search()
+        search.move_ordering.new_search()
+
+    # Nước đến lượt sau khi đã hết giờ hoặc gốc đã dừng: không tìm nữa
+    if deadline_ns <= time.perf_counter_ns() or search.stop_event.is_set():
+        return move, 0, [], 0, True
+
+    board = BoardWrapper.from_state(state)
+    search.nodes = 0
+    search.follow_pv = False
+    search.start_clock((deadline_ns - time.perf_counter_ns()) / 1e9)
+    search.repetition_table.reset()
+
+    alpha = _shared_alpha.value
+    board.make_move(move)
+    search.repetition_table.push(board.zobrist_key)
+    # Nước không phải nước đầu: cửa sổ rỗng trước, chỉ tìm lại với cửa sổ đầy đủ khi vượt alpha
+    score = -search.alpha_beta(board, depth - 1, -alpha - 1, -alpha, 1)[0]
+    if alpha < score < beta and not search.stop_search:
+        score = -search.alpha_beta(board, depth - 1, -beta, -alpha, 1)[0]
+
+    pv = []
+    if not search.stop_search and score > alpha:
+        pv = search.pv_table[1][1:search.pv_length[1]]
+        with _shared_alpha.get_lock():
+            if score > _shared_alpha.value:
+                _shared_alpha.value = int(score)
+    return move, int(score), pv, search.nodes, search.stop_search
+
+class RootSplit:
+    """
+    Chia các nước ở gốc cho một ProcessPoolExecutor: nước đầu (nước PV) được tìm ngay trong Search gọi
+    để có alpha, các nước còn lại gửi cho tiến trình phụ cùng alpha dùng chung (multiprocessing.Value)
+    được nâng lên mỗi khi có nước tốt hơn; kết quả được gộp lại sau mỗi độ sâu.
+    Mỗi tiến trình phụ có Search và TT riêng; bàn cờ được gửi bằng BoardWrapper.to_state().
+    Gắn vào Search bằng search.root_split = RootSplit(...); gọi close() khi không dùng nữa.
+    """
+    def __init__(self, workers: Optional[int] = None, tt_size_mb: int = 16, eval_cache_mb: int = 4):
+        self.workers = max(1, workers or os.cpu_count() or 1)
+        context = multiprocessing.get_context()
+        self.shared_alpha = context.Value('q', 0)
+        # Báo các tiến trình phụ bỏ nước đang tìm khi gốc đã cắt beta hoặc hết giờ
+        self.stop_event = context.Event()
+        self.executor = ProcessPoolExecutor(self.workers, mp_context=context, initializer=_init_worker,
+                                            initargs=(self.shared_alpha, self.stop_event, tt_size_mb, eval_cache_mb))
+        self.search_id = 0
+        # Điểm của từng nước gốc ở độ sâu trước, dùng để sắp thứ tự gửi đi ở độ sâu sau
+        self.root_scores = {}
+
+    def new_search(self):
+        self.search_id += 1
+        self.root_scores = {}
+
+    def search_root(self, search: Search, board: BoardWrapper, depth: int, alpha: int, beta: int) -> Tuple[int, Optional[int]]:
+        """Thay cho search.alpha_beta(board, depth, alpha, beta, 0); PV gốc được ghi vào search.pv_table[0]."""
+        search.nodes += 1
+        search.pv_length[0] = 0
+        moves = search.move_generator.generate_moves(board)
+        if not moves:
+            return search.alpha_beta(board, depth, alpha, beta, 0)
+
+        pv_move = search.previous_pv[0] if search.previous_pv else None
+        root_scores = self.root_scores
+        moves.sort(key=lambda m: (m == pv_move, root_scores.get(m, -float('inf'))), reverse=True)
+        if moves[0] != pv_move:
+            search.follow_pv = False
+
+        # Nước đầu tìm tại chỗ với cửa sổ đầy đủ (đi tiếp theo PV của vòng trước)
+        first = moves[0]
+        undo = board.make_move(first)
+        search.repetition_table.push(board.zobrist_key)
+        best_score = -search.alpha_beta(board, depth - 1, -beta, -alpha, 1)[0]
+        search.repetition_table.pop()
+        board.unmake_move(undo)
+        if search.stop_search:
+            return 0, None
+        best_move = first
+        root_scores[first] = best_score
+        search.update_pv(0, first)
+        if best_score > alpha:
+            alpha = best_score
+        if best_score >= beta or len(moves) == 1:
+            return best_score, best_move
+
+        self.shared_alpha.value = int(alpha)
+        state = board.to_state()
+        deadline_ns = search.deadline_ns
+        futures = [self.executor.submit(_search_root_move, state, move, depth, beta, deadline_ns, self.search_id)
+                   for move in moves[1:]]
+        for future in as_completed(futures):
+            move, score, pv, nodes, stopped = future.result()
+            search.nodes += nodes
+            if stopped or time.perf_counter_ns() >= deadline_ns:
+                # Hết giờ: độ sâu này bị bỏ, không để các nước còn trong hàng đợi bắt đầu
+                search.stop_search = True
+                break
+            root_scores[move] = score
+            if score > best_score:
+                best_score = score
+                best_move = move
+                if score > alpha:
+                    alpha = score
+                    root_pv = search.pv_table[0]
+                    root_pv[0] = move
+                    root_pv[1:len(pv) + 1] = pv
+                    search.pv_length[0] = len(pv) + 1
+            if score >= beta:
+                break
+
+        # Fail-high hoặc hết giờ: báo các nước đang chạy dừng, bỏ các nước chưa bắt đầu rồi đợi
+        self.stop_event.set()
+        for future in futures:
+            future.cancel()
+        wait(futures)
+        self.stop_event.clear()
+        if search.stop_search:
+            return 0, None
+        log.debug("root split depth %d: %d moves on %d workers, best=%s score=%s",
+                  depth, len(moves), self.workers, best_move, best_score)
+        return best_score, best_move
+
+    def close(self):
+        self.executor.shutdown(wait=True, cancel_futures=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -1,58 +1,141 @@
+import math
 import time
 from typing import List, Tuple, Optional
 from core.move_generator import MoveGenerator
 from core.board_wrapper import BoardWrapper
+from core.bitboard_utility import BitboardUtility
 from engine.evaluation import Evaluation
 from engine.repetition_table import RepetitionTable
-from engine.zobrist import ZobristHasher
-from engine.move_odering import MoveOrdering
+from engine.move_odering import MoveOrdering, MAX_PLY
+from engine.move_picker import MovePicker
+from core.move import decode_move, move_to_uci
+from engine.transposition_table import TranspositionTable, TTEntry
+from engine.time_manager import TimeManager
+from engine.logger import get_logger
+
+log = get_logger(__name__)
+
+# Kiểm tra đồng hồ và cờ dừng mỗi check_interval nút thay vì ở mọi nút.
+# Khoảng kiểm tra được chỉnh theo nps đo được để hai lần kiểm tra cách nhau khoảng CHECK_PERIOD_NS.
+CHECK_INTERVAL_NODES = 256
+MIN_CHECK_INTERVAL = 64
+MAX_CHECK_INTERVAL = 16384
+CHECK_PERIOD_NS = 5_000_000
+
+# Điểm chiếu hết ở ply p là -(MATE_SCORE - p); mọi điểm có trị tuyệt đối >= MATE_BOUND là điểm chiếu hết.
+# Trong TT điểm chiếu hết được lưu theo khoảng cách từ nút đang lưu (không phải từ gốc) để dùng lại được
+# ở ply khác và ở lần tìm kiếm sau.
+MATE_SCORE = 1000000
+MATE_BOUND = MATE_SCORE - MAX_PLY
+
+class SearchResult:
+    """Kết quả iterative_deepening: nước tốt nhất, điểm, độ sâu hoàn thành, số node, nps và PV (số nguyên, core.move)."""
+    __slots__ = ('move', 'score', 'depth', 'nodes', 'nps', 'pv')
+
+    def __init__(self, move=None, score=0, depth=0, nodes=0, nps=0, pv=None):
+        self.move = move
+        self.score = score
+        self.depth = depth
+        self.nodes = nodes
+        self.nps = nps
+        self.pv = pv or []
+
+    def pv_uci(self):
+        return " ".join(move_to_uci(move) for move in self.pv)
 
 class Search:
-    def __init__(self):
+    def __init__(self, tt_size_mb: int = 16, eval_cache_mb: int = 4, transposition_table: Optional[TranspositionTable] = None):
         self.move_generator = MoveGenerator()
-        self.evaluation = Evaluation()
+        self.evaluation = Evaluation(eval_cache_mb)
         self.repetition_table = RepetitionTable()
-        self.zobrist = ZobristHasher()
         self.move_ordering = MoveOrdering()
-        self.transposition_table = {}  # {zobrist_hash: {depth, score, flag, move}}
+        # Có thể dùng chung một bảng (ví dụ bảng trong shared memory của Lazy SMP)
+        self.transposition_table = transposition_table or TranspositionTable(tt_size_mb)
+        # Thế hệ TT do tiến trình chính đặt (Lazy SMP); None = tự tăng mỗi lần tìm kiếm
+        self.tt_generation = None
+        # Cờ dừng từ bên ngoài: threading.Event/multiprocessing.Event (is_set()) hoặc multiprocessing.Value
+        # (value khác 0), kiểm tra cùng đồng hồ mỗi check_interval nút và giữa các độ sâu
+        self.stop_event = None
         self.nodes = 0
         self.max_depth = 64
         self.time_limit = 10.0  # Default time limit in seconds
-        self.start_time = 0
         self.stop_search = False
+        # Số nút giữa hai lần kiểm tra đồng hồ; adaptive_check = True thì tự chỉnh theo nps
+        self.check_interval = CHECK_INTERVAL_NODES
+        self.adaptive_check = True
+        self.next_check = 0
+        self.start_ns = 0
+        self.deadline_ns = 0
         self.best_move = None
-
-    def store_transposition(self, zobrist_hash: int, depth: int, score: int, flag: str, move: Tuple):
+        self.last_result = None  # SearchResult của lần search() gần nhất (PV dùng cho ponder)
+        self.trace = None  # SearchTrace tuỳ chọn, ghi kết quả từng độ sâu ra file
+        # RootSplit tuỳ chọn (engine.root_split): chia các nước gốc cho nhiều tiến trình
+        self.root_split = None
+        # Quiescence đánh giá trước mọi nút con bằng Evaluation.evaluate_batch (kết quả vào EvalCache)
+        self.batch_eval = False
+        # Bảng PV tam giác: pv_table[ply][ply:pv_length[ply]] là biến chính tìm được từ nút ở ply
+        self.pv_table = [[0] * MAX_PLY for _ in range(MAX_PLY)]
+        self.pv_length = [0] * MAX_PLY
+        # PV của vòng lặp trước, dùng làm nước đầu tiên ở mọi ply khi còn đi đúng theo nó
+        self.previous_pv = []
+        self.follow_pv = False
+
+    def store_transposition(self, zobrist_hash: int, depth: int, score: int, flag: int, move: int, ply: int = 0):
         """Store position in transposition table."""
-        self.transposition_table[zobrist_hash] = {
-            'depth': depth,
-            'score': score,
-            'flag': flag,  # 'exact', 'lower', 'upper'
-            'move': move
-        }
-
-    def probe_transposition(self, zobrist_hash: int, depth: int, alpha: int, beta: int) -> Tuple[Optional[int], Optional[Tuple]]:
-        """Probe transposition table for a stored position."""
-        entry = self.transposition_table.get(zobrist_hash)
-        if entry and entry['depth'] >= depth:
-            score = entry['score']
-            if entry['flag'] == 'exact':
-                return score, entry['move']
-            elif entry['flag'] == 'lower' and score >= beta:
-                return beta, entry['move']
-            elif entry['flag'] == 'upper' and score <= alpha:
-                return alpha, entry['move']
-        return None, None
+        # TT lưu điểm dạng số nguyên đóng gói: -inf/+inf ở đây là lỗi của tìm kiếm, không được cắt im lặng
+        assert math.isfinite(score), score
+        score = int(score)
+        if score >= MATE_BOUND:
+            score += ply
+        elif score <= -MATE_BOUND:
+            score -= ply
+        self.transposition_table.store(zobrist_hash, depth, score, flag, move)
+
+    def probe_transposition(self, zobrist_hash: int, depth: int, alpha: int, beta: int,
+                            ply: int = 0) -> Tuple[Optional[int], Optional[int]]:
+        """Probe transposition table for a stored position. The move is returned for ordering even without a cutoff."""
+        entry = self.transposition_table.probe(zobrist_hash)
+        if entry is None:
+            return None, None
+        move, score, entry_depth, flag = entry
+        # Điểm chiếu hết trong TT tính từ nút đã lưu: đổi lại thành khoảng cách từ gốc của lần tìm kiếm này
+        if score >= MATE_BOUND:
+            score -= ply
+        elif score <= -MATE_BOUND:
+            score += ply
+        if entry_depth >= depth:
+            if flag == TTEntry.EXACT:
+                return score, move
+            elif flag == TTEntry.LOWERBOUND and score >= beta:
+                return beta, move
+            elif flag == TTEntry.UPPERBOUND and score <= alpha:
+                return alpha, move
+        return None, move
+
+    def prefetch_child_evals(self, board: BoardWrapper, moves: List[int]) -> None:
+        """Đi thử từng nước hợp lệ, đánh giá các vị trí con cùng lúc để stand-pat của chúng trúng EvalCache."""
+        children = []
+        for move in moves:
+            undo = board.make_move(move)
+            if self.move_generator.is_legal_after_move(board):
+                children.append(board.copy())
+            board.unmake_move(undo)
+        if len(children) > 1:
+            self.evaluation.evaluate_batch(children)
 
     def quiescence_search(self, board: BoardWrapper, alpha: int, beta: int, depth: int = 6) -> int:
         self.nodes += 1
 
-        # Giới hạn thời gian và độ sâu
-        if time.time() - self.start_time > self.time_limit or self.stop_search or depth <= 0:
-            self.stop_search = True
-            return self.evaluation.evaluate(board)
+        # Lazy evaluation: có thể chỉ trả về một cận nằm ngoài cửa sổ (đủ cho stand-pat cắt tỉa)
+        stand_pat = self.evaluation.evaluate(board, alpha, beta)
+
+        # Giới hạn thời gian
+        if self.stop_search or (self.nodes >= self.next_check and self.check_stop()):
+            return stand_pat
+        # Giới hạn độ sâu quiescence: chỉ dừng nhánh này, không dừng cả lần tìm kiếm
+        if depth <= 0:
+            return stand_pat
 
-        stand_pat = self.evaluation.evaluate(board)
         if stand_pat >= beta:
             return beta
         if alpha < stand_pat:
@@ -63,16 +146,22 @@ class Search:
         if stand_pat + futility_margin < alpha:
             return alpha
 
-        moves = self.move_generator.generate_moves(board, captures_only=True)
+        moves = self.move_generator.generate_moves(board, captures_only=True, legal=False)
         moves = self.move_ordering.order_moves(moves, 0, board=board)
+        if self.batch_eval and depth > 1:
+            self.prefetch_child_evals(board, [m for m in moves if self.move_ordering.see_ge(board, m, 0)])
 
         for move in moves:
             # Bỏ qua nước ăn lỗ theo SEE
-            if self.move_ordering.see(board, move[1], move[0]) < 0:
+            if not self.move_ordering.see_ge(board, move, 0):
                 continue
 
-            new_board = board.make_copy_and_apply(move)
-            score = -self.quiescence_search(new_board, -beta, -alpha, depth - 1)
+            undo = board.make_move(move)
+            if not self.move_generator.is_legal_after_move(board):
+                board.unmake_move(undo)
+                continue
+            score = -self.quiescence_search(board, -beta, -alpha, depth - 1)
+            board.unmake_move(undo)
 
             if self.stop_search:
                 return 0
@@ -83,16 +172,16 @@ class Search:
 
         return alpha
 
-    def alpha_beta(self, board: BoardWrapper, depth: int, alpha: int, beta: int, ply: int, pv_move: Optional[Tuple] = None) -> Tuple[int, Optional[Tuple]]:
+    def alpha_beta(self, board: BoardWrapper, depth: int, alpha: int, beta: int, ply: int) -> Tuple[int, Optional[int]]:
         self.nodes += 1
+        self.pv_length[ply] = ply
 
-        # Ngừng nếu hết thời gian
-        if self.stop_search or time.time() - self.start_time > self.time_limit:
-            self.stop_search = True
+        # Ngừng nếu hết thời gian hoặc có yêu cầu dừng
+        if self.stop_search or (self.nodes >= self.next_check and self.check_stop()):
             return 0, None
 
         # Kiểm tra lặp lại
-        zobrist_hash = self.zobrist.hash(board)
+        zobrist_hash = board.zobrist_key
         if self.repetition_table.is_repetition(zobrist_hash):
             return 0, None
 
@@ -102,66 +191,93 @@ class Search:
         if depth <= 0:
             return self.quiescence_search(board, alpha, beta), None
 
-        # Null Move Pruning
-        if not in_check and depth >= 3:
-            piece_count = sum(
-                1 for sq in range(64)
-                if board.get_piece(sq) and board.get_piece(sq)[1] not in ['K', 'k']
-            )
+        # Nút nằm trên PV của vòng trước: đi nước PV trước
+        pv_move = None
+        if self.follow_pv:
+            if ply < len(self.previous_pv):
+                pv_move = self.previous_pv[ply]
+            else:
+                self.follow_pv = False
+
+        # Null Move Pruning (không dùng khi đang đi theo PV)
+        if not in_check and depth >= 3 and not self.follow_pv:
+            piece_count = BitboardUtility.count_bits(board.get_all_occupied() ^ board.get_king(0) ^ board.get_king(1))
             if piece_count > 4:
-                null_board = board.make_copy_and_apply(("null", "null"))
-                null_board.turn = 'b' if board.turn == 'w' else 'w'
+                undo = board.make_null_move()
                 R = 2 if depth < 5 else 3
-                null_score = -self.alpha_beta(null_board, depth - R, -beta, -beta + 1, ply + 1)[0]
+                null_score = -self.alpha_beta(board, depth - R, -beta, -beta + 1, ply + 1)[0]
+                board.unmake_null_move(undo)
+                if self.stop_search:
+                    return 0, None
                 if null_score >= beta:
                     return beta, None
 
         # Tra bảng lặp lại
-        tt_score, tt_move = self.probe_transposition(zobrist_hash, depth, alpha, beta)
-        if tt_score is not None:
+        tt_score, tt_move = self.probe_transposition(zobrist_hash, depth, alpha, beta, ply)
+        if tt_score is not None and ply > 0:
             return tt_score, tt_move
 
-        # Sinh nước đi
-        moves = self.move_generator.generate_moves(board)
-        if not moves:
-            if in_check:
-                return -1000000 + ply, None
-            return 0, None
-
-        # Move Ordering
-        moves = self.move_ordering.order_moves(moves, ply, board=board, pv_move=pv_move, tt_move=tt_move)
+        # Chọn nước theo giai đoạn (pseudo-legal); tính hợp lệ được kiểm tra khi đi từng nước
+        picker = MovePicker(board, self.move_generator, self.move_ordering, ply, tt_move=tt_move, pv_move=pv_move)
 
         best_score = -float('inf')
         best_move = None
-        flag = 'upper'
-        last_move = board.last_move
-
-        for i, move in enumerate(moves):
-            # Skip nếu capture xấu theo SEE
-            if board.is_capture(move) and self.move_ordering.see(board, move[1], move[0]) < 0:
+        flag = TTEntry.UPPERBOUND
+        check_info = board.check_info()
+        legal_moves = 0  # số nước hợp lệ, kể cả nước bị bỏ qua theo SEE (để nhận biết chiếu hết/hết nước)
+        searched = 0
+        quiets_tried = []  # nước yên tĩnh đã tìm mà không cắt, bị phạt history khi có nước cắt beta
+        skipped = []  # capture lỗ hợp lệ đã bỏ qua theo SEE
+        searching_skipped = False
+
+        while True:
+            move = picker.next_move()
+            if not move:
+                # Mọi nước hợp lệ đều là capture lỗ: phải tìm chúng, không thì nút trả về -inf
+                if searched and not searching_skipped or not skipped:
+                    break
+                searching_skipped = True
+                move = skipped.pop(0)
+            # Capture xấu theo SEE sẽ bị bỏ qua (trừ khi đang bị chiếu), nhưng vẫn phải biết nó có hợp lệ không
+            is_capture = board.is_capture(move)
+            bad_capture = (is_capture and not in_check and not searching_skipped
+                           and picker.is_losing_capture(move))
+
+            # Điều kiện LMR phải xét trước khi đi nước
+            reduced_depth = depth - 1
+            if (
+                not bad_capture and searched >= 3 and depth >= 3 and not in_check and not is_capture
+                and not check_info.gives_check(board, move)
+            ):
+                reduced_depth = depth - 2
+
+            # Chỉ nước PV đầu tiên mới đi tiếp theo PV của vòng trước
+            if move != pv_move:
+                self.follow_pv = False
+
+            undo = board.make_move(move)
+            if not self.move_generator.is_legal_after_move(board):
+                board.unmake_move(undo)
                 continue
-
-            new_board = board.make_copy_and_apply(move)
-            new_hash = self.zobrist.hash(new_board)
-            self.repetition_table.push(new_hash)
+            legal_moves += 1
+            if bad_capture:
+                board.unmake_move(undo)
+                skipped.append(move)
+                continue
+            self.repetition_table.push(board.zobrist_key)
 
             # PVS và LMR
-            if i == 0:
-                score, _ = self.alpha_beta(new_board, depth - 1, -beta, -alpha, ply + 1)
+            if searched == 0:
+                score, _ = self.alpha_beta(board, depth - 1, -beta, -alpha, ply + 1)
             else:
-                reduced_depth = depth - 1
-                if (
-                    depth >= 3 and not in_check and not board.is_capture(move)
-                    and not board.move_gives_check(move) and i >= 3
-                ):
-                    reduced_depth = depth - 2
-
-                score, _ = self.alpha_beta(new_board, reduced_depth, -alpha - 1, -alpha, ply + 1)
-                if alpha < score < beta:
-                    score, _ = self.alpha_beta(new_board, depth - 1, -beta, -alpha, ply + 1)
+                score, _ = self.alpha_beta(board, reduced_depth, -alpha - 1, -alpha, ply + 1)
+                if alpha < -score < beta:
+                    score, _ = self.alpha_beta(board, depth - 1, -beta, -alpha, ply + 1)
 
             score = -score
+            searched += 1
             self.repetition_table.pop()
+            board.unmake_move(undo)
 
             if self.stop_search:
                 return 0, None
@@ -172,79 +288,177 @@ class Search:
 
             if score > alpha:
                 alpha = score
-                flag = 'exact'
+                flag = TTEntry.EXACT
+                self.update_pv(ply, move)
 
             if score >= beta:
-                flag = 'lower'
-                self.move_ordering.add_killer(ply, move)
-                self.move_ordering.add_history(move, depth)
-                if last_move and isinstance(last_move, tuple) and isinstance(last_move[1], int):
-                    self.move_ordering.add_counter_move(last_move, move)
+                flag = TTEntry.LOWERBOUND
+                if picker.is_quiet(move):
+                    self.move_ordering.update_quiet_stats(board, move, depth, ply, quiets_tried)
                 break
 
-        self.store_transposition(zobrist_hash, depth, best_score, flag, best_move)
+            if picker.is_quiet(move):
+                quiets_tried.append(move)
+
+        if legal_moves == 0:
+            if in_check:
+                return -MATE_SCORE + ply, None
+            return 0, None
+
+        if best_move is not None:
+            self.store_transposition(zobrist_hash, depth, best_score, flag, best_move, ply)
         return best_score, best_move
 
-    def search(self, board: BoardWrapper, time_limit: float = 10.0, max_depth: int = 6) -> Optional[Tuple]:
-        """Khởi động tìm kiếm và trả về nước đi tốt nhất."""
-        print(f"[DEBUG] Bat dau search voi time_limit={time_limit}")
+    def start_clock(self, time_limit: float) -> None:
+        """Bắt đầu đếm giờ cho một lần tìm kiếm với time_limit giây."""
         self.time_limit = time_limit
-        best_move, score = self.iterative_deepening(board, max_depth=max_depth, time_limit=time_limit)
-        print(f"[DEBUG] Ket thuc search, best_move={best_move}, score={score}")
-        return best_move
+        self.start_ns = time.perf_counter_ns()
+        self.deadline_ns = self.start_ns + int(time_limit * 1e9)
+        self.stop_search = False
+        self.next_check = self.nodes + self.check_interval
 
-    def iterative_deepening(self, board: BoardWrapper, max_depth: int = 6, time_limit: Optional[float] = None) -> Tuple[Optional[Tuple], int]:
-        """Tìm kiếm lặp sâu dần với giới hạn độ sâu và thời gian, có Aspiration Windows và quản lý thời gian động."""
-        print(f"[DEBUG] Bat dau iterative_deepening voi max_depth={max_depth}, time_limit={time_limit}")
+    def elapsed(self) -> float:
+        """Số giây từ start_clock() (perf_counter_ns)."""
+        return (time.perf_counter_ns() - self.start_ns) / 1e9
+
+    def check_stop(self) -> bool:
+        """Kiểm tra đồng hồ và cờ dừng bên ngoài; đặt stop_search và trả về True nếu phải dừng."""
+        now = time.perf_counter_ns()
+        if now >= self.deadline_ns or self.stop_requested():
+            self.stop_search = True
+            return True
+        interval = self.check_interval
+        elapsed = now - self.start_ns
+        if self.adaptive_check and elapsed > 0 and self.nodes > 0:
+            interval = self.nodes * CHECK_PERIOD_NS // elapsed
+            interval = min(max(interval, MIN_CHECK_INTERVAL), MAX_CHECK_INTERVAL)
+            # Giữ khoảng đã đo cho lần start_clock sau (tiến trình phụ bắt đầu lại đồng hồ ở mỗi nước gốc)
+            self.check_interval = interval
+        self.next_check = self.nodes + interval
+        return False
+
+    def stop_requested(self) -> bool:
+        flag = self.stop_event
+        if flag is None:
+            return False
+        is_set = getattr(flag, 'is_set', None)
+        return is_set() if is_set is not None else bool(flag.value)
+
+    def stop(self) -> None:
+        """Dừng lần tìm kiếm đang chạy từ luồng khác (GUI); có hiệu lực ở lần kiểm tra kế tiếp."""
+        self.stop_search = True
+
+    def update_pv(self, ply: int, move: int) -> None:
+        """PV của nút ở ply = move + PV của nút con."""
+        pv = self.pv_table[ply]
+        pv[ply] = move
+        child_length = self.pv_length[ply + 1] if ply + 1 < MAX_PLY else ply + 1
+        pv[ply + 1:child_length] = self.pv_table[ply + 1][ply + 1:child_length]
+        self.pv_length[ply] = max(child_length, ply + 1)
+
+    def search_root(self, board: BoardWrapper, depth: int, alpha: int, beta: int) -> Tuple[int, Optional[int]]:
+        """Tìm ở gốc: qua root_split nếu có, nếu không thì alpha_beta trong tiến trình này."""
+        if self.root_split is not None:
+            return self.root_split.search_root(self, board, depth, alpha, beta)
+        return self.alpha_beta(board, depth, alpha, beta, 0)
+
+    def search(self, board: BoardWrapper, time_limit: float = 10.0, max_depth: int = 6,
+               time_manager: Optional[TimeManager] = None) -> Optional[Tuple]:
+        """Khởi động tìm kiếm và trả về nước đi tốt nhất dạng tuple (from, to[, flag]) cho GUI/bot."""
+        self.time_limit = time_limit
+        result = self.iterative_deepening(board, max_depth=max_depth, time_limit=time_limit, time_manager=time_manager)
+        self.last_result = result
+        log.info("search done: best_move=%s score=%s depth=%d nodes=%d nps=%d pv=%s",
+                 result.move and move_to_uci(result.move), result.score, result.depth, result.nodes, result.nps,
+                 result.pv_uci())
+        return decode_move(result.move)
+
+    def iterative_deepening(self, board: BoardWrapper, max_depth: int = 6, time_limit: Optional[float] = None,
+                            start_depth: int = 1, time_manager: Optional[TimeManager] = None) -> SearchResult:
+        """
+        Tìm kiếm lặp sâu dần với giới hạn độ sâu và thời gian, có Aspiration Windows.
+        Có time_manager (đã start()) thì giới hạn cứng của nó thay cho time_limit và nó quyết định
+        có bắt đầu vòng lặp tiếp theo hay không.
+        """
+        if time_manager is not None:
+            time_limit = time_manager.time_left()
+        log.debug("iterative_deepening: max_depth=%d time_limit=%s", max_depth, time_limit)
         self.nodes = 0
-        self.start_time = time.time()
-        self.stop_search = False
+        self.start_clock(self.time_limit if time_limit is None else time_limit)
         self.best_move = None
-        self.transposition_table.clear()
+        self.transposition_table.new_search(self.tt_generation)
+        self.move_ordering.new_search()
+        self.evaluation.cache.reset_stats()
+        self.evaluation.pawn_table.reset_stats()
         self.repetition_table.reset()
+        self.previous_pv = []
+        if self.root_split is not None:
+            self.root_split.new_search()
 
-        if time_limit is not None:
-            self.time_limit = time_limit
-
-        best_move = None
+        result = SearchResult()
         best_score = 0
-        pv_move = None
 
-        for depth in range(1, max_depth + 1):
-            # Dynamic Time Management: Ngắt nếu không còn đủ thời gian
-            elapsed = time.time() - self.start_time
-            remaining = self.time_limit - elapsed
-            if remaining < 0.2:
-                print(f"[DEBUG] Dung lai vi thoi gian con lai qua it ({remaining:.2f}s)")
-                self.stop_search = True
+        for depth in range(start_depth, max_depth + 1):
+            if self.stop_requested():
+                log.debug("stopping: stop event set")
                 break
 
-            print(f"[DEBUG] Tim kiem o do sau {depth}")
+            if time_manager is not None:
+                if depth > start_depth and time_manager.should_stop():
+                    log.debug("stopping: time manager (elapsed %.2fs, soft %.2fs, hard %.2fs)", time_manager.elapsed(),
+                              time_manager.scaled_soft_limit(), time_manager.hard_limit)
+                    break
+            else:
+                # Không có time manager: ngắt nếu không còn đủ thời gian
+                remaining = (self.deadline_ns - time.perf_counter_ns()) / 1e9
+                if remaining < 0.2:
+                    log.debug("stopping: only %.2fs left", remaining)
+                    self.stop_search = True
+                    break
 
             # Aspiration Window: Dùng khoảng alpha-beta hẹp trước
             aspiration_window = 100
             alpha = max(best_score - aspiration_window, -100000)
             beta = min(best_score + aspiration_window, 100000)
 
-            score, move = self.alpha_beta(board, depth, alpha, beta, 0, pv_move)
+            self.follow_pv = True
+            score, move = self.search_root(board, depth, alpha, beta)
 
             # Nếu fail-low hoặc fail-high thì dùng full window
             if score <= alpha or score >= beta:
-                print(f"[DEBUG] Fail aspiration window, mo rong cua so alpha-beta")
-                score, move = self.alpha_beta(board, depth, -100000, 100000, 0, pv_move)
+                if score <= alpha and time_manager is not None and not self.stop_search:
+                    time_manager.report_fail_low()
+                log.debug("depth %d: aspiration window [%s, %s] failed with %s, re-searching", depth, alpha, beta, score)
+                self.follow_pv = True
+                score, move = self.search_root(board, depth, -100000, 100000)
 
             if self.stop_search:
-                print(f"[DEBUG] Dung lai vi het thoi gian tai do sau {depth}")
+                log.debug("depth %d: stopped by time limit", depth)
                 break
 
             if move is None:
-                print(f"[DEBUG] Do sau {depth}: Khong tim thay nuoc di hoac bi dung")
+                log.debug("depth %d: no move found", depth)
                 break
 
             best_score = score
-            best_move = move
-            pv_move = move
-
-        return best_move, best_score
+            pv = self.pv_table[0][:self.pv_length[0]]
+            if not pv or pv[0] != move:
+                pv = [move]
+            self.previous_pv = pv
+            if time_manager is not None:
+                time_manager.update(depth, move, score, time_manager.elapsed())
+
+            elapsed = self.elapsed()
+            result = SearchResult(move, int(score), depth, self.nodes, int(self.nodes / elapsed) if elapsed > 0 else 0, pv)
+            eval_hit_rate = self.evaluation.cache.hit_rate()
+            log.debug("depth %d: move=%s score=%s nodes=%d nps=%d time=%.2fs pv=%s eval cache hits=%.1f%% pawn hash hits=%.1f%%",
+                      depth, move_to_uci(move), score, self.nodes, result.nps, elapsed, result.pv_uci(),
+                      eval_hit_rate * 100, self.evaluation.pawn_table.hit_rate() * 100)
+            if self.trace:
+                self.trace.write("iteration", depth=depth, move=move_to_uci(move), score=result.score, nodes=self.nodes,
+                                 elapsed=elapsed, nps=result.nps, pv=result.pv_uci(),
+                                 eval_cache_hit_rate=round(eval_hit_rate, 4))
+
+        return result
 
 
@@ -1,41 +1,132 @@
 import time
 
+# Số nước giả định còn lại khi không có moves-to-go (sudden death)
+DEFAULT_MOVES_TO_GO = 30
+MAX_MOVES_TO_GO = 50
+# Trừ hao độ trễ GUI/tiến trình mỗi nước (giây)
+MOVE_OVERHEAD = 0.05
+# Giới hạn cứng: tối đa HARD_FACTOR lần giới hạn mềm và tỉ lệ thời gian còn lại được phép dùng cho một nước
+HARD_FACTOR = 4.0
+MAX_USAGE = 0.5
+LAST_MOVE_USAGE = 0.9
+# Hệ số thời gian theo số vòng lặp liên tiếp giữ nguyên nước tốt nhất (0, 1, 2, 3, >=4)
+STABILITY_FACTORS = [1.25, 1.0, 0.85, 0.7, 0.55]
+# Điểm tụt ít nhất bấy nhiêu so với vòng trước thì coi là fail-low và kéo dài thời gian
+FAIL_LOW_MARGIN = 30
+FAIL_LOW_FACTOR = 1.5
+# Hệ số phân nhánh giả định khi chưa đủ hai vòng lặp để đo
+DEFAULT_BRANCHING = 3.0
+MIN_BRANCHING = 1.5
+MAX_BRANCHING = 8.0
+
 class TimeManager:
-    def __init__(self, total_time=300.0, increment=2.0):
-        self.total_time = total_time  # Tổng thời gian dành cho bot (giây)
+    """
+    Chia thời gian cho từng nước từ đồng hồ (thời gian còn lại, increment, số nước đến lần cộng giờ).
+    Mỗi nước có giới hạn mềm (không bắt đầu vòng lặp mới sau mốc này) và giới hạn cứng (dừng tìm kiếm
+    giữa chừng). Giới hạn mềm được nhân thêm khi fail-low hoặc nước tốt nhất thay đổi, giảm khi nước tốt
+    nhất giữ nguyên nhiều vòng; vòng lặp tiếp theo chỉ bắt đầu nếu dự đoán (theo hệ số phân nhánh đo được)
+    xong trước giới hạn cứng.
+
+    Cách dùng: start() đầu mỗi nước, Search.iterative_deepening gọi update()/report_fail_low()/should_stop(),
+    finish() sau khi đi để trừ thời gian đã dùng và cộng increment vào đồng hồ.
+    """
+    def __init__(self, total_time=300.0, increment=2.0, moves_to_go=None, move_overhead=MOVE_OVERHEAD):
+        self.remaining = total_time   # Thời gian còn lại trên đồng hồ của bot (giây)
         self.increment = increment    # Increment mỗi nước (giây)
-        self.start_time = None
-        self.moves_played = 0
-
-    def start_timer(self):
-        self.start_time = time.time()
-
-    def time_elapsed(self):
-        if self.start_time is None:
-            return 0
-        return time.time() - self.start_time
-
-    def remaining_time(self):
-        return self.total_time - self.time_elapsed()
-
-    def choose_depth(self, board_array, phase):
-        """
-        Quyết định depth tìm kiếm dựa vào phase (early, mid, late)
-        """
-        move_count = sum(1 for rank in board_array for p in rank if p != '')
-        
-        # Số quân còn lại đánh giá phase
-        if move_count > 24:
-            phase = 'opening'
-        elif move_count > 12:
-            phase = 'middlegame'
-        else:
-            phase = 'endgame'
+        self.moves_to_go = moves_to_go  # Số nước đến lần cộng giờ tiếp theo, None = sudden death
+        self.move_overhead = move_overhead
+        self.start_ns = None
+        self.soft_limit = 0.0
+        self.hard_limit = 0.0
+        self._reset_iterations()
+
+    def _reset_iterations(self):
+        self.iteration_times = []
+        self.best_move = None
+        self.best_score = None
+        self.stable_iterations = 0
+        self.best_move_changes = 0.0
+        self.failed_low = False
+
+    def set_clock(self, remaining, increment=None, moves_to_go=None):
+        """Cập nhật đồng hồ từ bên ngoài (GUI/giao thức), thay cho đồng hồ tự đếm trong finish()."""
+        self.remaining = remaining
+        if increment is not None:
+            self.increment = increment
+        self.moves_to_go = moves_to_go
+
+    def start(self):
+        """Bắt đầu một nước: tính giới hạn mềm/cứng từ đồng hồ hiện tại."""
+        self.start_ns = time.perf_counter_ns()
+        self._reset_iterations()
+        usable = max(self.remaining - self.move_overhead, 0.01)
+        moves_to_go = min(self.moves_to_go or DEFAULT_MOVES_TO_GO, MAX_MOVES_TO_GO)
+        soft = usable / moves_to_go + self.increment * 0.75
+        hard = usable * (LAST_MOVE_USAGE if moves_to_go == 1 else MAX_USAGE)
+        self.hard_limit = min(soft * HARD_FACTOR, hard)
+        self.soft_limit = min(soft, self.hard_limit)
+
+    def elapsed(self):
+        if self.start_ns is None:
+            return 0.0
+        return (time.perf_counter_ns() - self.start_ns) / 1e9
+
+    def time_left(self):
+        """Thời gian còn lại tới giới hạn cứng của nước đang tìm."""
+        return max(self.hard_limit - self.elapsed(), 0.0)
 
-        # Điều chỉnh độ sâu tùy theo phase và thời gian
-        if phase == 'opening':
-            return 3
-        elif phase == 'middlegame':
-            return 4 if self.remaining_time() > 30 else 3
+    def report_fail_low(self):
+        """Aspiration window fail-low ở gốc: nước đang giữ có thể tệ hơn ta tưởng."""
+        self.failed_low = True
+
+    def update(self, depth, move, score, elapsed):
+        """Ghi nhận một vòng lặp đã xong (elapsed: thời gian từ start() đến lúc xong vòng này)."""
+        previous = sum(self.iteration_times)
+        self.iteration_times.append(max(elapsed - previous, 0.0))
+
+        self.best_move_changes *= 0.5
+        if move == self.best_move:
+            self.stable_iterations += 1
         else:
-            return 5 if self.remaining_time() > 60 else 3
+            if self.best_move is not None:
+                self.best_move_changes += 1.0
+            self.stable_iterations = 0
+            self.best_move = move
+
+        if self.best_score is not None and score <= self.best_score - FAIL_LOW_MARGIN:
+            self.failed_low = True
+        self.best_score = score
+
+    def scaled_soft_limit(self):
+        stability = STABILITY_FACTORS[min(self.stable_iterations, len(STABILITY_FACTORS) - 1)]
+        instability = 1.0 + self.best_move_changes
+        fail_low = FAIL_LOW_FACTOR if self.failed_low else 1.0
+        return min(self.soft_limit * stability * instability * fail_low, self.hard_limit)
+
+    def predicted_next_iteration(self):
+        """Thời gian dự đoán của vòng lặp sau = vòng vừa xong * hệ số phân nhánh (tỉ lệ hai vòng gần nhất)."""
+        times = self.iteration_times
+        if not times:
+            return 0.0
+        branching = DEFAULT_BRANCHING
+        if len(times) >= 2 and times[-2] > 0.001:
+            branching = min(max(times[-1] / times[-2], MIN_BRANCHING), MAX_BRANCHING)
+        return times[-1] * branching
+
+    def should_stop(self):
+        """Có nên dừng trước khi bắt đầu vòng lặp tiếp theo không."""
+        elapsed = self.elapsed()
+        if elapsed >= self.scaled_soft_limit():
+            return True
+        # fail-low của vòng vừa xong đã được tính vào giới hạn mềm, vòng sau bắt đầu lại từ đầu
+        self.failed_low = False
+        return elapsed + self.predicted_next_iteration() > self.hard_limit
+
+    def finish(self):
+        """Kết thúc nước: trừ thời gian đã dùng, cộng increment. Trả về thời gian đã dùng (giây)."""
+        used = self.elapsed()
+        self.remaining = max(self.remaining - used, 0.0) + self.increment
+        if self.moves_to_go:
+            self.moves_to_go -= 1
+        self.start_ns = None
+        return used
@@ -1,29 +1,127 @@
+import numpy as np
+from multiprocessing import shared_memory
+from core.move import NULL_MOVE
+
 class TTEntry:
     EXACT = 0
     LOWERBOUND = 1
     UPPERBOUND = 2
 
-    def __init__(self, zobrist_key, depth, score, flag, move):
-        self.zobrist_key = zobrist_key
-        self.depth = depth
-        self.score = score
-        self.flag = flag
-        self.move = move
+# Bố cục 64 bit của data: move (16) | score + SCORE_OFFSET (32) | depth (8) | bound (2) | age (6)
+SCORE_OFFSET = 1 << 31
+SCORE_SHIFT = 16
+DEPTH_SHIFT = 48
+BOUND_SHIFT = 56
+AGE_SHIFT = 58
+AGE_MASK = 0x3F
+
+ENTRY_BYTES = 16  # key (8) + data (8)
+BUCKET_SIZE = 2   # slot 0: ưu tiên độ sâu, slot 1: luôn thay thế
 
 class TranspositionTable:
-    def __init__(self):
-        self.table = {}
+    """
+    Bảng chuyển vị kích thước cố định (MB), lưu trong hai mảng uint64 (key, data).
+    Mỗi bucket gồm một slot ưu tiên độ sâu và một slot luôn thay thế; bộ đếm
+    generation cho phép giữ lại entry giữa các nước/ván mà bộ nhớ không tăng.
 
-    def store(self, zobrist_key, depth, score, flag, move):
-        if zobrist_key in self.table:
-            entry = self.table[zobrist_key]
-            if depth >= entry.depth:
-                self.table[zobrist_key] = TTEntry(zobrist_key, depth, score, flag, move)
+    Ô key lưu zobrist_key ^ data (lockless hashing): nhiều tiến trình cùng ghi vào bảng
+    trong shared memory không cần khoá, entry bị ghi dở (key và data của hai lần ghi khác
+    nhau) sẽ không khớp khoá khi probe và bị bỏ qua.
+    shared_name: gắn vào vùng shared memory đã tạo bằng create_shared (cùng size_mb).
+    """
+    def __init__(self, size_mb=16, shared_name=None):
+        num_buckets = max(1, (size_mb * 1024 * 1024) // (ENTRY_BYTES * BUCKET_SIZE))
+        # Làm tròn xuống lũy thừa của 2 để lấy chỉ số bằng phép AND
+        num_buckets = 1 << (num_buckets.bit_length() - 1)
+        self.size_mb = size_mb
+        self.num_buckets = num_buckets
+        self.bucket_mask = num_buckets - 1
+        self.generation = 0
+        slots = num_buckets * BUCKET_SIZE
+        self.shm = None
+        if shared_name is None:
+            self.keys = np.zeros(slots, dtype=np.uint64)
+            self.data = np.zeros(slots, dtype=np.uint64)
         else:
-            self.table[zobrist_key] = TTEntry(zobrist_key, depth, score, flag, move)
+            self.shm = shared_memory.SharedMemory(name=shared_name)
+            self.keys = np.ndarray((slots,), dtype=np.uint64, buffer=self.shm.buf)
+            self.data = np.ndarray((slots,), dtype=np.uint64, buffer=self.shm.buf, offset=slots * 8)
 
-    def probe(self, zobrist_key):
-        return self.table.get(zobrist_key, None)
+    @classmethod
+    def create_shared(cls, size_mb=16):
+        """Tạo bảng trong một vùng shared memory mới; tiến trình khác gắn vào bằng shared_name."""
+        num_buckets = max(1, (size_mb * 1024 * 1024) // (ENTRY_BYTES * BUCKET_SIZE))
+        num_buckets = 1 << (num_buckets.bit_length() - 1)
+        shm = shared_memory.SharedMemory(create=True, size=num_buckets * BUCKET_SIZE * ENTRY_BYTES)
+        shm.buf[:] = bytes(shm.size)
+        table = cls(size_mb, shared_name=shm.name)
+        shm.close()
+        return table
+
+    @property
+    def shared_name(self):
+        return self.shm.name if self.shm is not None else None
+
+    def close(self, unlink=False):
+        """Nhả vùng shared memory (unlink=True ở tiến trình đã tạo để giải phóng hẳn)."""
+        if self.shm is None:
+            return
+        # Mảng numpy phải bỏ tham chiếu tới buffer trước khi đóng
+        self.keys = self.data = None
+        self.shm.close()
+        if unlink:
+            self.shm.unlink()
+        self.shm = None
+
+    def new_search(self, generation=None):
+        """
+        Gọi khi bắt đầu một lần tìm kiếm mới: entry cũ bị coi là 'già' và dễ bị thay.
+        generation: đặt thế hệ cụ thể (tiến trình phụ dùng thế hệ của tiến trình chính).
+        """
+        if generation is None:
+            generation = self.generation + 1
+        self.generation = generation & AGE_MASK
 
     def clear(self):
-        self.table.clear()
+        self.keys.fill(0)
+        self.data.fill(0)
+        self.generation = 0
+
+    def store(self, zobrist_key, depth, score, flag, move):
+        index = (zobrist_key & self.bucket_mask) * BUCKET_SIZE
+        keys = self.keys
+
+        # Slot ưu tiên độ sâu: thay nếu cùng vị trí, entry đã cũ hoặc độ sâu mới không nhỏ hơn
+        old_data = int(self.data[index])
+        old_depth = (old_data >> DEPTH_SHIFT) & 0xFF
+        old_age = (old_data >> AGE_SHIFT) & AGE_MASK
+        if int(keys[index]) ^ old_data != zobrist_key and old_age == self.generation and depth < old_depth:
+            index += 1  # slot luôn thay thế
+
+        data = ((move or NULL_MOVE)
+                | ((score + SCORE_OFFSET) << SCORE_SHIFT)
+                | (max(0, min(depth, 0xFF)) << DEPTH_SHIFT)
+                | (flag << BOUND_SHIFT)
+                | (self.generation << AGE_SHIFT))
+        keys[index] = zobrist_key ^ data
+        self.data[index] = data
+
+    def probe(self, zobrist_key):
+        """Trả về (move, score, depth, flag) hoặc None nếu không có entry khớp; move là số nguyên hoặc None."""
+        index = (zobrist_key & self.bucket_mask) * BUCKET_SIZE
+        for slot in range(index, index + BUCKET_SIZE):
+            data = int(self.data[slot])
+            if int(self.keys[slot]) ^ data == zobrist_key:
+                if data == 0:
+                    return None
+                score = ((data >> SCORE_SHIFT) & 0xFFFFFFFF) - SCORE_OFFSET
+                return ((data & 0xFFFF) or None, score,
+                        (data >> DEPTH_SHIFT) & 0xFF, (data >> BOUND_SHIFT) & 0x3)
+        return None
+
+    def hashfull(self):
+        """Phần nghìn số slot đã dùng trong lần tìm kiếm hiện tại (lấy mẫu 1000 slot đầu)."""
+        sample = self.data[:1000]
+        ages = (sample >> np.uint64(AGE_SHIFT)) & np.uint64(AGE_MASK)
+        used = (sample != 0) & (ages == self.generation)
+        return int(used.sum()) * 1000 // len(sample)
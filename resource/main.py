@@ -6,9 +6,6 @@ from engine.bot import ChessBot
 from core.board_wrapper import BoardWrapper
 import threading
 
-# Initialize pygame
-pygame.init()
-
 # Window dimensions
 WIDTH, HEIGHT = 850, 850
 SQUARE_SIZE = WIDTH // 8  # Size of each square
@@ -22,36 +19,35 @@ TEXT_COLOR = (0, 0, 0)
 valid_moves = []  # Lưu trữ các nước đi hợp lệ
 highlight_color = (100, 200, 255, 100)  # Màu xanh nhạt trong suốt để highlight
 
-# Font for coordinates
-pygame.font.init()
-FONT = pygame.font.SysFont("Arial", 24)
-
-# Create window
-win = pygame.display.set_mode((WIDTH, HEIGHT))
-pygame.display.set_caption("Chess Board")
+# Font, cửa sổ, âm thanh và ảnh quân được tạo trong init_pygame() (gọi từ main()):
+# tiến trình ponder (spawn trên Windows/macOS) import lại file này và không được mở thêm cửa sổ hay thiết bị âm thanh
+FONT = None
+win = None
+sounds = {}
+pieces = {}
 
 # Path to assets directory
 ASSETS_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), "assets")
 
-pygame.mixer.init()     
-
 # Load sẵn âm thanh vào dictionary
 sound_files = {
     "move": "Move.mp3",
     "capture": "Capture.mp3",
 }
 
-# Load các âm thanh nếu tồn tại
-sounds = {}
-for key, file_name in sound_files.items():
-    path = os.path.join(ASSETS_DIR, file_name)
-    if os.path.exists(path):
-        try:
-            sounds[key] = pygame.mixer.Sound(path)
-        except Exception as e:
-            print(f"[!] Không thể load âm thanh {key}: {e}")
-    else:
-        print(f"[!] File âm thanh không tồn tại: {path}")
+def load_sounds():
+    # Load các âm thanh nếu tồn tại
+    sounds = {}
+    for key, file_name in sound_files.items():
+        path = os.path.join(ASSETS_DIR, file_name)
+        if os.path.exists(path):
+            try:
+                sounds[key] = pygame.mixer.Sound(path)
+            except Exception as e:
+                print(f"[!] Không thể load âm thanh {key}: {e}")
+        else:
+            print(f"[!] File âm thanh không tồn tại: {path}")
+    return sounds
         
 def manageSound(event):
     sound = sounds.get(event)
@@ -80,8 +76,24 @@ def load_pieces():
                 print(f"Unable to load image: {image_path} with error {e}")
     return pieces
 
-# Load pieces images
-pieces = load_pieces()
+def init_pygame():
+    global FONT, win, sounds, pieces
+    # Initialize pygame
+    pygame.init()
+
+    # Font for coordinates
+    pygame.font.init()
+    FONT = pygame.font.SysFont("Arial", 24)
+
+    # Create window
+    win = pygame.display.set_mode((WIDTH, HEIGHT))
+    pygame.display.set_caption("Chess Board")
+
+    pygame.mixer.init()
+    sounds = load_sounds()
+
+    # Load pieces images
+    pieces = load_pieces()
 
 # Initial board setup
 initial_board = [
@@ -510,9 +522,11 @@ def main():
     global selected_piece, selected_pos, turn, valid_moves, promoting_pawn, initial_board, game_over, winner, last_move, bot_thinking
     global game_mode, bot
 
+    init_pygame()
     game_mode, player_side = draw_mode_selection()
     if game_mode == 'PvE':
-        bot = ChessBot()
+        # Bot suy nghĩ tiếp trong thời gian của người chơi (ponder)
+        bot = ChessBot(ponder=True)
         turn = (player_side != 'b')  # nếu chọn trắng thì white đi trước
     else:
         bot = None
@@ -643,6 +657,8 @@ def main():
         pygame.display.flip()
         clock.tick(30)
 
+    if bot:
+        bot.close()
     pygame.quit()
 
 if __name__ == "__main__":
@@ -0,0 +1,28 @@
+import sys, os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import time
+import pytest
+from core.board_wrapper import BoardWrapper
+from core.move_generator import MoveGenerator
+
+START_FEN = "rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w KQkq - 0 1"
+KIWIPETE_FEN = "r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R w KQkq - 0 1"
+
+# Độ trễ cho phép sau giới hạn thời gian (giây): dừng ở lần kiểm tra đồng hồ kế tiếp + gộp kết quả
+TIME_SLACK = 0.25
+
+@pytest.fixture
+def kiwipete():
+    return BoardWrapper.from_fen(KIWIPETE_FEN)
+
+def legal_moves(board):
+    return MoveGenerator().generate_moves(board)
+
+class Stopwatch:
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.elapsed = time.perf_counter() - self.start
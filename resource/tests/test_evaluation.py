@@ -0,0 +1,51 @@
+import random
+from conftest import START_FEN, KIWIPETE_FEN, legal_moves
+from core.board_wrapper import BoardWrapper
+from engine.evaluation import Evaluation
+
+ENDGAME_FEN = "8/5k2/3p4/1p1Pp2p/pP2Pp1P/P4P1K/8/8 b - - 99 50"
+ROOK_ENDGAME_FEN = "8/8/4k3/8/2R5/8/3K4/8 w - - 0 1"
+
+def sample_positions(fens, plies=8, seed=7):
+    rng = random.Random(seed)
+    for fen in fens:
+        board = BoardWrapper.from_fen(fen)
+        for _ in range(plies):
+            yield board
+            moves = legal_moves(board)
+            if not moves:
+                break
+            board.make_move(rng.choice(moves))
+
+def test_lazy_exit_bound_never_contradicts_full_eval():
+    full_eval = Evaluation()
+    lazy_eval = Evaluation()
+    for board in sample_positions([START_FEN, KIWIPETE_FEN, ENDGAME_FEN, ROOK_ENDGAME_FEN]):
+        full = full_eval.evaluate_uncached(board)
+        for delta in (-3000, -1000, -300, -50, 0, 50, 300, 1000, 3000):
+            alpha = full + delta
+            beta = alpha + 1
+            score = lazy_eval.evaluate_uncached(board, alpha=alpha, beta=beta)
+            if score is None:
+                bound = lazy_eval.lazy_bound
+                # Thoát sớm chỉ khi cận thật sự nằm ngoài cửa sổ và đúng phía với điểm đầy đủ
+                assert bound <= alpha or bound >= beta
+                assert full <= bound if bound <= alpha else full >= bound
+            else:
+                assert score == full
+    assert lazy_eval.lazy_exits > 0
+
+def test_lazy_exit_does_not_depend_on_previous_evaluations():
+    board = BoardWrapper.from_fen(ROOK_ENDGAME_FEN)
+    fresh = Evaluation()
+    used = Evaluation()
+    for position in sample_positions([START_FEN, KIWIPETE_FEN], plies=12):
+        used.evaluate_uncached(position)
+    full = fresh.evaluate_uncached(board)
+    for alpha in range(int(full) - 1500, int(full) + 1500, 100):
+        results = []
+        for evaluation in (fresh, used):
+            score = evaluation.evaluate_uncached(board, alpha=alpha, beta=alpha + 1)
+            results.append(evaluation.lazy_bound if score is None else score)
+        assert results[0] == results[1]
+    assert fresh.lazy_exits > 0
@@ -0,0 +1,22 @@
+import pytest
+from conftest import TIME_SLACK, Stopwatch, legal_moves
+from engine.lazy_smp import LazySMPSearch
+
+@pytest.fixture(scope="module")
+def lazy_smp():
+    with LazySMPSearch(2, tt_size_mb=4) as search:
+        yield search
+
+@pytest.mark.parametrize("time_limit", [1.0, 2.0])
+def test_time_limit(lazy_smp, kiwipete, time_limit):
+    with Stopwatch() as watch:
+        result = lazy_smp.iterative_deepening(kiwipete, max_depth=64, time_limit=time_limit)
+    assert watch.elapsed < time_limit + TIME_SLACK
+    assert result.move in legal_moves(kiwipete)
+    assert result.depth >= 1
+
+def test_fixed_depth(lazy_smp, kiwipete):
+    result = lazy_smp.iterative_deepening(kiwipete, max_depth=2, time_limit=30.0)
+    assert result.depth == 2
+    assert result.move in legal_moves(kiwipete)
+    assert result.pv and result.pv[0] == result.move
@@ -0,0 +1,57 @@
+import pytest
+from conftest import TIME_SLACK, Stopwatch, START_FEN, legal_moves
+from core.board_wrapper import BoardWrapper
+from core.move import encode_move
+from engine.bot import ChessBot
+
+OPEN_GAME_FEN = "r1bqkbnr/pppp1ppp/2n5/4p3/4P3/5N2/PPPP1PPP/RNBQKB1R w KQkq - 2 3"
+
+@pytest.fixture
+def bot():
+    bot = ChessBot(total_time=30.0, increment=0.0, ponder=True)
+    bot.opening_book = None
+    yield bot
+    bot.close()
+
+def test_ponder_starts_after_move(bot):
+    board = BoardWrapper.from_fen(OPEN_GAME_FEN)
+    bot.make_move(board)
+    pv = bot.searcher.last_result.pv
+    assert len(pv) >= 2
+    assert bot.ponderer.pondering
+    expected = board.copy()
+    expected.make_move(pv[0])
+    expected.make_move(pv[1])
+    assert bot.ponderer.is_hit(expected)
+
+def test_ponder_hit(bot):
+    board = BoardWrapper.from_fen(OPEN_GAME_FEN)
+    bot.make_move(board)
+    searched = bot.searcher.last_result
+    board.make_move(searched.pv[0])
+    board.make_move(searched.pv[1])
+    with Stopwatch() as watch:
+        move = bot.make_move(board)
+    # Tìm kiếm nền được dùng tiếp tới giới hạn mềm rồi dừng, Search chính không chạy lại
+    assert bot.searcher.last_result is searched
+    assert watch.elapsed < bot.time_manager.hard_limit + TIME_SLACK
+    assert encode_move(move) in legal_moves(board)
+
+def test_ponder_miss(bot):
+    board = BoardWrapper.from_fen(OPEN_GAME_FEN)
+    bot.make_move(board)
+    searched = bot.searcher.last_result
+    other = BoardWrapper.from_fen(START_FEN)
+    assert not bot.ponderer.is_hit(other)
+    with Stopwatch() as watch:
+        move = bot.make_move(other)
+    # Kết quả ponder bị bỏ, Search chính tìm thế cờ mới
+    assert bot.searcher.last_result is not searched
+    assert watch.elapsed < bot.time_manager.hard_limit + TIME_SLACK
+    # Nước đi thuộc thế cờ mới, không phải kết quả ponder của thế cờ cũ
+    assert encode_move(move) in legal_moves(other)
+
+def test_close_stops_ponder_process(bot):
+    bot.make_move(BoardWrapper.from_fen(OPEN_GAME_FEN))
+    bot.close()
+    assert not bot.ponderer.process.is_alive()
@@ -0,0 +1,45 @@
+import multiprocessing
+import time
+import pytest
+from conftest import TIME_SLACK, Stopwatch, START_FEN, legal_moves
+from core.board_wrapper import BoardWrapper
+from engine.searcher import Search
+from engine.root_split import RootSplit, _init_worker, _search_root_move
+
+@pytest.fixture(scope="module")
+def root_split():
+    with RootSplit(2, tt_size_mb=4) as split:
+        yield split
+
+@pytest.mark.parametrize("time_limit", [1.0, 2.0])
+def test_time_limit(root_split, kiwipete, time_limit):
+    search = Search(tt_size_mb=4)
+    search.root_split = root_split
+    with Stopwatch() as watch:
+        result = search.iterative_deepening(kiwipete, max_depth=64, time_limit=time_limit)
+    assert watch.elapsed < time_limit + TIME_SLACK
+    assert result.move in legal_moves(kiwipete)
+
+def test_fixed_depth(root_split):
+    board = BoardWrapper.from_fen(START_FEN)
+    search = Search(tt_size_mb=4)
+    search.root_split = root_split
+    result = search.iterative_deepening(board, max_depth=3, time_limit=60.0)
+    # Thứ tự các nước gốc xong ở tiến trình phụ không cố định nên chỉ kiểm tra độ sâu và tính hợp lệ
+    assert result.depth == 3
+    assert result.move in legal_moves(board)
+    assert result.pv and result.pv[0] == result.move
+
+def test_board_state_round_trip(kiwipete):
+    board = BoardWrapper.from_state(kiwipete.to_state())
+    assert board.squares == kiwipete.squares
+    assert board.bitboards == kiwipete.bitboards
+    assert board.zobrist_key == kiwipete.zobrist_key
+    assert (board.material, board.pst_mg, board.pst_eg) == (kiwipete.material, kiwipete.pst_mg, kiwipete.pst_eg)
+
+def test_worker_skips_move_after_deadline(kiwipete):
+    # Nước còn trong hàng đợi khi đã hết giờ không được bắt đầu tìm
+    _init_worker(multiprocessing.Value('q', 0), multiprocessing.Event(), 1, 1)
+    move = legal_moves(kiwipete)[0]
+    result = _search_root_move(kiwipete.to_state(), move, 4, 100000, time.perf_counter_ns() - 10**9, 1)
+    assert result == (move, 0, [], 0, True)
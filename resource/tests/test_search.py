@@ -0,0 +1,35 @@
+import math
+from conftest import legal_moves
+from core.board_wrapper import BoardWrapper
+from engine.searcher import Search, MATE_SCORE
+from engine.transposition_table import TTEntry
+
+def test_only_losing_captures_in_check_are_searched():
+    # Bị chiếu, nước hợp lệ duy nhất Qxe1 là capture lỗ theo SEE: nút phải trả về điểm hữu hạn
+    board = BoardWrapper.from_fen("7k/4Q3/8/8/8/8/PP3p2/K3r3 w - - 0 1")
+    search = Search()
+    search.start_clock(30.0)
+    score, move = search.alpha_beta(board, 2, -100000, 100000, 1)
+    assert math.isfinite(score)
+    assert move in legal_moves(board)
+
+def test_forced_losing_recapture_does_not_crash_search():
+    # Sau ...Re1+ nước duy nhất của trắng là Qxe1 (lỗ theo SEE); trước đây +inf tới store_transposition
+    board = BoardWrapper.from_fen("5R2/4Q3/8/7k/8/4r3/PP3p2/K7 b - - 0 1")
+    result = Search().iterative_deepening(board, max_depth=4, time_limit=30.0)
+    assert result.depth == 4
+    assert math.isfinite(result.score)
+    assert result.move in legal_moves(board)
+
+def test_mate_scores_are_stored_relative_to_the_node():
+    search = Search(tt_size_mb=1)
+    key = 0x123456789ABCDEF
+    # Lưu ở ply 3: bên đi bị chiếu hết ở ply 5 (cách nút 2 ply)
+    search.store_transposition(key, 4, -MATE_SCORE + 5, TTEntry.EXACT, 1, ply=3)
+    # Gặp lại cùng thế cờ ở ply 1 (hoặc ở lần tìm kiếm sau): vẫn là chiếu hết sau 2 ply
+    assert search.probe_transposition(key, 4, -100000, 100000, ply=1)[0] == -MATE_SCORE + 3
+    search.store_transposition(key, 4, MATE_SCORE - 6, TTEntry.EXACT, 1, ply=2)
+    assert search.probe_transposition(key, 4, -100000, 100000, ply=0)[0] == MATE_SCORE - 4
+    # Điểm thường không bị đổi
+    search.store_transposition(key, 4, 37, TTEntry.EXACT, 1, ply=7)
+    assert search.probe_transposition(key, 4, -100000, 100000, ply=2)[0] == 37
@@ -0,0 +1,36 @@
+import multiprocessing
+import threading
+import pytest
+from conftest import TIME_SLACK, Stopwatch, legal_moves
+from engine.searcher import Search
+
+def test_time_limit(kiwipete):
+    # Kiwipete từng dừng cả lần tìm kiếm khi quiescence chạm giới hạn độ sâu (không có nước nào)
+    search = Search()
+    with Stopwatch() as watch:
+        result = search.iterative_deepening(kiwipete, max_depth=64, time_limit=1.0)
+    assert watch.elapsed < 1.0 + TIME_SLACK
+    assert result.move in legal_moves(kiwipete)
+
+@pytest.mark.parametrize("make_flag", [threading.Event, lambda: multiprocessing.Value('b', 0)],
+                         ids=["threading.Event", "multiprocessing.Value"])
+def test_external_stop_flag(kiwipete, make_flag):
+    flag = make_flag()
+    search = Search()
+    search.stop_event = flag
+    timer = threading.Timer(0.5, flag.set if hasattr(flag, 'set') else lambda: setattr(flag, 'value', 1))
+    timer.start()
+    with Stopwatch() as watch:
+        result = search.iterative_deepening(kiwipete, max_depth=64, time_limit=30.0)
+    timer.join()
+    assert watch.elapsed < 0.5 + TIME_SLACK
+    assert result.move in legal_moves(kiwipete)
+
+def test_stop_from_other_thread(kiwipete):
+    search = Search()
+    timer = threading.Timer(0.5, search.stop)
+    timer.start()
+    with Stopwatch() as watch:
+        search.iterative_deepening(kiwipete, max_depth=64, time_limit=30.0)
+    timer.join()
+    assert watch.elapsed < 0.5 + TIME_SLACK
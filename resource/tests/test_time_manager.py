@@ -0,0 +1,61 @@
+import pytest
+from conftest import TIME_SLACK, Stopwatch, legal_moves
+from engine.searcher import Search
+from engine.time_manager import TimeManager, MOVE_OVERHEAD, DEFAULT_MOVES_TO_GO
+
+def test_limits_from_clock():
+    manager = TimeManager(60.0, 1.0)
+    manager.start()
+    soft = (60.0 - MOVE_OVERHEAD) / DEFAULT_MOVES_TO_GO + 0.75
+    assert manager.soft_limit == pytest.approx(soft)
+    assert manager.soft_limit < manager.hard_limit <= (60.0 - MOVE_OVERHEAD) * 0.5
+
+def test_last_move_before_time_control():
+    manager = TimeManager(5.0, 0.0, moves_to_go=1)
+    manager.start()
+    assert manager.hard_limit <= 5.0 - MOVE_OVERHEAD
+    assert manager.soft_limit <= manager.hard_limit
+
+def test_stable_best_move_cuts_time():
+    stable = TimeManager(60.0, 0.0)
+    changing = TimeManager(60.0, 0.0)
+    for manager in (stable, changing):
+        manager.start()
+    for depth in range(1, 7):
+        stable.update(depth, 100, 20, 0.01 * depth)
+        changing.update(depth, 100 + depth, 20, 0.01 * depth)
+    assert stable.scaled_soft_limit() < stable.soft_limit
+    assert changing.scaled_soft_limit() > changing.soft_limit
+
+def test_fail_low_extends_time():
+    manager = TimeManager(60.0, 0.0)
+    manager.start()
+    manager.update(1, 100, 50, 0.01)
+    normal = manager.scaled_soft_limit()
+    manager.report_fail_low()
+    assert manager.scaled_soft_limit() > normal
+
+def test_predicted_iteration_past_hard_limit_stops():
+    manager = TimeManager(60.0, 0.0)
+    manager.start()
+    manager.hard_limit = 1.0
+    manager.soft_limit = 1.0
+    manager.iteration_times = [0.1, 0.4]
+    # Vòng sau dự đoán 0.4 * 4 = 1.6s > giới hạn cứng
+    assert manager.should_stop()
+
+def test_finish_updates_clock():
+    manager = TimeManager(10.0, 2.0, moves_to_go=5)
+    manager.start()
+    used = manager.finish()
+    assert manager.remaining == pytest.approx(10.0 - used + 2.0)
+    assert manager.moves_to_go == 4
+
+@pytest.mark.parametrize("clock, increment, moves_to_go", [(10.0, 0.0, None), (3.0, 0.0, 1), (60.0, 1.0, None)])
+def test_search_respects_hard_limit(kiwipete, clock, increment, moves_to_go):
+    manager = TimeManager(clock, increment, moves_to_go)
+    manager.start()
+    with Stopwatch() as watch:
+        result = Search().iterative_deepening(kiwipete, max_depth=64, time_manager=manager)
+    assert watch.elapsed < manager.hard_limit + TIME_SLACK
+    assert result.move in legal_moves(kiwipete)
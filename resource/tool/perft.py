@@ -0,0 +1,112 @@
+import sys, os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import argparse
+import time
+from core.board_wrapper import BoardWrapper
+from core.move_generator import MoveGenerator
+from core.move import move_to_uci
+
+START_FEN = "rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w KQkq - 0 1"
+
+# (tên, FEN, số node chuẩn theo độ sâu 1, 2, 3, ...) — https://www.chessprogramming.org/Perft_Results
+PERFT_SUITE = [
+    ("startpos", START_FEN,
+     [20, 400, 8902, 197281, 4865609]),
+    ("kiwipete", "r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R w KQkq - 0 1",
+     [48, 2039, 97862, 4085603]),
+    ("position3", "8/2p5/3p4/KP5r/1R3p1k/8/4P1P1/8 w - - 0 1",
+     [14, 191, 2812, 43238, 674624]),
+    ("position4", "r3k2r/Pppp1ppp/1b3nbN/nP6/BBP1P3/q4N2/Pp1P2PP/R2Q1RK1 w kq - 0 1",
+     [6, 264, 9467, 422333]),
+    ("position5", "rnbq1k1r/pp1Pbppp/2p5/8/2B5/8/PPP1NnPP/RNBQK2R w KQ - 1 8",
+     [44, 1486, 62379, 2103487]),
+    ("position6", "r4rk1/1pp1qppp/p1np1n2/2b1p1B1/2B1P1b1/P1NP1N2/1PP1QPPP/R4RK1 w - - 0 10",
+     [46, 2079, 89890, 3894594]),
+]
+
+def perft(board, depth, move_gen=None, legal=True):
+    """
+    Đếm số node lá ở độ sâu depth (chỉ nước hợp lệ).
+    legal=False: dùng chế độ pseudo-legal của search, loại nước phạm luật sau make_move.
+    """
+    if depth == 0:
+        return 1
+    move_gen = move_gen or MoveGenerator()
+    moves = move_gen.generate_moves(board, legal=legal)
+    if depth == 1 and legal:
+        return len(moves)
+
+    nodes = 0
+    for move in moves:
+        undo = board.make_move(move)
+        if legal or move_gen.is_legal_after_move(board):
+            nodes += perft(board, depth - 1, move_gen, legal)
+        board.unmake_move(undo)
+    return nodes
+
+def divide(board, depth, move_gen=None, legal=True):
+    """Trả về {tên nước: số node} cho từng nước ở gốc — dùng để khoanh vùng lỗi sinh nước."""
+    move_gen = move_gen or MoveGenerator()
+    result = {}
+    for move in move_gen.generate_moves(board, legal=legal):
+        undo = board.make_move(move)
+        if legal or move_gen.is_legal_after_move(board):
+            result[move_to_uci(move)] = perft(board, depth - 1, move_gen, legal)
+        board.unmake_move(undo)
+    return result
+
+def run_suite(max_depth=3, max_nodes=None, legal=True):
+    """Chạy perft trên PERFT_SUITE, in số node, node/giây và các sai lệch. Trả về số sai lệch."""
+    mismatches = 0
+    total_nodes = 0
+    total_time = 0.0
+    for name, fen, expected in PERFT_SUITE:
+        for depth in range(1, min(max_depth, len(expected)) + 1):
+            if max_nodes is not None and expected[depth - 1] > max_nodes:
+                break
+            board = BoardWrapper.from_fen(fen)
+            start = time.perf_counter()
+            nodes = perft(board, depth, legal=legal)
+            elapsed = time.perf_counter() - start
+            total_nodes += nodes
+            total_time += elapsed
+
+            ok = nodes == expected[depth - 1]
+            mismatches += not ok
+            nps = nodes / elapsed if elapsed > 0 else 0
+            status = "ok" if ok else f"MISMATCH (expected {expected[depth - 1]})"
+            print(f"{name:<10} depth {depth}: {nodes:>9} nodes {elapsed:8.2f}s {nps:>9.0f} nps  {status}")
+
+    nps = total_nodes / total_time if total_time > 0 else 0
+    print(f"\nTotal: {total_nodes} nodes in {total_time:.2f}s ({nps:.0f} nps), {mismatches} mismatches")
+    return mismatches
+
+def main():
+    parser = argparse.ArgumentParser(description="Perft / divide cho MoveGenerator")
+    parser.add_argument("--depth", type=int, default=3)
+    parser.add_argument("--fen", help="chạy perft trên một vị trí thay vì bộ vị trí chuẩn")
+    parser.add_argument("--divide", action="store_true", help="in số node theo từng nước ở gốc")
+    parser.add_argument("--max-nodes", type=int, help="bỏ qua các độ sâu có số node chuẩn lớn hơn giá trị này")
+    parser.add_argument("--pseudo", action="store_true",
+                        help="kiểm tra chế độ sinh nước pseudo-legal + kiểm tra hợp lệ sau make_move (như search)")
+    args = parser.parse_args()
+
+    if args.fen:
+        board = BoardWrapper.from_fen(args.fen)
+        start = time.perf_counter()
+        if args.divide:
+            result = divide(board, args.depth, legal=not args.pseudo)
+            for name in sorted(result):
+                print(f"{name}: {result[name]}")
+            nodes = sum(result.values())
+        else:
+            nodes = perft(board, args.depth, legal=not args.pseudo)
+        elapsed = time.perf_counter() - start
+        print(f"\nNodes: {nodes}  Time: {elapsed:.2f}s  NPS: {nodes / elapsed if elapsed > 0 else 0:.0f}")
+        return 0
+
+    return 1 if run_suite(args.depth, args.max_nodes, legal=not args.pseudo) else 0
+
+if __name__ == "__main__":
+    sys.exit(main())